@@ -1,5 +1,11 @@
 # app/core/cache.py
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Iterable, Optional
+from collections import OrderedDict
+from pathlib import Path
+from app.core.config import settings
+import asyncio
+import os
+import tempfile
 import time
 import logging
 
@@ -20,7 +26,17 @@ class SimpleCache:
             ttl (int): 캐시 항목의 수명(초), 기본값 1시간
         """
         self._cache: Dict[str, Dict[str, Any]] = {}
+        self._tags: Dict[str, set] = {}
         self.ttl = ttl
+
+    def _remove(self, key: str) -> None:
+        """항목 삭제 (태그의 키 목록에서도 제거하고, 빈 태그는 삭제)"""
+        item = self._cache.pop(key)
+        tag = item.get("tag")
+        if tag and tag in self._tags:
+            self._tags[tag].discard(key)
+            if not self._tags[tag]:
+                del self._tags[tag]
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -39,12 +55,12 @@ class SimpleCache:
         # TTL 확인
         if time.time() > item["expires_at"]:
             # 만료된 항목 삭제
-            del self._cache[key]
+            self._remove(key)
             return None
         
         return item["value"]
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tag: Optional[str] = None) -> None:
         """
         캐시에 값 설정
         
@@ -52,12 +68,18 @@ class SimpleCache:
             key (str): 설정할 항목의 키
             value (Any): 저장할 값
             ttl (Optional[int]): 이 항목에 대한 특정 TTL, 기본값 사용 시 None
+            tag (Optional[str]): 묶음 삭제용 태그 (예: 문제 ID)
         """
         expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        if key in self._cache:
+            self._remove(key)
         self._cache[key] = {
             "value": value,
-            "expires_at": expires_at
+            "expires_at": expires_at,
+            "tag": tag
         }
+        if tag:
+            self._tags.setdefault(tag, set()).add(key)
     
     def delete(self, key: str) -> bool:
         """
@@ -70,13 +92,23 @@ class SimpleCache:
             bool: 항목이 삭제되었는지 여부
         """
         if key in self._cache:
-            del self._cache[key]
+            self._remove(key)
             return True
         return False
     
+    def delete_tag(self, tag: str) -> int:
+        """
+        태그가 붙은 항목 모두 삭제
+        
+        Returns:
+            int: 삭제된 항목 수
+        """
+        return sum(1 for key in list(self._tags.get(tag, ())) if self.delete(key))
+
     def clear(self) -> None:
         """모든 캐시 항목 삭제"""
         self._cache.clear()
+        self._tags.clear()
     
     def cleanup(self) -> int:
         """
@@ -92,7 +124,7 @@ class SimpleCache:
         ]
         
         for key in expired_keys:
-            del self._cache[key]
+            self._remove(key)
         
         return len(expired_keys)
 
@@ -114,5 +146,312 @@ class SimpleCache:
         }
 
 
+class LRUCache:
+    """
+    최대 항목 수가 제한된 인메모리 LRU 캐시
+    가장 오래 사용되지 않은 항목부터 제거하며, 적중률 통계를 제공합니다.
+    """
+
+    def __init__(self, max_items: int = 1024, ttl: Optional[int] = None):
+        """
+        캐시 초기화
+
+        Args:
+            max_items (int): 보관할 최대 항목 수
+            ttl (Optional[int]): 캐시 항목의 수명(초), None이면 만료 없음
+        """
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_items = max_items
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        캐시에서 값을 가져오고 최근 사용 항목으로 표시합니다.
+
+        Args:
+            key (str): 가져올 항목의 키
+
+        Returns:
+            Optional[Any]: 캐시된 값 또는 키가 없거나 만료된 경우 None
+        """
+        item = self._cache.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        if item["expires_at"] is not None and time.time() > item["expires_at"]:
+            del self._cache[key]
+            self.misses += 1
+            return None
+
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return item["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        캐시에 값 설정 (용량 초과 시 가장 오래된 항목 제거)
+
+        Args:
+            key (str): 설정할 항목의 키
+            value (Any): 저장할 값
+        """
+        expires_at = time.time() + self.ttl if self.ttl else None
+        self._cache[key] = {"value": value, "expires_at": expires_at}
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_items:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """캐시에서 항목 삭제"""
+        return self._cache.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """모든 캐시 항목 삭제"""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        캐시 통계 정보 반환
+
+        Returns:
+            Dict[str, Any]: 항목 수, 적중/미적중 수, 적중률
+        """
+        lookups = self.hits + self.misses
+        return {
+            "total_items": len(self._cache),
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class DiskCacheTier:
+    """
+    파일 시스템 기반 영속 캐시 계층
+    키마다 하나의 파일을 저장하며, 파일 I/O는 작업 스레드에서 수행해 이벤트 루프를 막지 않습니다.
+    """
+
+    def __init__(self, directory: str, ttl: Optional[int] = None):
+        """
+        Args:
+            directory (str): 캐시 파일을 저장할 디렉토리
+            ttl (Optional[int]): 캐시 항목의 수명(초), None이면 만료 없음
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _path(self, key: str) -> Path:
+        # 한 디렉토리에 파일이 몰리지 않도록 키 앞 2글자로 분산
+        return self.directory / key[:2] / key
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        if self.ttl and time.time() - path.stat().st_mtime > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        return path.read_bytes()
+
+    def _write(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 동시 쓰기 중 일부만 기록된 파일을 읽지 않도록 임시 파일 후 교체 (쓰는 쪽마다 고유한 임시 파일)
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{key}.", suffix=".tmp", delete=False) as f:
+            f.write(value)
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await asyncio.to_thread(self._read, key)
+        except Exception as e:
+            logger.warning(f"디스크 캐시 조회 실패: {str(e)}")
+            return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await asyncio.to_thread(self._write, key, value)
+        except Exception as e:
+            logger.warning(f"디스크 캐시 저장 실패: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "disk", "directory": str(self.directory)}
+
+
+class RedisCacheTier:
+    """
+    Redis 기반 영속 캐시 계층
+    Redis 장애 시 캐시 미적중으로 처리하여 본 요청은 계속 진행됩니다.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: Optional[int] = None):
+        """
+        Args:
+            url (str): Redis 접속 URL
+            prefix (str): 키 접두사 (용도별 네임스페이스)
+            ttl (Optional[int]): 캐시 항목의 수명(초), None이면 만료 없음
+        """
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self.ttl = ttl
+        self._redis = redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._redis.get(f"{self.prefix}:{key}")
+        except Exception as e:
+            logger.warning(f"Redis 캐시 조회 실패: {str(e)}")
+            return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self._redis.set(f"{self.prefix}:{key}", value, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Redis 캐시 저장 실패: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "prefix": self.prefix}
+
+
+def create_persistent_tier(backend: str, prefix: str, directory: str, ttl: Optional[int] = None):
+    """
+    설정값에 따른 영속 캐시 계층 생성
+
+    Args:
+        backend (str): 'disk', 'redis', 'none'
+        prefix (str): Redis 키 접두사
+        directory (str): 디스크 캐시 디렉토리
+        ttl (Optional[int]): 항목 수명(초)
+
+    Returns:
+        DiskCacheTier | RedisCacheTier | None: 영속 계층 (사용하지 않으면 None)
+    """
+    if backend == "redis":
+        return RedisCacheTier(
+            url=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
+            prefix=prefix,
+            ttl=ttl
+        )
+    if backend == "disk":
+        return DiskCacheTier(directory, ttl=ttl)
+    return None
+
+
+class TieredCache:
+    """
+    2계층 캐시: 1계층 인메모리 LRU + 2계층 디스크/Redis 영속 캐시
+    영속 계층에는 encode/decode로 변환한 바이트를 저장하고, 영속 계층에서 찾은 항목은 LRU로 올립니다.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        backend: str,
+        prefix: str,
+        directory: str,
+        ttl: Optional[int] = None,
+        encode: Callable[[Any], bytes] = bytes,
+        decode: Callable[[bytes], Any] = bytes
+    ):
+        """
+        Args:
+            max_items (int): 인메모리 LRU 최대 항목 수
+            backend (str): 영속 계층 종류 ('disk', 'redis', 'none')
+            prefix (str): 용도별 이름 (Redis 키 접두사, 로그)
+            directory (str): 디스크 캐시 디렉토리
+            ttl (Optional[int]): 영속 계층 항목 수명(초)
+            encode (Callable[[Any], bytes]): 값 → 영속 계층 바이트
+            decode (Callable[[bytes], Any]): 영속 계층 바이트 → 값 (손상된 항목은 예외)
+        """
+        self.prefix = prefix
+        self.memory = LRUCache(max_items=max_items)
+        self.persistent = create_persistent_tier(backend, prefix, directory, ttl)
+        self.encode = encode
+        self.decode = decode
+        self.lookups = 0
+        self.persistent_hits = 0
+
+    async def _get_persistent(self, key: str) -> Optional[Any]:
+        raw = await self.persistent.get(key)
+        if raw is None:
+            return None
+        try:
+            value = self.decode(raw)
+        except Exception:
+            logger.warning(f"손상된 캐시 항목 무시 ({self.prefix}): {key}")
+            return None
+        self.persistent_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        """값 조회 (LRU → 영속 계층 순서, 없으면 None)"""
+        self.lookups += 1
+        value = self.memory.get(key)
+        if value is not None or self.persistent is None:
+            return value
+        return await self._get_persistent(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        여러 키를 한 번에 조회 (영속 계층 조회는 동시에 실행)
+
+        Returns:
+            Dict[str, Any]: 캐시에 있는 키 → 값 (없는 키는 포함하지 않음)
+        """
+        keys = list(dict.fromkeys(keys))
+        self.lookups += len(keys)
+        found: Dict[str, Any] = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+
+        if missing and self.persistent is not None:
+            values = await asyncio.gather(*(self._get_persistent(key) for key in missing))
+            found.update({key: value for key, value in zip(missing, values) if value is not None})
+        return found
+
+    async def set(self, key: str, value: Any) -> None:
+        """값 저장 (두 계층 모두)"""
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            await self.persistent.set(key, self.encode(value))
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        for key, value in items.items():
+            self.memory.set(key, value)
+        if self.persistent is not None and items:
+            await asyncio.gather(*(self.persistent.set(key, self.encode(value)) for key, value in items.items()))
+
+    def stats(self) -> Dict[str, Any]:
+        """전체 적중률(LRU + 영속 계층)과 계층별 통계"""
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.persistent_hits
+        return {
+            "lookups": self.lookups,
+            "hits": hits,
+            "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+            "memory": memory,
+            "persistent": self.persistent.stats() if self.persistent else None,
+            "persistent_hits": self.persistent_hits
+        }
+
+
 # 피드백 캐싱을 위한 인스턴스 생성 (24시간 TTL)
 feedback_cache = SimpleCache(ttl=24 * 3600)
@@ -0,0 +1,57 @@
+# app/core/concurrency.py
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, List, Optional, Sequence, TypeVar
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class FanOutResult(Generic[R]):
+    """
+    팬아웃 작업 하나의 결과
+    성공 시 value, 실패 시 error가 채워집니다.
+    """
+    index: int
+    value: Optional[R] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def bounded_gather(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[R]],
+    limit: int
+) -> List[FanOutResult[R]]:
+    """
+    동시 실행 개수를 제한하여 items 전체에 worker를 병렬 적용합니다.
+    결과는 입력 순서를 유지하며, 개별 항목의 예외는 전체 작업을 중단시키지 않고
+    해당 항목의 FanOutResult.error에 담깁니다.
+
+    Args:
+        items (Sequence[T]): 처리할 항목 목록
+        worker (Callable[[T], Awaitable[R]]): 항목 하나를 처리하는 코루틴 함수
+        limit (int): 동시에 실행할 최대 작업 수
+
+    Returns:
+        List[FanOutResult[R]]: 입력 순서와 동일한 순서의 결과 목록
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index: int, item: T) -> FanOutResult[R]:
+        async with semaphore:
+            try:
+                return FanOutResult(index=index, value=await worker(item))
+            except Exception as e:
+                logger.warning(f"팬아웃 작업 실패 (index={index}): {str(e)}")
+                return FanOutResult(index=index, error=e)
+
+    return list(await asyncio.gather(*(run(i, item) for i, item in enumerate(items))))
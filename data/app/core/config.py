@@ -1,7 +1,8 @@
 from pydantic_settings import BaseSettings
+from typing import Any, Dict, List
 
 class Settings(BaseSettings):
-    OCR_BACKEND: str = "mathpix"
+    OCR_BACKEND: str = "mathpix"  # mathpix | sumen | hedged
     MATHPIX_APP_ID: str
     MATHPIX_APP_KEY: str
     OPENAI_API_KEY: str
@@ -15,8 +16,134 @@ class Settings(BaseSettings):
     
     # 임베딩 관련 설정
     EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # 임베딩 일괄 요청 한도 (요청당 추정 토큰 수 / 입력 수)
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100000
+    EMBEDDING_BATCH_MAX_ITEMS: int = 2048
     USE_SIMILARITY_ANALYSIS: bool = True
     ALWAYS_USE_LLM: bool = False
+    # 모범 답안 임베딩이 미리 생성되지 않은 문제를 요청 중에 임베딩할지 여부
+    # (기본값 False: scripts/convert_problems_to_db.py --embeddings-dir로 오프라인 생성)
+    EMBED_REFERENCE_ON_REQUEST: bool = False
+    # 모범 답안 임베딩 저장 디렉토리 ({문제 ID}.npy 행렬 + {문제 ID}.meta.json)
+    EMBEDDING_STORE_DIR: str = "static/embeddings"
+    # 학생 풀이 단계 임베딩 캐시 (모델 이름 + 정규화된 LaTeX 기반)
+    STEP_EMBEDDING_CACHE_ENABLED: bool = True
+    STEP_EMBEDDING_CACHE_MAX_ITEMS: int = 20000
+    STEP_EMBEDDING_CACHE_BACKEND: str = "disk"  # disk | redis | none
+    STEP_EMBEDDING_CACHE_DIR: str = "cache/step_embeddings"
+    STEP_EMBEDDING_CACHE_TTL: int = 90 * 24 * 3600
+    # 전체 모범 답안 풀이 단계 ANN 색인 (app/scripts/build_step_index.py로 생성)
+    STEP_INDEX_DIR: str = "static/step_index"
+    STEP_INDEX_NPROBE: int = 8
+    # 색인 파일을 다시 확인하는 간격(초), 서버 실행 중에 색인을 새로 만들어도 재시작 없이 반영
+    STEP_INDEX_RECHECK_SECONDS: float = 60.0
+
+    # 문제 데이터 파일 (시작 시 한 번 로드하여 인덱싱)
+    PROBLEM_DATA_PATH: str = "static/csvjson.json"  # row_to_json 목록 (id, problemNo)
+    PROBLEM_DB_PATH: str = "static/problems_db.json"  # problemNo → 문제 정의 (description 포함)
+    # convert_problems_to_db.py로 만든 SQLite 카탈로그 (파일이 있으면 JSON 대신 지연 연결하여 사용)
+    PROBLEM_CATALOG_PATH: str = "static/problems.sqlite"
+    # 추가 교재 JSON 파일 패턴 (JSON 인덱스 사용 시 병합, 새 파일이 생기면 자동 재로드)
+    PROBLEM_EXTRA_GLOBS: List[str] = []
+    # 문제 데이터 파일 변경 확인 주기(초), 0이면 감시하지 않음 (관리자 API로만 재로드)
+    PROBLEM_WATCH_INTERVAL: float = 30.0
+    # 유사 문제 추천 (문제 내용/해설 문자 n-gram TF-IDF 색인, 오류가 있는 풀이에 추천)
+    SIMILAR_PROBLEMS_ENABLED: bool = True
+    SIMILAR_PROBLEMS_TOP_K: int = 5
+    SIMILAR_PROBLEMS_NGRAM_MIN: int = 2
+    SIMILAR_PROBLEMS_NGRAM_MAX: int = 3
+    # 관리자 API 키 (X-Admin-Key 헤더), 빈 값이면 관리자 API 요청을 모두 거부
+    ADMIN_API_KEY: str = ""
+
+    # OCR 병렬 처리 설정 (동시에 진행할 최대 작업 수)
+    OCR_MAX_CONCURRENT_DOWNLOADS: int = 8
+    OCR_MAX_CONCURRENT_REQUESTS: int = 4
+
+    # 누적 스냅샷 OCR 방식: delta(새로 추가된 필기 영역만 OCR) | lines(줄 단위 분할 + 제출 단위 줄 캐시)
+    #                      | full(매 단계 전체 이미지 OCR)
+    OCR_SNAPSHOT_STRATEGY: str = "delta"
+    OCR_DELTA_INK_THRESHOLD: int = 200  # 이 값보다 어두운 픽셀을 필기로 간주
+    OCR_DELTA_MIN_NEW_PIXELS: int = 30  # 이보다 적게 바뀌면 변경 없음으로 처리
+    OCR_DELTA_MARGIN: int = 8  # 새 필기 영역 크롭 여백(px)
+    OCR_DELTA_MAX_AREA_RATIO: float = 0.6  # 변경 영역이 이 비율을 넘으면 전체 OCR
+    OCR_DELTA_MAX_ERASED_RATIO: float = 0.02  # 기존 필기가 이 비율 이상 지워지면 전체 OCR
+    OCR_LINE_MIN_GAP: int = 6  # 줄 사이로 인정할 최소 빈 행 수(px)
+    OCR_LINE_MIN_HEIGHT: int = 4  # 이보다 낮은 줄은 잡음으로 제외
+    OCR_LINE_MAX_LINES: int = 40  # 이보다 많이 분할되면 전체 OCR
+
+    # OCR 전송 전 이미지 전처리 (엔진별 프로파일, JSON 환경 변수로 재정의 가능)
+    OCR_PREPROCESS_ENABLED: bool = True
+    OCR_PREPROCESS_PROFILES: Dict[str, Dict[str, Any]] = {
+        "mathpix": {"autocrop": True, "margin": 16, "target_line_height": 64, "max_side": 2048, "mode": "gray"},
+        "sumen": {"autocrop": True, "margin": 8, "target_line_height": 48, "max_side": 1024, "mode": "gray"}
+    }
+
+    # 공유 HTTP 커넥션 풀 설정 (호스트별)
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_ENABLE_HTTP2: bool = True
+
+    # OCR 결과 캐시 설정 (이미지 해시 기반)
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_MAX_ITEMS: int = 2048
+    OCR_CACHE_BACKEND: str = "disk"  # disk | redis | none
+    OCR_CACHE_DIR: str = "cache/ocr"
+    OCR_CACHE_TTL: int = 30 * 24 * 3600
+
+    # 외부 API 보호: 제공자별 토큰 버킷(초당 요청 수, 순간 최대), 재시도, 서킷 브레이커
+    PROVIDER_RATE_LIMITS: Dict[str, Dict[str, float]] = {
+        "mathpix": {"rate": 10, "burst": 20},
+        "openai": {"rate": 8, "burst": 16}  # 모델별로 각각 적용
+    }
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY: float = 0.5
+    RETRY_MAX_DELAY: float = 8.0
+    # 재시도와 대기를 포함한 제공자별 전체 허용 시간(초), 넘기면 실패 처리해 대체 경로로 넘김
+    RETRY_DEADLINES: Dict[str, float] = {
+        "mathpix": 30.0,
+        "openai": 90.0
+    }
+    # 서킷 브레이커를 여는 연속 실패 호출 수 (재시도를 포함한 호출 하나가 실패 1회)
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0
+
+    # 헤지 OCR (OCR_BACKEND=hedged): 주 엔진이 마감 시간 내 응답하지 않으면 보조 엔진에도 요청
+    OCR_HEDGE_PRIMARY: str = "mathpix"
+    OCR_HEDGE_SECONDARY: str = "sumen"
+    OCR_HEDGE_PERCENTILE: float = 95.0  # 주 엔진 지연 시간 백분위수를 마감 시간으로 사용
+    OCR_HEDGE_MIN_SAMPLES: int = 20  # 표본이 이보다 적으면 기본 마감 시간 사용
+    OCR_HEDGE_DEFAULT_DELAY: float = 3.0
+    OCR_HEDGE_MIN_DELAY: float = 0.5
+    OCR_HEDGE_MAX_DELAY: float = 10.0
+    OCR_HEDGE_MIN_CONFIDENCE: float = 0.5  # 이 신뢰도 이상이면 바로 채택
+
+    # 로컬 Sumen OCR 엔진 설정 (OCR_BACKEND=sumen)
+    SUMEN_MODEL_NAME: str = "hoang-quoc-trung/sumen-base"
+    SUMEN_DEVICE: str = "auto"  # auto | cpu | cuda
+    SUMEN_MAX_BATCH_SIZE: int = 16
+    SUMEN_NUM_BEAMS: int = 4
+    # 디코딩 방식: adaptive(greedy 후 저신뢰도만 빔 서치) | beam(항상 빔 서치)
+    SUMEN_DECODING: str = "adaptive"
+    SUMEN_CONFIDENCE_THRESHOLD: float = 0.85
+    # greedy 최대 생성 길이 = 최소값 + 이미지 너비(px) * 비율 (모델 max_length 이하)
+    SUMEN_MIN_LENGTH_CAP: int = 32
+    SUMEN_TOKENS_PER_PIXEL: float = 0.15
+    # 추론 프로파일: fp32 | int8(디코더 동적 양자화) | onnx(ONNX Runtime)
+    SUMEN_PROFILE: str = "fp32"
+    SUMEN_NUM_THREADS: int = 0  # intra-op 스레드 수, 0이면 기본값
+    SUMEN_ONNX_DIR: str = "ocr_models/sumen-onnx"
+    # 여러 요청의 이미지를 모아 한 번에 추론하기 위한 최대 대기 시간(ms)
+    SUMEN_BATCH_MAX_WAIT_MS: float = 10.0
+    # 시작 시 백그라운드 로드/워밍업 (OCR_BACKEND=sumen이면 항상 사전 로드)
+    SUMEN_PRELOAD: bool = False
+    SUMEN_WARMUP: bool = True
+    # 마지막 사용 후 모델을 언로드할 시간(초), 0이면 언로드하지 않음
+    SUMEN_IDLE_UNLOAD_SECONDS: int = 0
+    # 로드 실패 후 다시 로드하기까지의 대기 시간(초), 연속 실패마다 두 배 (최대 10배)
+    SUMEN_LOAD_RETRY_SECONDS: float = 60.0
+    # 로컬 모델이 준비되기 전 요청을 처리할 엔진 (빈 값이면 로드 완료까지 대기)
+    SUMEN_FALLBACK_ENGINE: str = "mathpix"
 
     class Config:
         env_file = ".env"
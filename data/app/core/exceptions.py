@@ -33,12 +33,22 @@ class AIFeedbackError(Exception):
         self.detail = detail or {}
         super().__init__(self.message)
 
+class CircuitOpenError(Exception):
+    """외부 API 제공자가 비정상 상태로 판단되어 호출을 차단한 경우"""
+    def __init__(self, provider: str, retry_in: float, detail: Optional[Dict[str, Any]] = None):
+        self.provider = provider
+        self.retry_in = retry_in
+        self.message = f"{provider} 서킷 브레이커 열림 ({retry_in:.1f}초 후 재시도)"
+        self.detail = detail or {"provider": provider, "retry_in": round(retry_in, 1)}
+        super().__init__(self.message)
+
 # 에러 코드 매핑
 ERROR_RESPONSES = {
     OCRError: {"status_code": 422, "code": "OCR_PROCESSING_ERROR"},
     MathParsingError: {"status_code": 422, "code": "MATH_PARSING_ERROR"},
     StepValidationError: {"status_code": 422, "code": "STEP_VALIDATION_ERROR"},
     AIFeedbackError: {"status_code": 422, "code": "AI_FEEDBACK_ERROR"},
+    CircuitOpenError: {"status_code": 503, "code": "PROVIDER_UNAVAILABLE"},
 }
 
 def error_to_http_exception(error: Exception) -> HTTPException:
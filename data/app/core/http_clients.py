@@ -0,0 +1,141 @@
+# app/core/http_clients.py
+from typing import Dict, Any, Optional
+from openai import AsyncOpenAI
+from app.core.config import settings
+import httpx
+import logging
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# HTTP/2 지원 여부 (h2 패키지가 설치된 경우에만 활성화 가능)
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 외부 호스트별 커넥션 풀 설정 (풀 단위로 연결 수가 제한되므로 호스트별 제한과 동일)
+POOL_CONFIGS: Dict[str, Dict[str, Any]] = {
+    "mathpix": {"timeout": 60.0},
+    "images": {"timeout": 20.0},
+    "openai": {"timeout": 60.0},
+}
+
+
+class HTTPClientRegistry:
+    """
+    프로세스 전역에서 공유하는 HTTP 클라이언트 레지스트리
+    외부 호스트(Mathpix, 이미지 호스트, OpenAI)별로 keep-alive 커넥션 풀을 하나씩 유지하여
+    매 호출마다 TLS/커넥션을 새로 맺는 비용을 없앱니다.
+    FastAPI lifespan에서 startup/shutdown 되며, 그 밖의 환경(스크립트 등)에서는 처음 사용할 때 생성됩니다.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._openai: Optional[AsyncOpenAI] = None
+        self._request_counts: Dict[str, int] = {}
+
+    def _create_client(self, name: str) -> httpx.AsyncClient:
+        config = POOL_CONFIGS[name]
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        self._request_counts[name] = 0
+
+        async def count_request(request: httpx.Request):
+            self._request_counts[name] += 1
+
+        client = httpx.AsyncClient(
+            timeout=config["timeout"],
+            limits=limits,
+            http2=settings.HTTP_ENABLE_HTTP2 and HTTP2_AVAILABLE,
+            event_hooks={"request": [count_request]}
+        )
+        logger.info(f"HTTP 클라이언트 풀 생성: {name} (http2={settings.HTTP_ENABLE_HTTP2 and HTTP2_AVAILABLE})")
+        return client
+
+    async def startup(self):
+        """모든 커넥션 풀 생성 (애플리케이션 시작 시 호출)"""
+        for name in POOL_CONFIGS:
+            self.get(name)
+        self.openai
+
+    async def shutdown(self):
+        """모든 커넥션 풀 종료 (애플리케이션 종료 시 호출)"""
+        for name, client in self._clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"HTTP 클라이언트 종료 실패 ({name}): {str(e)}")
+        self._clients.clear()
+        self._openai = None
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """
+        이름에 해당하는 공유 HTTP 클라이언트 반환
+
+        Args:
+            name (str): 풀 이름 ('mathpix', 'images', 'openai')
+
+        Returns:
+            httpx.AsyncClient: 공유 클라이언트
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(name)
+            self._clients[name] = client
+        return client
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        """공유 커넥션 풀을 사용하는 AsyncOpenAI 클라이언트"""
+        http_client = self.get("openai")
+        if self._openai is None or self._openai._client is not http_client:
+            # 재시도는 app.core.resilience에서 일괄 처리하므로 SDK 자체 재시도는 끔
+            self._openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client, max_retries=0)
+        return self._openai
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        커넥션 풀 사용 현황 반환
+
+        Returns:
+            Dict[str, Any]: 풀 이름별 연결 수, 유휴/사용 중 연결 수, 누적 요청 수
+        """
+        result = {}
+        for name, client in self._clients.items():
+            pool_stats: Dict[str, Any] = {
+                "requests_total": self._request_counts.get(name, 0),
+                "closed": client.is_closed,
+            }
+            try:
+                # httpcore 커넥션 풀 내부 상태 (httpx 버전에 따라 없을 수 있음)
+                pool = client._transport._pool
+                connections = list(pool.connections)
+                idle = sum(1 for c in connections if c.is_idle())
+                pool_stats.update({
+                    "connections": len(connections),
+                    "idle_connections": idle,
+                    "active_connections": len(connections) - idle,
+                    "http2_connections": sum(
+                        1 for c in connections
+                        if "HTTP2" in type(getattr(c, "_connection", None)).__name__
+                    ),
+                    "queued_requests": len(getattr(pool, "_requests", [])),
+                })
+            except Exception:
+                pass
+            result[name] = pool_stats
+        return result
+
+
+# 프로세스 전역 레지스트리
+http_clients = HTTPClientRegistry()
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """공유 AsyncOpenAI 클라이언트 반환"""
+    return http_clients.openai
@@ -0,0 +1,30 @@
+# app/core/llm.py
+"""
+OpenAI 채팅 완성 호출 공통 진입점
+
+모든 서비스의 chat.completions 호출은 이 함수를 거쳐 공유 클라이언트 풀을 사용하고,
+같은 요청(모델, 메시지, 옵션)이 동시에 들어오면 single-flight로 한 번만 호출합니다.
+호출에는 모델별 속도 제한, 백오프 재시도, 서킷 브레이커가 적용됩니다.
+"""
+from typing import Any
+from app.core.http_clients import get_openai_client
+from app.core.singleflight import llm_flight, hash_key
+from app.core.resilience import call_with_resilience
+
+
+async def create_chat_completion(**kwargs: Any) -> Any:
+    """
+    client.chat.completions.create와 같은 인자를 받아 응답 객체를 반환합니다.
+
+    Returns:
+        ChatCompletion: OpenAI 응답 객체 (동시 동일 요청 간 공유되므로 수정하지 말 것)
+    """
+    async def call():
+        client = get_openai_client()
+        return await call_with_resilience(
+            "openai",
+            lambda: client.chat.completions.create(**kwargs),
+            model=kwargs.get("model", "")
+        )
+
+    return await llm_flight.do(hash_key("chat", kwargs), call)
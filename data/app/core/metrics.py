@@ -0,0 +1,81 @@
+# app/core/metrics.py
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+import threading
+
+
+class Histogram:
+    """
+    고정 버킷 히스토그램 (모니터링/튜닝용 인메모리 지표)
+    누적 버킷 카운트와 함께 최근 관측값으로 근사 백분위수를 제공합니다.
+    """
+
+    def __init__(self, buckets: Sequence[float], window: int = 1024):
+        """
+        Args:
+            buckets (Sequence[float]): 버킷 상한값 목록 (오름차순)
+            window (int): 백분위수 계산에 사용할 최근 관측값 개수
+        """
+        self.buckets: List[float] = sorted(buckets)
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """관측값 기록"""
+        with self._lock:
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            self._counts[index] += 1
+            self._recent.append(value)
+            self.count += 1
+            self.total += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        최근 관측값 기준 백분위수
+
+        Args:
+            q (float): 0~100 사이 백분위
+
+        Returns:
+            Optional[float]: 백분위수 값, 관측값이 없으면 None
+        """
+        with self._lock:
+            values = sorted(self._recent)
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, int(round(q / 100 * (len(values) - 1)))))
+        return values[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        현재 히스토그램 상태 반환
+
+        Returns:
+            Dict[str, Any]: 관측 수, 평균, p50/p95/p99, 버킷별 누적 카운트
+        """
+        with self._lock:
+            counts = list(self._counts)
+            count = self.count
+            total = self.total
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == float("inf") else f"<={bound:g}"] = cumulative
+
+        return {
+            "count": count,
+            "mean": round(total / count, 4) if count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": buckets
+        }
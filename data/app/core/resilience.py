@@ -0,0 +1,302 @@
+# app/core/resilience.py
+"""
+외부 API(Mathpix, OpenAI) 호출 보호
+
+- 토큰 버킷: 제공자/모델별 초당 요청 수 제한 (한도 초과 대신 대기)
+- 재시도: 지터를 둔 지수 백오프, 429/503 응답의 Retry-After 준수, 재시도 전체에 걸친 제공자별 마감 시간
+- 서킷 브레이커: 연속 실패 시 일정 시간 즉시 실패 처리하여 기존 대체 경로(폴백 응답, 보조 엔진)로 넘김
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenError
+import asyncio
+import logging
+import random
+import time
+import httpx
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적 서버 오류)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """비동기 토큰 버킷 (rate: 초당 충전량, burst: 최대 보유량)"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """
+        토큰 하나를 얻을 때까지 대기 (rate가 0 이하이면 제한 없음)
+        잠금 안에서 토큰을 예약(음수 허용)하고 대기 시간만 계산한 뒤 잠금 밖에서 대기하므로,
+        한 호출자의 대기가 다른 호출자의 예약을 막지 않습니다. 대기 중 취소되면 예약한 토큰을 돌려줍니다.
+        """
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate)
+        if wait <= 0:
+            return
+        self.waited += wait
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self.tokens += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "waited_seconds": round(self.waited, 2)
+        }
+
+
+class CircuitBreaker:
+    """
+    closed → (연속 실패 failure_threshold회) → open → (recovery_seconds 경과) → half_open
+    half_open에서는 시험 호출 하나만 허용하고 나머지는 결과가 나올 때까지 즉시 실패 처리하며,
+    시험 호출이 성공하면 closed, 실패하면 다시 open
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+        self.trial_in_flight = False
+
+    def before_call(self) -> bool:
+        """
+        호출 가능 여부 확인 (차단 상태면 CircuitOpenError)
+
+        Returns:
+            bool: 이 호출이 half_open 시험 호출인지 (True이면 호출 후 반드시 end_trial 호출)
+        """
+        if self.state == "open":
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.recovery_seconds:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_seconds - elapsed)
+            self.state = "half_open"
+            logger.info(f"[CircuitBreaker] {self.name} half-open: 시험 호출 허용")
+        if self.state == "half_open":
+            if self.trial_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0.0, {"provider": self.name, "state": "half_open"})
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def end_trial(self):
+        """시험 호출 종료 (성공/실패 기록 없이 끝난 경우 다음 호출이 다시 시험 호출이 됨)"""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info(f"[CircuitBreaker] {self.name} 복구됨")
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.trips += 1
+                logger.warning(f"[CircuitBreaker] {self.name} 열림 (연속 실패 {self.failures}회)")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == "open":
+            retry_in = round(max(0.0, self.recovery_seconds - (time.monotonic() - self.opened_at)), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in": retry_in
+        }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_retries: Dict[str, int] = {}
+
+
+def get_bucket(provider: str, model: str = "") -> TokenBucket:
+    """제공자/모델별 토큰 버킷"""
+    key = f"{provider}:{model}" if model else provider
+    if key not in _buckets:
+        limits = settings.PROVIDER_RATE_LIMITS.get(provider, {})
+        _buckets[key] = TokenBucket(rate=limits.get("rate", 0), burst=limits.get("burst", 1))
+    return _buckets[key]
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """제공자별 서킷 브레이커"""
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(
+            provider,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_seconds=settings.CIRCUIT_RECOVERY_SECONDS
+        )
+    return _breakers[provider]
+
+
+def _response_of(error: Exception) -> Optional[httpx.Response]:
+    # httpx.HTTPStatusError와 openai.APIStatusError 모두 response 속성을 가짐
+    response = getattr(error, "response", None)
+    return response if isinstance(response, httpx.Response) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """일시적 오류(한도 초과, 서버 오류, 타임아웃, 연결 실패) 여부"""
+    response = _response_of(error)
+    if response is not None:
+        return response.status_code in RETRYABLE_STATUS
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    # openai.APITimeoutError / APIConnectionError
+    return type(error).__name__ in ("APITimeoutError", "APIConnectionError")
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Retry-After 헤더(초 단위)가 있으면 반환"""
+    response = _response_of(error)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """다음 재시도까지 대기 시간 (Retry-After 우선, 없으면 full jitter 지수 백오프)"""
+    hinted = retry_after(error)
+    if hinted is not None:
+        return min(settings.RETRY_MAX_DELAY, max(0.0, hinted))
+    ceiling = min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+async def call_with_resilience(
+    provider: str,
+    fn: Callable[[], Awaitable[T]],
+    model: str = "",
+    deadline: Optional[float] = None
+) -> T:
+    """
+    속도 제한, 재시도, 서킷 브레이커를 적용해 외부 API 호출
+
+    Args:
+        provider (str): 제공자 이름 ('mathpix', 'openai')
+        fn (Callable[[], Awaitable[T]]): 실제 호출 코루틴 함수 (재시도 시 다시 호출됨)
+        model (str): 모델 이름 (모델별 속도 제한 구분용)
+        deadline (Optional[float]): 재시도와 대기를 포함한 전체 허용 시간(초), None이면 RETRY_DEADLINES 설정값
+
+    Returns:
+        T: 호출 결과
+
+    Raises:
+        CircuitOpenError: 제공자가 차단 상태인 경우 (즉시 실패)
+        asyncio.TimeoutError: 전체 허용 시간을 넘긴 경우
+        Exception: 재시도 후에도 실패한 경우 마지막 예외
+    """
+    breaker = get_breaker(provider)
+    bucket = get_bucket(provider, model)
+    attempts = max(1, settings.RETRY_MAX_ATTEMPTS)
+    if deadline is None:
+        deadline = settings.RETRY_DEADLINES.get(provider)
+    expires_at = time.monotonic() + deadline if deadline else None
+
+    # 재시도를 포함한 한 번의 논리적 호출을 실패 한 번으로 기록 (허용 시간 소진만으로는 제공자 실패로 보지 않음)
+    provider_failed = False
+    for attempt in range(attempts):
+        is_trial = breaker.before_call()
+        try:
+            try:
+                remaining = expires_at - time.monotonic() if expires_at is not None else None
+                await asyncio.wait_for(bucket.acquire(), remaining)
+                remaining = expires_at - time.monotonic() if expires_at is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError()
+            except asyncio.TimeoutError:
+                if provider_failed:
+                    breaker.record_failure()
+                raise asyncio.TimeoutError(f"{provider} 호출 허용 시간({deadline}초) 초과")
+
+            try:
+                result = await asyncio.wait_for(fn(), remaining)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and expires_at is not None and time.monotonic() >= expires_at:
+                    # 허용 시간이 끝나 중단된 시도: 전체 시간의 절반 이상을 받고도 응답이 없었을 때만 제공자 실패로 기록
+                    if provider_failed or remaining >= deadline / 2:
+                        breaker.record_failure()
+                    raise asyncio.TimeoutError(f"{provider} 호출 허용 시간({deadline}초) 초과") from e
+                if not is_retryable(e):
+                    # 잘못된 요청 등 호출자 오류는 제공자 상태와 무관
+                    raise
+                provider_failed = True
+                # half_open 시험 호출은 재시도하지 않고 결과를 바로 반영
+                if is_trial or attempt + 1 >= attempts or breaker.state == "open":
+                    breaker.record_failure()
+                    raise
+                delay = backoff_delay(attempt, e)
+                if expires_at is not None and time.monotonic() + delay >= expires_at:
+                    # 남은 시간 안에 재시도할 수 없으면 바로 실패해 대체 경로로 넘김
+                    logger.warning(f"[{provider}] 허용 시간({deadline}초) 부족으로 재시도하지 않음: {str(e)}")
+                    breaker.record_failure()
+                    raise
+                _retries[provider] = _retries.get(provider, 0) + 1
+                logger.warning(f"[{provider}] 일시적 오류, {delay:.2f}초 후 재시도 ({attempt + 1}/{attempts - 1}): {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+        finally:
+            if is_trial:
+                breaker.end_trial()
+        breaker.record_success()
+        return result
+
+
+def resilience_stats() -> Dict[str, Any]:
+    """제공자별 서킷 브레이커/속도 제한/재시도 현황"""
+    return {
+        "circuit_breakers": {name: breaker.stats() for name, breaker in _breakers.items()},
+        "rate_limiters": {name: bucket.stats() for name, bucket in _buckets.items()},
+        "retries": dict(_retries)
+    }
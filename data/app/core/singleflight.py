@@ -0,0 +1,114 @@
+# app/core/singleflight.py
+"""
+동일 요청 중복 제거 (single-flight)
+
+백엔드 재시도나 학생의 중복 제출로 같은 입력의 요청이 동시에 들어오면
+같은 키의 호출자들이 하나의 진행 중인 작업을 함께 기다리도록 하여 외부 API 중복 호출을 막습니다.
+결과는 저장하지 않으며, 작업이 끝나면 키가 바로 해제됩니다 (캐시는 별도 계층에서 담당).
+"""
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def hash_key(*parts: Any) -> str:
+    """
+    키 구성 요소(문자열, 바이트, JSON 직렬화 가능한 값)로 SHA-256 키 생성
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        elif isinstance(part, str):
+            digest.update(part.encode("utf-8"))
+        else:
+            digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    키별 진행 중 작업 공유
+    작업은 별도 태스크로 실행되므로 먼저 호출한 요청이 취소되어도 다른 호출자는 결과를 받으며,
+    기다리는 호출자가 모두 취소되면 작업도 취소됩니다. (헤지에서 진 요청이 외부 호출을 계속하지 않도록)
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): 로그/지표 식별용 이름
+        """
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 모든 호출자가 취소된 경우에도 예외 미확인 경고가 남지 않도록 결과 확인
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        같은 키의 작업이 진행 중이면 그 결과를 기다리고, 없으면 새로 실행합니다.
+
+        Args:
+            key (str): 요청 식별 키
+            fn (Callable[[], Awaitable[T]]): 실제 작업을 수행하는 코루틴 함수
+
+        Returns:
+            T: 작업 결과의 호출자별 복사본 (예외는 모든 호출자에게 그대로 전달)
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._release(k, t))
+        else:
+            self.shared += 1
+            logger.info(f"[SingleFlight:{self.name}] 진행 중인 동일 요청 공유 ({key[:12]})")
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+            # 호출자가 결과를 수정해도(메타데이터 추가 등) 다른 호출자에게 영향이 없도록 각자 복사본을 받음
+            return copy.deepcopy(result)
+        except asyncio.CancelledError:
+            # 마지막 호출자까지 취소되면 진행 중인 작업도 취소
+            if self._waiters[task] == 1 and not task.done():
+                logger.info(f"[SingleFlight:{self.name}] 모든 호출자가 취소되어 작업 취소 ({key[:12]})")
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "inflight": len(self._inflight)
+        }
+
+
+# 외부 호출 종류별 single-flight 그룹
+ocr_flight = SingleFlight("ocr")
+embedding_flight = SingleFlight("embedding")
+llm_flight = SingleFlight("llm")
+
+
+def singleflight_stats() -> Dict[str, Any]:
+    return {group.name: group.stats() for group in (ocr_flight, embedding_flight, llm_flight)}
@@ -1,9 +1,15 @@
 # app/main.py
 from fastapi import FastAPI, APIRouter, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import ocr_router, health_router, report_router
+from app.routers import ocr_router, health_router, report_router, admin_router
 from app.core.logging import setup_logging
 from app.core.exceptions import error_to_http_exception
+from app.core.http_clients import http_clients
+from app.core.config import settings
+from app.services.ocr.sumen_base import startup_sumen, shutdown_sumen
+from app.services.problem_repository import problem_repository
+from app.services.similar_problems import similar_problems
+from contextlib import asynccontextmanager
 import logging
 
 # 로깅 설정
@@ -19,6 +25,26 @@ api_router = APIRouter(prefix="/data/api/v1")
 api_router.include_router(ocr_router.router)
 api_router.include_router(health_router.router)
 api_router.include_router(report_router.router)
+api_router.include_router(admin_router.router)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """애플리케이션 수명 주기: 공유 리소스 생성 및 정리"""
+    await http_clients.startup()
+    logger.info("공유 HTTP 클라이언트 풀 준비 완료")
+    # 문제 데이터는 시작 시 한 번 로드하여 인덱싱
+    problem_repository.load()
+    problem_repository.start_watcher(settings.PROBLEM_WATCH_INTERVAL)
+    # 유사 문제 색인은 백그라운드에서 구축 (완료 전에는 추천 없이 응답)
+    if settings.SIMILAR_PROBLEMS_ENABLED:
+        similar_problems.rebuild_in_background()
+    # 로컬 OCR 모델은 백그라운드에서 로드되므로 시작을 지연시키지 않음
+    await startup_sumen()
+    yield
+    await problem_repository.stop_watcher()
+    await shutdown_sumen()
+    await http_clients.shutdown()
+    logger.info("공유 HTTP 클라이언트 풀 종료")
+
 # FastAPI 앱 생성
 app = FastAPI(
     title="수플래 분석 서버",
@@ -27,7 +53,8 @@ app = FastAPI(
     version="1.0.1",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS 설정
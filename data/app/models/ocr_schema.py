@@ -42,6 +42,7 @@ class StepValidationResult(BaseModel):
     confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="OCR 결과의 신뢰도")
     feedback: str = Field(default="잘 풀었습니다.", description="변경 사항에 대한 피드백")
     current_latex: str = Field(default="", description="이번 단계에 추가된 수식")
+    error: Optional[str] = Field(default=None, description="이미지 다운로드/OCR 처리 중 발생한 오류")
 
 # OpenAI 기반 분석 V2 요청/응답
 class AnalysisV2Request(BaseModel):
@@ -61,9 +62,16 @@ class AnalysisV2Response(BaseModel):
     first_error_step: int = Field(default=0, description="처음 오류가 발생한 step_number 없다면 0")
     metadata: Optional[Dict[str, Any]] = None
 
+class SimilarProblem(BaseModel):
+    problem_id: str = Field(description="추천 문제 ID")
+    problem_no: str = Field(default="", description="추천 문제 번호")
+    content: str = Field(default="", description="추천 문제 내용")
+    similarity: float = Field(default=0.0, description="현재 문제와의 유사도 (0~1)")
+
 class AnalysisOCRResponse(BaseModel):
     steps: List[StepValidationResult] = Field(description="분석된 풀이 단계 목록")
     ai_analysis: str = Field(default="잘 풀었습니다.", description="풀이한 문제에 대한 분석")
     weakness: str = Field(default="취약점이 없습니다.", description="풀이한 현재 문제에서 보이는 약점")
     first_error_step: int = Field(default=0, description="처음 오류가 발생한 step_index 없다면 0")
+    similar_problems: List[SimilarProblem] = Field(default_factory=list, description="오류가 있는 경우 추천하는 유사 문제")
     # metadata: Optional[dict] = None
@@ -10,6 +10,7 @@ class AnalyzedStep(BaseModel):
     confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="OCR 결과의 신뢰도")
     step_feedback: str = Field(default="잘 풀었습니다.", description="해당 단계에 대한 피드백")
     current_latex: str = Field(description="이번 단계에 추가된 수식")
+    error: Optional[str] = Field(default=None, description="이미지 다운로드/OCR 처리 중 발생한 오류")
 
 
 class AnalysisResult(BaseModel):
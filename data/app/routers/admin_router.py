@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Header, HTTPException, status
+from typing import Optional
+import secrets
+from app.core.config import settings
+from app.services.problem_repository import problem_repository
+
+# /data/api/v1은 main에 이미 있음
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"]
+)
+
+
+def _check_admin_key(x_admin_key: Optional[str]):
+    # 관리자 키가 설정되지 않았으면 관리자 API를 열지 않음
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="관리자 키(ADMIN_API_KEY)가 설정되지 않아 관리자 API를 사용할 수 없습니다."
+        )
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="관리자 키가 올바르지 않습니다."
+        )
+
+
+@router.post("/problems/reload")
+async def reload_problems(force: bool = True, x_admin_key: Optional[str] = Header(None)):
+    """
+    문제 데이터 재로드
+    새 인덱스를 백그라운드에서 만든 뒤 교체하며, 소요 시간과 변경된 문제 수를 반환합니다.
+    force=false이면 파일이 바뀌지 않은 경우 재로드하지 않습니다.
+    """
+    _check_admin_key(x_admin_key)
+    return await problem_repository.reload(force=force)
+
+
+@router.get("/problems/status")
+async def get_problems_status(x_admin_key: Optional[str] = Header(None)):
+    """문제 데이터 저장소 상태 (백엔드, 문제 수, 마지막 재로드 결과)"""
+    _check_admin_key(x_admin_key)
+    return problem_repository.stats()
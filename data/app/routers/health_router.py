@@ -1,6 +1,11 @@
 from fastapi import APIRouter
 from datetime import datetime
 from app.services import health_service
+from app.core.http_clients import http_clients
+from app.core.resilience import resilience_stats
+from app.core.config import settings
+from app.services.ocr.sumen_base import sumen_model_manager
+from fastapi.responses import JSONResponse
 
 router = APIRouter(tags=["health"])
 
@@ -19,5 +24,25 @@ async def get_health():
         "status": status,
         "version": "1.0.0",
         "timestamp": datetime.now().isoformat(),
-        "components": components
+        "components": components,
+        "http_pools": http_clients.stats(),
+        "providers": resilience_stats(),
+        "models": {"sumen": sumen_model_manager.status()}
     }
+
+@router.get("/health/ready")
+async def get_readiness():
+    """
+    트래픽 수신 가능 여부 (readiness probe)
+    로컬 모델이 워밍업 중이어도 대체 엔진이 설정되어 있으면 준비된 것으로 봅니다.
+    """
+    sumen = sumen_model_manager.status()
+    ready = (
+        settings.OCR_BACKEND != "sumen"
+        or sumen["ready"]
+        or bool(settings.SUMEN_FALLBACK_ENGINE)
+    )
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "ocr_backend": settings.OCR_BACKEND, "models": {"sumen": sumen}}
+    )
@@ -6,15 +6,25 @@ from app.models.ocr_schema import (
     AnswerOCRRequest, AnswerOCRResponse,
     AnalysisOCRRequest, AnalysisOCRResponse,
     AnalysisV2Request, AnalysisV2Response,
-    StepValidationResult
+    StepValidationResult, SimilarProblem
 )
 from app.services.ocr import get_ocr_engine
+from app.services.ocr.cached_ocr import get_ocr_result_cache
+from app.services.ocr.sumen_base import sumen_batcher_stats
+from app.services.ocr.preprocess import preprocess_stats
+from app.services.ocr.hedged_ocr import hedging_stats
 from app.services.analysis_service import analyze_equation_steps
 from app.services.analysis_service_v2 import analyze_with_openai
 from app.services.result_saver import load_latest_analysis
+from app.services.problem_repository import problem_repository
+from app.services.similar_problems import similar_problems
+from app.services.step_embedding_cache import step_embedding_cache_stats
+from app.services.embedding_service import embedding_service
 from app.core.exceptions import error_to_http_exception, OCRError
 from app.core.config import settings
-import tempfile
+from app.core.concurrency import bounded_gather
+from app.core.http_clients import http_clients
+from app.core.singleflight import singleflight_stats
 import httpx
 import os
 import logging
@@ -27,73 +37,24 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ocr", tags=["OCR"])
 
-# 문제 데이터 캐시
-_problem_data_cache = None
-
-def load_problem_data() -> List[Dict[str, Any]]:
-    """문제 데이터를 로드하여 리스트로 반환"""
-    global _problem_data_cache
-    
-    if _problem_data_cache is not None:
-        return _problem_data_cache
-    
-    try:
-        data_path = pathlib.Path("C:/FreeStyleProject/S12P31A304/data/static/csvjson.json")
-        if not data_path.exists():
-            # 상대 경로로 시도
-            data_path = pathlib.Path("static/csvjson.json")
-            if not data_path.exists():
-                logger.warning(f"문제 데이터 파일을 찾을 수 없습니다: {data_path}")
-                return []
-        
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            _problem_data_cache = data
-            logger.info(f"{len(data)}개의 문제 데이터를 로드했습니다.")
-            return data
-    except Exception as e:
-        logger.error(f"문제 데이터 로드 실패: {str(e)}")
-        return []
-
 def find_problem_by_id(problem_id: str) -> Optional[Dict[str, Any]]:
-    """문제 ID로 문제 데이터 찾기"""
-    problems = load_problem_data()
-    
-    # 문제 ID로 찾기
-    for problem in problems:
-        problem_data = problem.get("row_to_json", {})
-        db_problem_id = str(problem_data.get("id", ""))
-        problem_no = problem_data.get("problemNo", "")
-        
-        if db_problem_id == problem_id or problem_no == problem_id:
-            return problem_data
-    
-    return None
+    """문제 ID(숫자 id 또는 problemNo)로 문제 데이터 찾기"""
+    return problem_repository.get(problem_id)
 
 
 @router.post("/answer", response_model=AnswerOCRResponse)
 async def convert_answer_ocr(request: AnswerOCRRequest):
     """정답 이미지를 LaTeX로 변환하는 엔드포인트"""
     try:
-        # Mathpix를 기본 엔진으로 사용
-        ocr = get_ocr_engine("mathpix")
-
-        async with httpx.AsyncClient() as client:
-            res = await client.get(str(request.answer_image_url))
+        # 설정(OCR_BACKEND)의 기본 엔진 사용
+        ocr = get_ocr_engine()
 
-        # 임시 파일 생성
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        temp_file.write(res.content)
-        temp_file.close()
+        client = http_clients.get("images")
+        res = await client.get(str(request.answer_image_url))
+        res.raise_for_status()
 
-        # OCR 처리
-        result = await ocr.image_to_latex(temp_file.name)
-        
-        # 임시 파일 정리
-        try:
-            os.unlink(temp_file.name)
-        except Exception as e:
-            logger.warning(f"임시 파일 삭제 실패: {e}")
+        # OCR 처리 (다운로드한 이미지를 파일 시스템을 거치지 않고 바로 전달)
+        result = await ocr.image_bytes_to_latex(res.content)
         
         # 응답 반환
         return AnswerOCRResponse(
@@ -109,20 +70,22 @@ async def convert_answer_ocr(request: AnswerOCRRequest):
 async def analyze_ocr_steps(request: AnalysisOCRRequest):
     """수학 풀이 단계를 분석하는 엔드포인트"""
     try:
-        image_paths = []
-        temp_files = []
-        step_times = []
-
-        # 각 단계 이미지 다운로드 및 시간 기록
-        async with httpx.AsyncClient() as client:
-            for step in request.steps:
-                response = await client.get(str(step.step_image_url), timeout=20.0)
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                temp_file.write(response.content)
-                temp_file.close()
-                image_paths.append(temp_file.name)
-                temp_files.append(temp_file.name)
-                step_times.append(step.step_time)  # 단위: 초(sec)
+        step_times = [step.step_time for step in request.steps]  # 단위: 초(sec)
+
+        # 각 단계 이미지를 동시 실행 수를 제한하여 병렬 다운로드
+        client = http_clients.get("images")
+
+        async def download(step) -> bytes:
+            response = await client.get(str(step.step_image_url), timeout=20.0)
+            response.raise_for_status()
+            return response.content
+
+        downloads = await bounded_gather(
+            request.steps, download, settings.OCR_MAX_CONCURRENT_DOWNLOADS
+        )
+
+        images = [d.value if d.ok else None for d in downloads]
+        image_errors = [None if d.ok else f"이미지 다운로드 실패: {str(d.error)}" for d in downloads]
 
         # 문제 ID 가져오기
         problem_id = str(request.problem_id) or "unknown_problem"
@@ -136,7 +99,7 @@ async def analyze_ocr_steps(request: AnalysisOCRRequest):
 
         # 수식 분석 수행 - 스냅샷 분석 방식 (시간 정보도 함께 전달)
         result = await analyze_equation_steps(
-            image_paths=image_paths, 
+            images=images, 
             grade="grade_1",
             problem_id=problem_id,
             problem_data=problem_data,  # 문제 데이터 전달
@@ -144,16 +107,10 @@ async def analyze_ocr_steps(request: AnalysisOCRRequest):
             total_solve_time=request.total_solve_time,  # 단위: 초(sec)
             understand_time=request.understand_time,  # 단위: 초(sec)
             solve_time=request.solve_time,  # 단위: 초(sec)
-            review_time=request.review_time  # 단위: 초(sec)
+            review_time=request.review_time,  # 단위: 초(sec)
+            image_errors=image_errors
         )
 
-        # 임시 파일 정리
-        for path in temp_files:
-            try:
-                os.unlink(path)
-            except Exception as e:
-                logger.warning(f"임시 파일 삭제 실패: {e}")
-
         # 저장된 분석 결과로부터 ai_analysis와 weakness 가져오기
         try:
             # analyze_equation_steps 함수에서 추가로 설정한 속성 사용
@@ -186,6 +143,14 @@ async def analyze_ocr_steps(request: AnalysisOCRRequest):
         
         # 틀린 단계 집계
         incorrect = [s for s in result.steps if not s.is_valid]
+
+        # 오류가 있으면 유사 문제 추천 (색인에 없는 문제는 틀린 단계 수식으로 검색)
+        similar = []
+        if incorrect and settings.SIMILAR_PROBLEMS_ENABLED:
+            similar = similar_problems.find(
+                problem_id=problem_id,
+                text=" ".join(s.latex for s in incorrect if s.latex)
+            )
         
         # Pydantic 모델 필드에서 값 가져오기
         ai_analysis = result.ai_analysis
@@ -224,7 +189,8 @@ async def analyze_ocr_steps(request: AnalysisOCRRequest):
                     latex=s.latex,
                     confidence=s.confidence,
                     feedback=s.step_feedback,
-                    current_latex=s.current_latex  # 현재 단계에 추가된 수식
+                    current_latex=s.current_latex,  # 현재 단계에 추가된 수식
+                    error=s.error
                 )
                 for s in result.steps
             ],
@@ -232,6 +198,7 @@ async def analyze_ocr_steps(request: AnalysisOCRRequest):
             ai_analysis=ai_analysis,
             weakness=weakness,
             first_error_step=first_error_step_number,  # step_number 형식으로 변경
+            similar_problems=[SimilarProblem(**problem) for problem in similar],
             metadata={
                 "total_steps": len(result.steps),
                 "error_count": len(incorrect),
@@ -243,8 +210,49 @@ async def analyze_ocr_steps(request: AnalysisOCRRequest):
         raise error_to_http_exception(e)
 
 
+@router.get("/similar", response_model=List[SimilarProblem])
+async def find_similar_problems(
+    problem_id: Optional[str] = Query(None, description="기준 문제 ID (숫자 id 또는 problemNo)"),
+    text: Optional[str] = Query(None, description="검색할 텍스트/수식 (문제 ID가 색인에 없을 때 사용)"),
+    k: int = Query(5, ge=1, le=50, description="추천 개수")
+):
+    """문제 ID 또는 텍스트와 비슷한 문제 검색 (색인 구축 중이면 503)"""
+    if not problem_id and not text:
+        raise HTTPException(status_code=400, detail="problem_id 또는 text가 필요합니다.")
+    if not similar_problems.ready:
+        raise HTTPException(status_code=503, detail="유사 문제 색인을 구축 중입니다. 잠시 후 다시 시도하세요.")
+    try:
+        return [SimilarProblem(**problem) for problem in similar_problems.find(problem_id=problem_id, text=text, k=k)]
+    except Exception as e:
+        # 예외 처리
+        raise error_to_http_exception(e)
+
+
+@router.get("/closest-steps")
+async def find_closest_reference_steps(
+    latex: List[str] = Query(..., description="학생 풀이 단계 수식 (여러 개 지정 가능)"),
+    k: int = Query(3, ge=1, le=20, description="단계당 결과 수")
+):
+    """학생 풀이 단계와 가장 비슷한 모범 답안 풀이 단계 검색 (카탈로그 전체 대상)"""
+    try:
+        results = await embedding_service.find_closest_reference_steps(latex, k=k)
+        return [{"latex": step, "matches": matches} for step, matches in zip(latex, results)]
+    except Exception as e:
+        # 예외 처리
+        raise error_to_http_exception(e)
+
 
 @router.get("/health")
 async def ocr_health_check():
     """OCR 서비스 건강 상태 확인 엔드포인트"""
-    return {"status": "ok", "service": "ocr"}
+    return {
+        "status": "ok",
+        "service": "ocr",
+        "cache": get_ocr_result_cache().stats(),
+        "batching": sumen_batcher_stats(),
+        "preprocess": preprocess_stats.stats(),
+        "hedging": hedging_stats(),
+        "singleflight": singleflight_stats(),
+        "similar_problems": similar_problems.stats(),
+        "step_embeddings": step_embedding_cache_stats()
+    }
@@ -0,0 +1,64 @@
+# app/scripts/migrate_embeddings.py
+"""
+이전 형식 임베딩 파일({문제 ID}_embeddings.json)을 임베딩 저장소 형식({문제 ID}.npy + {문제 ID}.meta.json)으로 변환
+
+사용법:
+    python app/scripts/migrate_embeddings.py --dir static/embeddings --remove-legacy
+"""
+import argparse
+import os
+import sys
+import time
+import logging
+
+# 프로젝트 루트 경로를 Python 경로에 추가
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.services.embedding_store import EmbeddingStore
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="임베딩 파일 형식 변환 (JSON → .npy + 메타데이터)")
+    parser.add_argument("--dir", "-d", default="static/embeddings", help="임베딩 디렉토리")
+    parser.add_argument("--remove-legacy", action="store_true", help="변환 후 이전 JSON 파일 삭제")
+    return parser.parse_args()
+
+
+def _size(paths) -> int:
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def main():
+    args = parse_args()
+    store = EmbeddingStore(args.dir)
+
+    legacy_files = [str(path) for path in store.directory.glob("*_embeddings.json")]
+    legacy_size = _size(legacy_files)
+
+    count = store.migrate_all(remove_legacy=args.remove_legacy)
+
+    problem_ids = store.problem_ids()
+    new_size = _size(
+        [str(store.matrix_path(pid)) for pid in problem_ids] + [str(store.meta_path(pid)) for pid in problem_ids]
+    )
+    logger.info(f"변환 완료: {count}개 파일, JSON {legacy_size / 1024:.1f}KB → 저장소 {new_size / 1024:.1f}KB")
+
+    # 로드 시간 비교 (문제당 평균)
+    if problem_ids:
+        start = time.perf_counter()
+        for problem_id in problem_ids:
+            store.load(problem_id)
+        elapsed = (time.perf_counter() - start) / len(problem_ids) * 1000
+        logger.info(f"문제당 평균 로드 시간: {elapsed:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# app/scripts/sumen_parity_check.py
+"""
+Sumen 추론 프로파일 정합성/처리량 비교 도구
+
+fp32 기준 모델과 후보 프로파일(int8, onnx)로 같은 샘플 이미지를 변환해
+LaTeX 일치율과 코어당 처리량(images/sec/core)을 비교합니다.
+
+사용법:
+    python app/scripts/sumen_parity_check.py --images "samples/*.png" --profile int8 --threads 4
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+import logging
+from typing import Dict, List
+
+# 프로젝트 루트 경로를 Python 경로에 추가
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.core.config import settings
+from app.services.ocr.sumen_base import SumenModel, _decode_image
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sumen 추론 프로파일 정합성 검사")
+    parser.add_argument("--images", "-i", required=True, help="샘플 이미지 경로 (glob 패턴 지원)")
+    parser.add_argument("--profile", "-p", default="int8", choices=["int8", "onnx", "fp32"], help="비교할 프로파일")
+    parser.add_argument("--threads", "-t", type=int, default=settings.SUMEN_NUM_THREADS, help="intra-op 스레드 수")
+    parser.add_argument("--batch-size", "-b", type=int, default=settings.SUMEN_MAX_BATCH_SIZE, help="배치 크기")
+    parser.add_argument("--min-match", type=float, default=0.95, help="허용 최소 일치율 (미만이면 종료 코드 1)")
+    parser.add_argument("--output", "-o", help="결과 JSON 저장 경로")
+    return parser.parse_args()
+
+
+def normalize(latex: str) -> str:
+    """공백 차이는 무시하고 비교"""
+    return re.sub(r"\s+", "", latex)
+
+
+def run_profile(profile: str, images: List, batch_size: int, threads: int) -> Dict:
+    model = SumenModel(settings.SUMEN_MODEL_NAME, "cpu", profile=profile, num_threads=threads)
+    # 첫 배치의 초기화 비용이 측정에 포함되지 않도록 워밍업
+    model.generate(images[:1])
+
+    outputs: List[str] = []
+    start = time.time()
+    for i in range(0, len(images), batch_size):
+        outputs.extend(latex for latex, _, _ in model.generate(images[i:i + batch_size]))
+    elapsed = time.time() - start
+
+    cores = model.torch.get_num_threads()
+    return {
+        "profile": model.profile,
+        "threads": cores,
+        "seconds": round(elapsed, 3),
+        "images_per_sec": round(len(images) / elapsed, 3),
+        "images_per_sec_per_core": round(len(images) / elapsed / cores, 3),
+        "outputs": outputs
+    }
+
+
+def main():
+    args = parse_args()
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        logger.error(f"이미지를 찾을 수 없습니다: {args.images}")
+        sys.exit(2)
+
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(_decode_image(f.read()))
+    logger.info(f"샘플 이미지 {len(images)}개")
+
+    baseline = run_profile("fp32", images, args.batch_size, args.threads)
+    candidate = run_profile(args.profile, images, args.batch_size, args.threads)
+
+    mismatches = []
+    exact = normalized = 0
+    for path, expected, actual in zip(paths, baseline["outputs"], candidate["outputs"]):
+        if expected == actual:
+            exact += 1
+        if normalize(expected) == normalize(actual):
+            normalized += 1
+        else:
+            mismatches.append({"image": path, "fp32": expected, args.profile: actual})
+
+    report = {
+        "samples": len(paths),
+        "exact_match": round(exact / len(paths), 4),
+        "normalized_match": round(normalized / len(paths), 4),
+        "speedup": round(candidate["images_per_sec"] / baseline["images_per_sec"], 3),
+        "baseline": {k: v for k, v in baseline.items() if k != "outputs"},
+        "candidate": {k: v for k, v in candidate.items() if k != "outputs"},
+        "mismatches": mismatches
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if report["normalized_match"] < args.min_match:
+        logger.error(f"일치율 {report['normalized_match']} < {args.min_match}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
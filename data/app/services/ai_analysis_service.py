@@ -2,7 +2,7 @@
 from typing import List, Dict, Any, Optional
 from app.core.config import settings
 from app.models.result_schema import AnalyzedStep
-from openai import AsyncOpenAI
+from app.core.llm import create_chat_completion
 import logging
 import re
 
@@ -152,8 +152,7 @@ class AIAnalysisService:
 """
 
         try:
-            client = AsyncOpenAI(api_key=self.openai_api_key)
-            response = await client.chat.completions.create(
+            response = await create_chat_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -265,8 +264,7 @@ class AIAnalysisService:
 """
 
         try:
-            client = AsyncOpenAI(api_key=self.openai_api_key)
-            response = await client.chat.completions.create(
+            response = await create_chat_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
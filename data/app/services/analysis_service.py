@@ -2,10 +2,14 @@
 from typing import List, Dict, Optional, Tuple, Any
 from app.models.result_schema import AnalysisResult, AnalyzedStep
 from app.services.ocr import get_ocr_engine
+from app.services.ocr.base_ocr import BaseOCR, OCRResult
+from app.services.ocr.snapshot_delta import recognize_snapshot_deltas
+from app.services.ocr.line_ocr import recognize_snapshot_lines
 from app.services.snapshot_feedback_service import SnapshotFeedbackService
 from app.services.ai_analysis_service import AIAnalysisService
 from app.services.result_saver import save_analysis_result
 from app.core.exceptions import OCRError, MathParsingError
+from app.core.config import settings
 import logging
 import re
 import difflib
@@ -15,7 +19,7 @@ logger = logging.getLogger(__name__)
 
 
 async def analyze_equation_steps(
-    image_paths: List[str], 
+    images: List[Optional[bytes]], 
     grade: str = "grade_1",  # 모든 고등학교 수학은 grade_1로 통일
     problem_id: Optional[str] = None,  # 문제 ID 추가 (RAG용)
     problem_data: Optional[Dict[str, Any]] = None,  # 문제 데이터 추가
@@ -23,7 +27,8 @@ async def analyze_equation_steps(
     total_solve_time: Optional[int] = None,  # 총 풀이 시간 (밀리초)
     understand_time: Optional[int] = None,  # 문제 이해 시간 (밀리초)
     solve_time: Optional[int] = None,  # 문제 풀이 시간 (밀리초)
-    review_time: Optional[int] = None  # 문제 검토 시간 (밀리초)
+    review_time: Optional[int] = None,  # 문제 검토 시간 (밀리초)
+    image_errors: Optional[List[Optional[str]]] = None  # 단계별 이미지 다운로드 오류
 ) -> AnalysisResult:
     """
     전체 분석 플로우:
@@ -32,7 +37,7 @@ async def analyze_equation_steps(
     - 오류 시 피드백 제공
     
     Args:
-        image_paths (List[str]): 분석할 이미지 파일 경로 리스트
+        images (List[Optional[bytes]]): 분석할 단계별 이미지 바이트 리스트 (다운로드 실패 시 None)
         grade (str): 학년 수준 (grade_1, grade_2, ...)
         problem_id (Optional[str]): 문제 ID (RAG 구현을 위해 추가)
         step_times (Optional[List[int]]): 각 단계별 소요 시간 (밀리초)
@@ -40,23 +45,23 @@ async def analyze_equation_steps(
         understand_time (Optional[int]): 문제 이해 시간 (밀리초)
         solve_time (Optional[int]): 문제 풀이 시간 (밀리초)
         review_time (Optional[int]): 문제 검토 시간 (밀리초)
+        image_errors (Optional[List[Optional[str]]]): 단계별 이미지 다운로드 오류 메시지
         
     Returns:
         AnalysisResult: 분석 결과
     """
     try:
-        # OCR 엔진 가져오기 - mathpix 고정
-        ocr = get_ocr_engine("mathpix")
+        # OCR 엔진 가져오기 - 설정(OCR_BACKEND)의 기본 엔진 사용
+        ocr = get_ocr_engine()
 
-        # 이미지 → LaTeX 변환
-        logger.info(f"OCR 처리 시작: {len(image_paths)} 개 이미지")
-        latex_list = []
-        confidence_list = []
-        
-        for img_path in image_paths:
-            result = await ocr.image_to_latex(img_path)
-            latex_list.append(result.latex)
-            confidence_list.append(result.confidence)
+        # 이미지 → LaTeX 변환 (동시 실행 수 제한 병렬 처리)
+        logger.info(f"OCR 처리 시작: {len(images)} 개 이미지")
+        ocr_results = await run_ocr_fanout(ocr, images, image_errors)
+        latex_list = [r.latex for r in ocr_results]
+        confidence_list = [r.confidence for r in ocr_results]
+        error_list = [r.error for r in ocr_results]
+        # 델타 OCR로 얻은 단계별 새 LaTeX (없으면 None → 문자열 비교로 추출)
+        new_latex_list = [r.metadata.get("new_latex") for r in ocr_results]
         
         # 스냅샷 피드백 서비스 초기화
         feedback_service = SnapshotFeedbackService()
@@ -92,7 +97,8 @@ async def analyze_equation_steps(
             is_valid=True,
             confidence=confidence_list[0],
             step_feedback="첫 단계 수식입니다.",
-            current_latex=latex_list[0]  # 첫 단계는 전체가 새로운 수식
+            current_latex=latex_list[0],  # 첫 단계는 전체가 새로운 수식
+            error=error_list[0]
         ))
         
         # analysis_result["steps"]에서 각 분석 결과를 AnalyzedStep으로 변환
@@ -109,8 +115,10 @@ async def analyze_equation_steps(
                 prev_latex = latex_list[step_index - 1]
                 curr_latex = latex_list[step_index]
                 
-                # Fallback 메서드 사용 (비동기 함수를 제거하여 문제 해결)
-                current_latex = fallback_extract_new_content(prev_latex, curr_latex)
+                # 델타 OCR 결과가 있으면 그대로 사용, 없으면 Fallback 메서드 사용
+                current_latex = new_latex_list[step_index]
+                if current_latex is None:
+                    current_latex = fallback_extract_new_content(prev_latex, curr_latex)
                 logger.info(f"추출된 내용: {current_latex}")
                 
                 steps.append(AnalyzedStep(
@@ -119,7 +127,8 @@ async def analyze_equation_steps(
                     is_valid=analysis.get("is_valid", True),
                     confidence=confidence_list[step_index] if step_index < len(confidence_list) else 0.0,
                     step_feedback=analysis.get("step_feedback", ""),
-                    current_latex=current_latex
+                    current_latex=current_latex,
+                    error=error_list[step_index]
                 ))
         
         # 분석 결과가 없거나 스텝 수가 맞지 않는 경우, 누락된 스텝 추가
@@ -129,7 +138,9 @@ async def analyze_equation_steps(
                     # 현재 단계와 이전 단계의 수식 비교하여 추가된 부분 찾기
                     prev_latex = latex_list[i-1] if i > 0 else ""
                     curr_latex = latex_list[i]
-                    current_latex = fallback_extract_new_content(prev_latex, curr_latex) if i > 0 else curr_latex
+                    current_latex = new_latex_list[i]
+                    if current_latex is None:
+                        current_latex = fallback_extract_new_content(prev_latex, curr_latex) if i > 0 else curr_latex
                     
                     steps.append(AnalyzedStep(
                         step_index=i,
@@ -137,7 +148,8 @@ async def analyze_equation_steps(
                         is_valid=True,  # 분석되지 않은 스텝은 유효한 것으로 간주
                         confidence=confidence_list[i] if i < len(confidence_list) else 0.0,
                         step_feedback="분석되지 않은 스텝입니다.",
-                        current_latex=current_latex
+                        current_latex=current_latex,
+                        error=error_list[i]
                     ))
         
         # 스텝 순서로 정렬
@@ -200,7 +212,8 @@ async def analyze_equation_steps(
                 "latex": s.latex,
                 "step_valid": s.is_valid,
                 "confidence": s.confidence,
-                "feedback": s.step_feedback if s.step_feedback != "잘 풀었습니다." else ""
+                "feedback": s.step_feedback if s.step_feedback != "잘 풀었습니다." else "",
+                "error": s.error
             }
             for s in steps
         ]
@@ -252,6 +265,64 @@ async def analyze_equation_steps(
         raise
 
 
+async def run_ocr_fanout(
+    ocr: BaseOCR,
+    images: List[Optional[bytes]],
+    image_errors: Optional[List[Optional[str]]] = None,
+    strategy: Optional[str] = None
+) -> List[OCRResult]:
+    """
+    단계별 이미지를 한 번에 OCR 엔진에 전달합니다 (API 엔진은 동시 실행 수 제한 병렬 호출, 로컬 모델은 배치 추론).
+    결과는 입력 순서를 유지하며, 실패한 단계는 빈 LaTeX와 함께 error가 채워진 OCRResult로 반환됩니다.
+    
+    Args:
+        ocr (BaseOCR): 사용할 OCR 엔진
+        images (List[Optional[bytes]]): 단계별 이미지 바이트 리스트 (다운로드 실패 시 None)
+        image_errors (Optional[List[Optional[str]]]): 단계별 이미지 다운로드 오류 메시지
+        strategy (Optional[str]): 스냅샷 OCR 방식 ('delta', 'lines', 'full'), None이면 설정값
+        
+    Returns:
+        List[OCRResult]: 단계별 OCR 결과
+        
+    Raises:
+        OCRError: 모든 단계의 OCR 처리가 실패한 경우
+    """
+    image_errors = image_errors or [None] * len(images)
+
+    strategy = strategy or settings.OCR_SNAPSHOT_STRATEGY
+
+    if strategy == "delta":
+        # 이전 스냅샷 대비 새로 추가된 필기 영역만 OCR
+        by_index = await recognize_snapshot_deltas(ocr, images)
+    elif strategy == "lines":
+        # 줄 단위로 나누어 처음 보는 줄만 OCR
+        by_index = await recognize_snapshot_lines(ocr, images)
+    else:
+        # 다운로드에 성공한 이미지만 엔진에 전달 (엔진에 따라 병렬 호출 또는 배치 추론)
+        available = [i for i, image in enumerate(images) if image is not None]
+        recognized = await ocr.batch_image_bytes_to_latex([images[i] for i in available])
+        by_index = dict(zip(available, recognized))
+
+    results = []
+    for i in range(len(images)):
+        result = by_index.get(i)
+        if result is not None and not result.error:
+            results.append(result)
+            continue
+        error = image_errors[i] if i < len(image_errors) and image_errors[i] else None
+        error = error or (result.error if result is not None else "이미지를 가져오지 못해 OCR을 건너뜁니다.")
+        logger.warning(f"단계 {i + 1} OCR 실패: {error}")
+        results.append(OCRResult(latex="", confidence=0.0, error=error))
+
+    if results and all(r.error for r in results):
+        raise OCRError(
+            "모든 단계 이미지의 OCR 처리에 실패했습니다.",
+            detail={"errors": [r.error for r in results]}
+        )
+
+    return results
+
+
 def fallback_extract_new_content(prev_latex: str, curr_latex: str) -> str:
     """
     이전 수식과 현재 수식을 비교하여 추가된 내용을 추출합니다.
@@ -4,15 +4,13 @@ import logging
 import json
 import os
 from pathlib import Path
-import openai
 from app.core.config import settings
+from app.core.llm import create_chat_completion
+from app.services.problem_repository import problem_repository
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 
-# 환경 변수에서 OpenAI API 키 설정
-openai.api_key = settings.OPENAI_API_KEY
-
 class AnalysisServiceV2:
     """
     OpenAI API를 활용하여 수학 풀이에 대한 피드백을 제공하는
@@ -23,33 +21,7 @@ class AnalysisServiceV2:
         """
         AnalysisServiceV2 초기화
         """
-        self.static_dir = Path(os.path.join("static", "csvjson.json"))
-        self.problem_data = self._load_problem_data()
-    
-    def _load_problem_data(self) -> Dict:
-        """
-        문제 데이터 로드
-        
-        Returns:
-            Dict: 문제 ID를 키로 하는 문제 데이터 딕셔너리
-        """
-        try:
-            with open(self.static_dir, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            # 문제 ID를 키로 하는 딕셔너리로 변환
-            problem_dict = {}
-            for item in data:
-                row = item.get('row_to_json', {})
-                problem_id = row.get('problemNo')
-                if problem_id:
-                    problem_dict[problem_id] = row
-            
-            logger.info(f"문제 데이터 로드 완료: {len(problem_dict)} 개")
-            return problem_dict
-        except Exception as e:
-            logger.error(f"문제 데이터 로드 실패: {str(e)}")
-            return {}
+        self.problems = problem_repository
     
     def get_problem_info(self, problem_id: str) -> Dict:
         """
@@ -61,7 +33,7 @@ class AnalysisServiceV2:
         Returns:
             Dict: 문제 정보
         """
-        return self.problem_data.get(problem_id, {})
+        return self.problems.get(problem_id) or {}
     
     async def generate_feedback(self, problem_id: str, steps: List[Dict], first_error_step: Optional[int] = None) -> Dict:
         """
@@ -175,7 +147,7 @@ class AnalysisServiceV2:
             str: API 응답 텍스트
         """
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await create_chat_completion(
                 model="gpt-4",  # 또는 사용 가능한 최신 모델
                 messages=[
                     {"role": "system", "content": "당신은 중학생의 수학 풀이를 분석하고 친절한 피드백을 제공하는 전문가입니다."},
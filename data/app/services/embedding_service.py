@@ -1,16 +1,77 @@
 # app/services/embedding_service.py
 from typing import List, Dict, Any, Optional, Tuple
-from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.http_clients import get_openai_client
+from app.core.singleflight import embedding_flight, hash_key
+from app.core.resilience import call_with_resilience
+from app.services.solution_steps import clean_solution_steps, normalize_latex
+from app.services.embedding_store import EmbeddingStore
+from app.services.problem_repository import problem_repository
+from app.services.step_embedding_cache import get_step_embedding_cache, step_embedding_key
+from app.services.step_index import StepANNIndex
 import numpy as np
+import asyncio
 import logging
-import json
 import os
+import time
 from pathlib import Path
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 
+# 문제별 모범 답안 임베딩 (서비스 인스턴스 간 공유)
+_reference_embeddings: Dict[str, Dict[str, Any]] = {}
+# 문제별 정규화된 모범 답안 임베딩 행렬 (float32, 단계 수 × 차원)과 단계 텍스트
+_reference_matrices: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+# 문제 데이터가 바뀐 시각 (이보다 오래된 임베딩 파일은 사용하지 않음)
+_invalidated_at: Dict[str, float] = {}
+# 전체 모범 답안 풀이 단계 ANN 색인 (STEP_INDEX_RECHECK_SECONDS마다 색인 파일을 확인해 새로 만들어졌거나 바뀌었으면 다시 로드)
+_step_index: Optional[StepANNIndex] = None
+_step_index_mtime: Optional[float] = None
+_step_index_checked_at: Optional[float] = None
+
+
+def get_step_index() -> Optional[StepANNIndex]:
+    """전체 풀이 단계 색인 반환 (app/scripts/build_step_index.py로 만든 색인이 없으면 None)"""
+    global _step_index, _step_index_mtime, _step_index_checked_at
+    now = time.monotonic()
+    if _step_index_checked_at is not None and now - _step_index_checked_at < settings.STEP_INDEX_RECHECK_SECONDS:
+        return _step_index
+    _step_index_checked_at = now
+
+    try:
+        mtime = (Path(settings.STEP_INDEX_DIR) / "meta.json").stat().st_mtime
+    except OSError:
+        mtime = None
+    if mtime == _step_index_mtime:
+        return _step_index
+
+    # 색인 파일이 생겼거나 다시 만들어진 경우 (로드에 실패하면 파일이 다시 바뀔 때까지 재시도하지 않음)
+    _step_index_mtime = mtime
+    _step_index = None
+    if mtime is not None:
+        try:
+            _step_index = StepANNIndex.load(settings.STEP_INDEX_DIR)
+        except Exception as e:
+            logger.error(f"풀이 단계 색인 로드 오류: {str(e)}")
+        if _step_index is not None:
+            logger.info(f"풀이 단계 색인 로드 완료: {_step_index.stats()}")
+    return _step_index
+
+
+def invalidate_reference_embeddings(problem_ids) -> None:
+    """내용이 바뀐 문제의 모범 답안 임베딩 무효화 (문제 데이터 재로드 시 호출)"""
+    now = time.time()
+    for problem_id in problem_ids:
+        _reference_embeddings.pop(problem_id, None)
+        _reference_matrices.pop(problem_id, None)
+        _invalidated_at[problem_id] = now
+    if problem_ids:
+        logger.info(f"모범 답안 임베딩 무효화: {len(problem_ids)}개 문제")
+
+
+problem_repository.add_invalidation_listener(invalidate_reference_embeddings)
+
 class EmbeddingService:
     """
     수학 수식 임베딩 및 유사도 비교 서비스
@@ -18,35 +79,38 @@ class EmbeddingService:
     def __init__(self):
         self.openai_api_key = settings.OPENAI_API_KEY
         self.embedding_model = getattr(settings, "EMBEDDING_MODEL", "text-embedding-3-small")
-        self.embeddings_cache_dir = Path("static/embeddings")
-        self.embeddings_cache = {}
+        self.embeddings_cache_dir = Path(settings.EMBEDDING_STORE_DIR)
+        self.embeddings_cache = _reference_embeddings
+        self.store = EmbeddingStore(str(self.embeddings_cache_dir))
         self._ensure_cache_dir()
         
     def _ensure_cache_dir(self):
         """캐시 디렉토리 생성"""
         os.makedirs(self.embeddings_cache_dir, exist_ok=True)
         
-    def _get_cache_path(self, problem_id: str) -> Path:
-        """임베딩 캐시 파일 경로"""
-        return self.embeddings_cache_dir / f"{problem_id}_embeddings.json"
-    
     def _load_cached_embeddings(self, problem_id: str) -> Optional[Dict[str, Any]]:
-        """캐시된 임베딩 로드"""
-        cache_path = self._get_cache_path(problem_id)
-        if cache_path.exists():
-            try:
-                with open(cache_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"임베딩 캐시 로드 오류: {str(e)}")
-        return None
-        
+        """저장된 임베딩 로드 (이전 JSON 형식은 변환 후 로드, 문제 데이터 변경 이전에 만든 임베딩은 사용하지 않음)"""
+        try:
+            data = self.store.load(problem_id)
+        except Exception as e:
+            logger.error(f"임베딩 캐시 로드 오류: {str(e)}")
+            return None
+        if data is None:
+            return None
+        if (self.store.mtime(problem_id) or 0) < _invalidated_at.get(problem_id, 0):
+            logger.warning(f"문제 {problem_id}의 데이터가 변경되어 이전 임베딩을 사용하지 않습니다.")
+            return None
+        return data
+
     def _save_embeddings_to_cache(self, problem_id: str, embeddings_data: Dict[str, Any]):
-        """임베딩 캐시 저장"""
-        cache_path = self._get_cache_path(problem_id)
+        """임베딩 저장 (float32 행렬 + 메타데이터)"""
         try:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(embeddings_data, f, ensure_ascii=False, indent=2)
+            self.store.save(
+                problem_id,
+                embeddings_data["solution_steps"],
+                embeddings_data["matrix"],
+                embeddings_data.get("embedding_model", "")
+            )
             logger.info(f"문제 {problem_id}의 임베딩 캐시 저장 완료")
         except Exception as e:
             logger.error(f"임베딩 캐시 저장 오류: {str(e)}")
@@ -60,18 +124,175 @@ class EmbeddingService:
             # API 키가 없으면 mock 임베딩 반환
             return [0.1] * 10
             
-        try:
-            client = AsyncOpenAI(api_key=self.openai_api_key)
-            response = await client.embeddings.create(
-                model=self.embedding_model,
-                input=text.strip()
+        text = text.strip()
+
+        async def call():
+            client = get_openai_client()
+            response = await call_with_resilience(
+                "openai",
+                lambda: client.embeddings.create(model=self.embedding_model, input=text),
+                model=self.embedding_model
             )
             return response.data[0].embedding
+
+        try:
+            # 같은 텍스트의 동시 요청은 한 번만 호출
+            return await embedding_flight.do(hash_key(self.embedding_model, text), call)
         except Exception as e:
             logger.error(f"임베딩 생성 오류: {str(e)}")
             # 오류 발생 시 기본 임베딩 반환
             return [0.0] * 10
     
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """토큰 수 추정 (UTF-8 2바이트당 1토큰, 한글/수식 혼합 텍스트에서 실제보다 크게 잡힘)"""
+        return len(text.encode("utf-8")) // 2 + 1
+
+    def _chunk_by_budget(self, texts: List[str]) -> List[List[str]]:
+        """추정 토큰 수와 입력 개수 한도에 맞춰 요청 단위로 분할"""
+        max_tokens = settings.EMBEDDING_BATCH_MAX_TOKENS
+        max_items = settings.EMBEDDING_BATCH_MAX_ITEMS
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        used = 0
+        for text in texts:
+            tokens = self._estimate_tokens(text)
+            if current and (used + tokens > max_tokens or len(current) >= max_items):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(text)
+            used += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _embed_chunk(self, chunk: List[str]) -> List[List[float]]:
+        async def call():
+            client = get_openai_client()
+            response = await call_with_resilience(
+                "openai",
+                lambda: client.embeddings.create(model=self.embedding_model, input=chunk),
+                model=self.embedding_model
+            )
+            embeddings: List[List[float]] = [[] for _ in chunk]
+            for item in response.data:
+                embeddings[item.index] = item.embedding
+            return embeddings
+
+        try:
+            return await embedding_flight.do(hash_key(self.embedding_model, chunk), call)
+        except Exception as e:
+            logger.error(f"임베딩 일괄 생성 오류 ({len(chunk)}개): {str(e)}")
+            # 오류 발생 시 기본 임베딩 반환
+            return [[0.0] * 10 for _ in chunk]
+
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 텍스트를 한 번의(토큰 한도를 넘으면 여러 번의) 일괄 요청으로 임베딩
+
+        Args:
+            texts (List[str]): 임베딩할 텍스트 목록 (중복 허용)
+
+        Returns:
+            List[List[float]]: 입력 순서대로의 임베딩 (빈 텍스트는 빈 리스트)
+        """
+        stripped = [(text or "").strip() for text in texts]
+        unique = list(dict.fromkeys(text for text in stripped if text))
+        if not unique:
+            return [[] for _ in texts]
+
+        if not self.openai_api_key:
+            # API 키가 없으면 mock 임베딩 반환
+            return [[0.1] * 10 if text else [] for text in stripped]
+
+        chunks = self._chunk_by_budget(unique)
+        results = await asyncio.gather(*(self._embed_chunk(chunk) for chunk in chunks))
+        by_text = {
+            text: embedding
+            for chunk, embeddings in zip(chunks, results)
+            for text, embedding in zip(chunk, embeddings)
+        }
+        logger.debug(f"임베딩 일괄 요청: 입력 {len(texts)}개, 고유 {len(unique)}개, 요청 {len(chunks)}회")
+        return [by_text.get(text, []) if text else [] for text in stripped]
+
+    async def get_student_embeddings(self, steps: List[str]) -> List[List[float]]:
+        """
+        학생 풀이 단계 임베딩 (정규화된 수식 기준 캐시를 먼저 조회하고 없는 단계만 일괄 요청)
+
+        Args:
+            steps (List[str]): 학생 풀이 단계 수식
+
+        Returns:
+            List[List[float]]: 입력 순서대로의 임베딩 (빈 단계는 빈 리스트)
+        """
+        normalized = [normalize_latex(step) for step in steps]
+        if not self.openai_api_key or not settings.STEP_EMBEDDING_CACHE_ENABLED:
+            return await self.get_embeddings(normalized)
+
+        cache = get_step_embedding_cache()
+        keys = {text: step_embedding_key(self.embedding_model, text) for text in normalized if text}
+        cached = await cache.get_many(keys.values())
+
+        missing = [text for text, key in keys.items() if key not in cached]
+        if missing:
+            embeddings = await self.get_embeddings(missing)
+            # 오류로 받은 기본 임베딩(0 벡터)은 저장하지 않음
+            fresh = {keys[text]: embedding for text, embedding in zip(missing, embeddings) if any(embedding)}
+            await cache.set_many(fresh)
+            cached.update({keys[text]: embedding for text, embedding in zip(missing, embeddings)})
+
+        logger.debug(f"학생 풀이 임베딩: 단계 {len(steps)}개, 캐시 적중 {len(keys) - len(missing)}개, 요청 {len(missing)}개")
+        return [cached.get(keys[text], []) if text else [] for text in normalized]
+
+    @staticmethod
+    def _normalized_matrix(embeddings: List[List[float]], dim: Optional[int] = None) -> np.ndarray:
+        """
+        임베딩 목록을 행 단위 L2 정규화된 float32 행렬로 변환
+        (비어 있거나 차원이 다르거나 크기가 0인 임베딩은 0 행 → 유사도 0)
+        """
+        if dim is None:
+            dim = next((len(e) for e in embeddings if e), 0)
+        matrix = np.zeros((len(embeddings), dim), dtype=np.float32)
+        for i, embedding in enumerate(embeddings):
+            if embedding and len(embedding) == dim:
+                matrix[i] = embedding
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _reference_matrix(self, problem_id: str, problem_embeddings: Dict[str, Any]) -> Tuple[np.ndarray, List[str]]:
+        """문제의 모범 답안 임베딩 행렬 (처음 사용할 때 한 번 만들어 재사용)"""
+        cached = _reference_matrices.get(problem_id)
+        if cached is None:
+            matrix = np.array(problem_embeddings["matrix"], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+            cached = (matrix, list(problem_embeddings["solution_steps"]))
+            _reference_matrices[problem_id] = cached
+        return cached
+
+    async def find_closest_reference_steps(self, steps: List[str], k: int = 1) -> List[List[Dict[str, Any]]]:
+        """
+        학생 풀이 단계마다 카탈로그 전체에서 가장 비슷한 모범 답안 풀이 단계 검색
+
+        Args:
+            steps (List[str]): 학생 풀이 단계 수식
+            k (int): 단계당 결과 수
+
+        Returns:
+            List[List[Dict[str, Any]]]: 단계별 problem_id, step_index, step, similarity (색인이 없으면 빈 목록)
+        """
+        index = await asyncio.to_thread(get_step_index)
+        if index is None:
+            return [[] for _ in steps]
+        if index.meta.get("embedding_model") and index.meta["embedding_model"] != self.embedding_model:
+            logger.warning(f"풀이 단계 색인의 임베딩 모델({index.meta['embedding_model']})이 현재 모델과 달라 검색하지 않습니다.")
+            return [[] for _ in steps]
+
+        embeddings = await self.get_student_embeddings(steps)
+        queries = self._normalized_matrix(embeddings, dim=index.dim)
+        return index.search(queries, k=k, n_probe=settings.STEP_INDEX_NPROBE)
+
     def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """두 임베딩 벡터 간의 코사인 유사도 계산"""
         if not embedding1 or not embedding2:
@@ -91,53 +312,57 @@ class EmbeddingService:
         return float(np.dot(vec1, vec2) / (norm1 * norm2))
     
     async def prepare_problem_embeddings(self, problem_id: str, problem_data: Dict[str, Any]) -> bool:
-        """문제의 모범 답안을 임베딩하여 캐시에 저장"""
+        """
+        문제의 모범 답안 임베딩 준비
+        임베딩은 scripts/convert_problems_to_db.py --embeddings-dir로 미리 생성해 두며,
+        EMBED_REFERENCE_ON_REQUEST가 꺼져 있으면 요청 중에 새로 임베딩하지 않습니다.
+        """
         # 이미 캐시에 있는지 확인
         if problem_id in self.embeddings_cache:
             return True
             
-        # 캐시 파일 확인
-        cached_data = self._load_cached_embeddings(problem_id)
+        # 저장된 임베딩 확인 (파일 읽기는 워커 스레드에서)
+        cached_data = await asyncio.to_thread(self._load_cached_embeddings, problem_id)
         if cached_data:
             self.embeddings_cache[problem_id] = cached_data
             return True
             
+        if not settings.EMBED_REFERENCE_ON_REQUEST:
+            logger.warning(f"문제 {problem_id}의 모범 답안 임베딩이 없습니다. (scripts/convert_problems_to_db.py --embeddings-dir로 생성)")
+            return False
+
         # 문제 데이터 확인
         if not problem_data:
             logger.warning(f"문제 {problem_id}의 데이터가 없어 임베딩을 생성할 수 없습니다.")
             return False
             
-        # 풀이 단계 추출
-        explanation = problem_data.get("explanation", "")
-        if not explanation:
+        # 정리된 풀이 단계 (카탈로그에 미리 계산된 값 우선)
+        solution_steps = problem_data.get("solution_steps") or clean_solution_steps(problem_data.get("explanation", ""))
+        if not solution_steps:
             logger.warning(f"문제 {problem_id}의 풀이 설명이 없어 임베딩을 생성할 수 없습니다.")
             return False
-            
-        # 풀이 단계 분리 (줄바꿈 기준)
-        solution_steps = [step.strip() for step in explanation.split("\n") if step.strip()]
         
-        # 각 단계 임베딩
-        step_embeddings = []
-        for step in solution_steps:
-            embedding = await self.get_embedding(step)
-            if embedding:
-                step_embeddings.append({
-                    "text": step,
-                    "embedding": embedding
-                })
+        # 모든 단계를 한 번에 임베딩 (실패한 단계는 제외)
+        embeddings = await self.get_embeddings(solution_steps)
+        dim = max((len(e) for e in embeddings), default=0)
+        pairs = [(step, e) for step, e in zip(solution_steps, embeddings) if e and len(e) == dim]
+        if not pairs:
+            logger.warning(f"문제 {problem_id}의 임베딩 생성에 실패했습니다.")
+            return False
                 
         # 임베딩 데이터 구성
         embeddings_data = {
             "problem_id": problem_id,
-            "solution_steps": solution_steps,
-            "step_embeddings": step_embeddings
+            "embedding_model": self.embedding_model,
+            "solution_steps": [step for step, _ in pairs],
+            "matrix": np.asarray([e for _, e in pairs], dtype=np.float32)
         }
         
         # 캐시에 저장
         self.embeddings_cache[problem_id] = embeddings_data
-        self._save_embeddings_to_cache(problem_id, embeddings_data)
+        await asyncio.to_thread(self._save_embeddings_to_cache, problem_id, embeddings_data)
         
-        logger.info(f"문제 {problem_id}의 임베딩 생성 완료 ({len(step_embeddings)} 단계)")
+        logger.info(f"문제 {problem_id}의 임베딩 생성 완료 ({len(pairs)} 단계)")
         return True
         
     async def analyze_solution_similarity(
@@ -157,32 +382,28 @@ class EmbeddingService:
         
         # 모범 답안 임베딩 가져오기
         problem_embeddings = self.embeddings_cache.get(problem_id)
-        if not problem_embeddings or not problem_embeddings.get("step_embeddings"):
+        if not problem_embeddings or not problem_embeddings.get("solution_steps"):
             logger.warning(f"문제 {problem_id}의 임베딩이 없습니다.")
             return [{"is_valid": True, "similarity": 0.0, "feedback": "모범 답안과 비교할 수 없습니다."} for _ in solution_steps]
             
-        # 학생 풀이 각 단계 임베딩
-        student_embeddings = []
-        for step in solution_steps:
-            embedding = await self.get_embedding(step)
-            student_embeddings.append(embedding)
+        # 학생 풀이 전체 단계를 캐시 조회 후 한 번의 요청으로 임베딩
+        student_embeddings = await self.get_student_embeddings(solution_steps)
+
+        # 학생 단계 × 모범 답안 단계 코사인 유사도를 한 번의 행렬 곱으로 계산
+        reference_matrix, reference_texts = self._reference_matrix(problem_id, problem_embeddings)
+        student_matrix = self._normalized_matrix(student_embeddings, dim=reference_matrix.shape[1])
+        similarity_matrix = student_matrix @ reference_matrix.T
+        best_indices = similarity_matrix.argmax(axis=1)
             
         # 각 단계별 유사도 분석
         results = []
         prev_similarity = 0.0
         
-        for i, student_embedding in enumerate(student_embeddings):
-            # 모든 모범 답안 단계와의 유사도 계산
-            step_similarities = []
-            for ref_step in problem_embeddings["step_embeddings"]:
-                ref_embedding = ref_step["embedding"]
-                similarity = self.calculate_similarity(student_embedding, ref_embedding)
-                step_similarities.append((similarity, ref_step["text"]))
-                
-            # 가장 유사한 단계 찾기
-            step_similarities.sort(reverse=True)
-            best_similarity = step_similarities[0][0] if step_similarities else 0.0
-            best_ref_step = step_similarities[0][1] if step_similarities else ""
+        for i in range(len(solution_steps)):
+            # 가장 유사한 모범 답안 단계
+            best_index = int(best_indices[i])
+            best_similarity = float(similarity_matrix[i, best_index])
+            best_ref_step = reference_texts[best_index]
             
             # 유사도 변화 계산
             similarity_change = best_similarity - prev_similarity
@@ -299,3 +520,7 @@ class EmbeddingService:
                 return "모범 답안과 유사한 방향으로 진행 중입니다. 수식 변환이 대체로 맞습니다."
             else:
                 return "풀이 방식이 모범 답안과 다소 다르지만, 지금까지는 명확한 오류가 발견되지 않았습니다. 계속 진행해 보세요."
+
+
+# 프로세스 전역 임베딩 서비스 (라우터 등에서 공유)
+embedding_service = EmbeddingService()
@@ -0,0 +1,137 @@
+# app/services/embedding_store.py
+"""
+문제별 모범 답안 임베딩 저장소
+
+임베딩 벡터는 float32 행렬(단계 수 × 차원)로 `{problem_id}.npy`에, 단계 텍스트와 모델 정보는
+`{problem_id}.meta.json`에 따로 저장합니다. 행렬은 메모리 매핑으로 열어 필요한 페이지만 읽습니다.
+이전 형식(`{problem_id}_embeddings.json`, 들여쓰기된 JSON 실수 목록)은 처음 읽을 때 자동으로 변환되며,
+app/scripts/migrate_embeddings.py로 한 번에 변환할 수도 있습니다.
+"""
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from app.services.solution_steps import is_marker_line
+import json
+import logging
+import os
+import numpy as np
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """
+    디렉토리 기반 임베딩 저장소 (문제 ID → 행렬 + 메타데이터)
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def matrix_path(self, problem_id: str) -> Path:
+        return self.directory / f"{problem_id}.npy"
+
+    def meta_path(self, problem_id: str) -> Path:
+        return self.directory / f"{problem_id}.meta.json"
+
+    def legacy_path(self, problem_id: str) -> Path:
+        return self.directory / f"{problem_id}_embeddings.json"
+
+    def mtime(self, problem_id: str) -> Optional[float]:
+        """저장 시각 (메타데이터 파일 기준, 없으면 None)"""
+        try:
+            return self.meta_path(problem_id).stat().st_mtime
+        except OSError:
+            return None
+
+    def problem_ids(self) -> List[str]:
+        """저장된 문제 ID 목록"""
+        return sorted(path.name[:-len(".meta.json")] for path in self.directory.glob("*.meta.json"))
+
+    def save(self, problem_id: str, solution_steps: List[str], matrix: np.ndarray, embedding_model: str = ""):
+        """
+        행렬과 메타데이터 저장 (임시 파일에 쓴 뒤 교체, 메타데이터를 나중에 써서 읽는 쪽이 불완전한 쌍을 보지 않도록 함)
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+        matrix_tmp = self.matrix_path(problem_id).with_suffix(".npy.tmp")
+        with open(matrix_tmp, "wb") as f:
+            np.save(f, matrix)
+        os.replace(matrix_tmp, self.matrix_path(problem_id))
+
+        meta = {
+            "problem_id": problem_id,
+            "embedding_model": embedding_model,
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "count": int(matrix.shape[0]),
+            "solution_steps": solution_steps
+        }
+        meta_tmp = self.meta_path(problem_id).with_suffix(".json.tmp")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_tmp, self.meta_path(problem_id))
+
+    def load(self, problem_id: str) -> Optional[Dict[str, Any]]:
+        """
+        임베딩 로드 (없으면 이전 형식 JSON을 변환해서 로드)
+
+        Returns:
+            Optional[Dict[str, Any]]: problem_id, embedding_model, solution_steps, matrix(float32, 읽기 전용 메모리 매핑)
+        """
+        meta_path = self.meta_path(problem_id)
+        if not meta_path.exists():
+            if not self.migrate(problem_id):
+                return None
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(self.matrix_path(problem_id), mmap_mode="r")
+        if matrix.shape[0] != len(meta.get("solution_steps", [])):
+            logger.error(f"문제 {problem_id}의 임베딩 행렬과 메타데이터가 일치하지 않습니다.")
+            return None
+        return {**meta, "matrix": matrix}
+
+    def migrate(self, problem_id: str, remove_legacy: bool = False) -> bool:
+        """
+        이전 형식 JSON 파일을 행렬 + 메타데이터로 변환
+        (줄 단위 분할로 생긴 쪽/번호 표시 단계와 중복 단계는 제외)
+        """
+        legacy_path = self.legacy_path(problem_id)
+        if not legacy_path.exists():
+            return False
+
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        texts: List[str] = []
+        vectors: List[List[float]] = []
+        for step in data.get("step_embeddings", []):
+            text = step.get("text", "").strip()
+            embedding = step.get("embedding") or []
+            if not text or not embedding or is_marker_line(text) or text in texts:
+                continue
+            if vectors and len(embedding) != len(vectors[0]):
+                continue
+            texts.append(text)
+            vectors.append(embedding)
+
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        self.save(problem_id, texts, matrix, data.get("embedding_model", ""))
+        # 원본 파일 시각을 유지해 데이터 변경 이후 무효화 판단이 그대로 적용되도록 함
+        stat = legacy_path.stat()
+        os.utime(self.meta_path(problem_id), (stat.st_atime, stat.st_mtime))
+        if remove_legacy:
+            legacy_path.unlink()
+        logger.info(f"임베딩 형식 변환: {legacy_path.name} → {problem_id}.npy ({len(texts)} 단계)")
+        return True
+
+    def migrate_all(self, remove_legacy: bool = False) -> int:
+        """디렉토리의 모든 이전 형식 파일 변환 (변환된 파일 수 반환)"""
+        count = 0
+        for path in sorted(self.directory.glob("*_embeddings.json")):
+            problem_id = path.name[:-len("_embeddings.json")]
+            if self.meta_path(problem_id).exists() and not remove_legacy:
+                continue
+            if self.migrate(problem_id, remove_legacy=remove_legacy):
+                count += 1
+        return count
@@ -3,7 +3,7 @@ from app.core.config import settings  # settings에서 API 키를 가져오기 
 from app.core.prompt_loader import load_prompt_template
 from app.core.cache import feedback_cache
 from app.core.exceptions import AIFeedbackError
-from openai import AsyncOpenAI
+from app.core.llm import create_chat_completion
 import os
 import logging
 import re
@@ -216,8 +216,7 @@ async def generate_batch_feedback(
     
     # API 호출
     try:
-        client = AsyncOpenAI(api_key=api_key)
-        response = await client.chat.completions.create(
+        response = await create_chat_completion(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -326,8 +325,7 @@ async def generate_feedback(step_data: Dict[str, Any]) -> str:
         )
         
         # OpenAI API 호출
-        client = AsyncOpenAI(api_key=api_key)
-        response = await client.chat.completions.create(
+        response = await create_chat_completion(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
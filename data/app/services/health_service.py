@@ -1,6 +1,7 @@
 import asyncpg, redis.asyncio as redis, httpx, os
 import logging
 from app.core.config import settings
+from app.core.http_clients import http_clients
 
 DATABASE_URL = f"postgresql://{settings.DB_USERNAME}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_DATABASE}"
 REDIS_URL = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}"
@@ -29,9 +30,9 @@ async def check_redis():
 
 async def check_openai():
     try:
-        async with httpx.AsyncClient(timeout=3) as client:
-            res = await client.get(OPENAI_URL, headers={"Authorization": f"Bearer {OPENAI_API_KEY}"})
-            return "ok" if res.status_code == 200 else "degraded"
+        client = http_clients.get("openai")
+        res = await client.get(OPENAI_URL, headers={"Authorization": f"Bearer {OPENAI_API_KEY}"}, timeout=3)
+        return "ok" if res.status_code == 200 else "degraded"
     except:
         return "fail"
 
@@ -2,15 +2,73 @@
 from app.core.config import settings
 from app.core.exceptions import OCRError
 from .mathpix_ocr import MathpixOCR
+from .base_ocr import BaseOCR
+from .cached_ocr import CachedOCR
+from .hedged_ocr import HedgedOCR
+from .preprocess import PreprocessingOCR, get_preprocess_profile
+from .sumen_base import SumenOCR, predict_latex_from_images, sumen_model_manager
+import logging
+
+# 로거 설정
+logger = logging.getLogger(__name__)
 # from .trocr_ocr import TrOCR  # 추후 구현
 
+def _resolve_engine(engine: str) -> str:
+    """로컬 모델이 아직 준비되지 않았다면 로드를 시작하고, 그 동안은 대체 엔진 이름을 반환"""
+    if engine == "sumen" and not sumen_model_manager.is_ready:
+        sumen_model_manager.start_background_load()
+        fallback = settings.SUMEN_FALLBACK_ENGINE
+        if fallback and fallback != "sumen":
+            logger.info(f"Sumen 모델 준비 중({sumen_model_manager.state.value}), {fallback} 엔진으로 대체")
+            return fallback
+    return engine
+
+
+def _create_engine(engine: str) -> BaseOCR:
+    """단일 엔진 생성 (엔진별 전처리 포함, 캐시 미포함)"""
+    if engine == "mathpix":
+        ocr = MathpixOCR()
+    elif engine == "sumen":
+        ocr = SumenOCR()
+    # elif engine == "trocr":
+    #     ocr = TrOCR()
+    else:
+        raise OCRError(f"지원되지 않는 OCR 엔진: {engine}")
+
+    # 엔진별 이미지 전처리 (캐시 안쪽에 두어 캐시 적중 시 전처리 생략)
+    profile = get_preprocess_profile(engine) if settings.OCR_PREPROCESS_ENABLED else None
+    if profile:
+        ocr = PreprocessingOCR(ocr, profile)
+    return ocr
+
+
+def _with_cache(ocr: BaseOCR) -> BaseOCR:
+    """이미지 해시 기반 결과 캐시 적용"""
+    if settings.OCR_CACHE_ENABLED:
+        return CachedOCR(ocr)
+    return ocr
+
+
+def _create_hedged_engine() -> BaseOCR:
+    """
+    주/보조 엔진 헤지 구성 (보조 엔진이 준비되지 않았다면 주 엔진만 사용)
+    캐시는 엔진별로 안쪽에 두어, 주 엔진이 잠시 느려서 채택된 보조 엔진 결과가
+    주 엔진 결과 자리에 영구히 저장되지 않도록 합니다.
+    """
+    primary = _resolve_engine(settings.OCR_HEDGE_PRIMARY)
+    secondary = _resolve_engine(settings.OCR_HEDGE_SECONDARY)
+    if secondary == primary:
+        return _with_cache(_create_engine(primary))
+    return HedgedOCR(_with_cache(_create_engine(primary)), _with_cache(_create_engine(secondary)))
+
+
 def get_ocr_engine(engine_type=None):
     """
     OCR 엔진 팩토리 함수
     engine_type이 None이면 설정에서 기본값을 사용
     
     Args:
-        engine_type (str, optional): 사용할 OCR 엔진 유형 ('mathpix', 'trocr' 등)
+        engine_type (str, optional): 사용할 OCR 엔진 유형 ('mathpix', 'sumen', 'hedged' 등)
         
     Returns:
         BaseOCR: 선택된 OCR 엔진 인스턴스
@@ -19,13 +77,10 @@ def get_ocr_engine(engine_type=None):
         OCRError: 지원되지 않는 엔진 유형일 경우
     """
     engine = engine_type or settings.OCR_BACKEND
-    
-    if engine == "mathpix":
-        return MathpixOCR()
-    # elif engine == "trocr":
-    #     return TrOCR()
-    else:
-        raise OCRError(f"지원되지 않는 OCR 엔진: {engine}")
+
+    if engine == "hedged":
+        return _create_hedged_engine()
+    return _with_cache(_create_engine(_resolve_engine(engine)))
     
 def img_to_latex(paths):
     return predict_latex_from_images(paths)
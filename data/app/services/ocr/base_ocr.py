@@ -1,14 +1,59 @@
 # app/services/ocr/base_ocr.py
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence, Union
+from app.core.concurrency import bounded_gather
+from app.core.config import settings
+import copy
+import os
+import tempfile
+
+# OCR 엔진이 받는 메모리 상의 이미지 (복사 없이 전달할 수 있도록 memoryview 허용)
+ImageBytes = Union[bytes, bytearray, memoryview]
 
 class OCRResult:
-    def __init__(self, latex: str, confidence: float = 0.0, metadata: Optional[Dict[str, Any]] = None):
+    def __init__(
+        self,
+        latex: str,
+        confidence: float = 0.0,
+        metadata: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
         self.latex = latex
         self.confidence = confidence
         self.metadata = metadata or {}
+        # 이미지 다운로드/OCR 처리 실패 시 오류 메시지 (성공 시 None)
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        """캐시 저장용 직렬화"""
+        return {
+            "latex": self.latex,
+            "confidence": self.confidence,
+            # 캐시된 항목이 원본 결과의 이후 수정에 영향받지 않도록 복사
+            "metadata": copy.deepcopy(self.metadata)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OCRResult":
+        """캐시에서 읽은 데이터로 OCRResult 복원"""
+        return cls(
+            latex=data.get("latex", ""),
+            confidence=data.get("confidence", 0.0),
+            # 캐시 적중마다 새 메타데이터를 만들어 호출자가 수정해도 캐시 항목은 그대로 유지
+            metadata=copy.deepcopy(data.get("metadata") or {})
+        )
 
 class BaseOCR(ABC):
+    # 엔진 식별자 (캐시 키, 로그, 메트릭에 사용)
+    name: str = "base"
+
+    def cache_options(self) -> Dict[str, Any]:
+        """
+        결과에 영향을 주는 엔진 옵션을 반환합니다.
+        같은 이미지라도 옵션이 다르면 다른 캐시 항목으로 취급됩니다.
+        """
+        return {}
+
     @abstractmethod
     async def image_to_latex(self, image_path: str) -> OCRResult:
         """
@@ -16,3 +61,34 @@ class BaseOCR(ABC):
         반환값은 OCRResult 객체로, latex, confidence, metadata를 포함합니다.
         """
         pass
+
+    async def image_bytes_to_latex(self, image: ImageBytes, filename: str = "image.png") -> OCRResult:
+        """
+        메모리 상의 이미지(bytes/memoryview)를 LaTeX 문자열로 변환합니다.
+        파일 시스템을 거치지 않도록 각 엔진에서 재정의하는 것을 권장하며,
+        기본 구현은 경로만 지원하는 엔진을 위해 임시 파일을 만들고 처리 후 반드시 삭제합니다.
+        """
+        suffix = os.path.splitext(filename)[1] or ".png"
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        try:
+            temp_file.write(image)
+            temp_file.close()
+            return await self.image_to_latex(temp_file.name)
+        finally:
+            temp_file.close()
+            os.unlink(temp_file.name)
+
+    async def batch_image_bytes_to_latex(self, images: Sequence[ImageBytes]) -> List[OCRResult]:
+        """
+        여러 이미지를 한 번에 LaTeX로 변환합니다. 결과는 입력 순서를 유지합니다.
+        기본 구현은 image_bytes_to_latex를 동시 실행 수를 제한하여 병렬 호출하며,
+        한 번의 추론으로 여러 이미지를 처리할 수 있는 로컬 모델 엔진은 이를 재정의합니다.
+        개별 이미지의 실패는 예외 대신 error가 채워진 OCRResult로 반환됩니다.
+        """
+        fanout = await bounded_gather(
+            images, self.image_bytes_to_latex, settings.OCR_MAX_CONCURRENT_REQUESTS
+        )
+        return [
+            item.value if item.ok else OCRResult(latex="", confidence=0.0, error=str(item.error))
+            for item in fanout
+        ]
@@ -0,0 +1,141 @@
+# app/services/ocr/cached_ocr.py
+"""
+이미지 내용 기반 OCR 결과 캐시
+
+같은 스냅샷 이미지(재제출, 네트워크 재시도, 노트 재열람)가 외부 OCR로 반복 전송되지 않도록
+이미지 바이트 해시 + 엔진 옵션을 키로 OCRResult를 저장합니다.
+- 1계층: 프로세스 내 LRU 캐시
+- 2계층: 디스크 또는 Redis 영속 캐시
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from app.core.cache import TieredCache
+from app.core.config import settings
+from .base_ocr import BaseOCR, OCRResult, ImageBytes
+import hashlib
+import json
+import logging
+import os
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+def ocr_cache_key(engine: BaseOCR, image_bytes: ImageBytes) -> str:
+    """
+    엔진 이름, 엔진 옵션, 이미지 바이트로 캐시 키 생성
+
+    Args:
+        engine (BaseOCR): 결과를 생성하는 OCR 엔진
+        image_bytes (ImageBytes): 원본 이미지 바이트
+
+    Returns:
+        str: SHA-256 해시 키
+    """
+    options = json.dumps(engine.cache_options(), sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256()
+    digest.update(engine.name.encode())
+    digest.update(b"\0")
+    digest.update(options.encode())
+    digest.update(b"\0")
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+class OCRResultCache(TieredCache):
+    """
+    2계층(LRU + 영속) OCR 결과 캐시 (LRU에는 직렬화된 dict, 영속 계층에는 JSON 저장)
+    """
+
+    def __init__(self, max_items: int, backend: str, ttl: Optional[int] = None):
+        """
+        Args:
+            max_items (int): 인메모리 LRU 최대 항목 수
+            backend (str): 영속 계층 종류 ('disk', 'redis', 'none')
+            ttl (Optional[int]): 영속 계층 항목 수명(초)
+        """
+        super().__init__(
+            max_items=max_items,
+            backend=backend,
+            prefix="ocr",
+            directory=settings.OCR_CACHE_DIR,
+            ttl=ttl,
+            encode=lambda data: json.dumps(data, ensure_ascii=False).encode("utf-8"),
+            decode=json.loads
+        )
+
+    async def get(self, key: str) -> Optional[OCRResult]:
+        data = await super().get(key)
+        return OCRResult.from_dict(data) if data is not None else None
+
+    async def set(self, key: str, result: OCRResult) -> None:
+        await super().set(key, result.to_dict())
+
+
+_result_cache: Optional[OCRResultCache] = None
+
+
+def get_ocr_result_cache() -> OCRResultCache:
+    """프로세스 전역 OCR 결과 캐시 반환 (최초 호출 시 생성)"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = OCRResultCache(
+            max_items=settings.OCR_CACHE_MAX_ITEMS,
+            backend=settings.OCR_CACHE_BACKEND,
+            ttl=settings.OCR_CACHE_TTL
+        )
+    return _result_cache
+
+
+class CachedOCR(BaseOCR):
+    """
+    임의의 BaseOCR 엔진을 감싸는 캐시 래퍼
+    캐시 적중 시 외부 OCR 호출을 완전히 생략합니다.
+    """
+
+    def __init__(self, engine: BaseOCR, cache: Optional[OCRResultCache] = None):
+        self.engine = engine
+        self.cache = cache or get_ocr_result_cache()
+        self.name = engine.name
+
+    def cache_options(self) -> Dict[str, Any]:
+        return self.engine.cache_options()
+
+    async def image_to_latex(self, image_path: str) -> OCRResult:
+        with open(image_path, "rb") as f:
+            image = f.read()
+        return await self.image_bytes_to_latex(image, os.path.basename(image_path))
+
+    async def image_bytes_to_latex(self, image: ImageBytes, filename: str = "image.png") -> OCRResult:
+        key = ocr_cache_key(self.engine, image)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.info(f"[CachedOCR] 캐시 적중 ({self.name}, {key[:12]})")
+            cached.metadata["cache_hit"] = True
+            return cached
+
+        result = await self.engine.image_bytes_to_latex(image, filename)
+        # 실패 결과는 저장하지 않아 다음 요청에서 다시 시도하도록 함
+        if not result.error:
+            await self.cache.set(key, result)
+        return result
+
+    async def batch_image_bytes_to_latex(self, images: Sequence[ImageBytes]) -> List[OCRResult]:
+        keys = [ocr_cache_key(self.engine, image) for image in images]
+        results: List[Optional[OCRResult]] = []
+        for key in keys:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                cached.metadata["cache_hit"] = True
+            results.append(cached)
+
+        # 캐시 미적중 이미지만 모아 엔진에 한 번에 전달
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            logger.info(f"[CachedOCR] 배치 캐시 적중 {len(images) - len(missing)}/{len(images)} ({self.name})")
+            fresh = await self.engine.batch_image_bytes_to_latex([images[i] for i in missing])
+            for i, result in zip(missing, fresh):
+                results[i] = result
+                if not result.error:
+                    await self.cache.set(keys[i], result)
+
+        return results
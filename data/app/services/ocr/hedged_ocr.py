@@ -0,0 +1,153 @@
+# app/services/ocr/hedged_ocr.py
+"""
+헤지(hedged) 요청 / 대체(fallback) 다중 엔진 OCR
+
+주 엔진(예: Mathpix)에 먼저 요청하고, 주 엔진의 지연 시간 p95를 넘겨도 응답이 없으면
+보조 엔진(예: 로컬 Sumen)에도 요청을 보내 먼저 도착한 적합한 결과를 사용합니다.
+주 엔진이 실패하면 마감 시간을 기다리지 않고 즉시 보조 엔진으로 넘어갑니다.
+엔진별 지연 시간을 누적해 헤지 마감 시간이 트래픽에 맞게 조정됩니다.
+
+채택되지 않은 요청의 태스크는 취소합니다. Mathpix 요청은 같은 이미지를 기다리는 다른 호출자가 없으면
+HTTP 요청까지 중단되지만, 이미 서버가 처리한 요청의 사용량은 되돌릴 수 없습니다.
+로컬 Sumen 요청은 배치 큐에서 기다리는 중이면 제외되지만, 이미 시작된 배치 추론은 끝까지 실행됩니다.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.exceptions import OCRError
+from app.core.metrics import Histogram
+from .base_ocr import BaseOCR, OCRResult, ImageBytes
+import asyncio
+import logging
+import os
+import time
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+_latency: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {"requests": 0, "hedged": 0, "fallback": 0, "secondary_wins": 0}
+
+
+def engine_latency(name: str) -> Histogram:
+    """엔진별 지연 시간(초) 히스토그램 (프로세스 전역)"""
+    if name not in _latency:
+        _latency[name] = Histogram(buckets=[0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60])
+    return _latency[name]
+
+
+def hedge_deadline(name: str) -> float:
+    """
+    주 엔진의 헤지 마감 시간(초)
+    표본이 충분하면 지연 시간 백분위수(OCR_HEDGE_PERCENTILE), 아니면 기본값을 사용합니다.
+    """
+    histogram = engine_latency(name)
+    if histogram.count < settings.OCR_HEDGE_MIN_SAMPLES:
+        return settings.OCR_HEDGE_DEFAULT_DELAY
+    deadline = histogram.percentile(settings.OCR_HEDGE_PERCENTILE)
+    return min(settings.OCR_HEDGE_MAX_DELAY, max(settings.OCR_HEDGE_MIN_DELAY, deadline))
+
+
+def hedging_stats() -> Dict[str, Any]:
+    """헤지 요청 현황과 엔진별 지연 시간"""
+    return {
+        **_counters,
+        "latency_seconds": {name: histogram.snapshot() for name, histogram in _latency.items()}
+    }
+
+
+def is_acceptable(result: Optional[OCRResult]) -> bool:
+    """
+    바로 채택할 수 있는 결과인지 (오류 없음, 비어 있지 않음, 신뢰도 기준 충족)
+    엔진이 신뢰도를 주지 않은 결과(metadata["confidence_missing"])는 신뢰도 0이 아니라 알 수 없음으로 보고 채택합니다.
+    """
+    if result is None or result.error or not result.latex:
+        return False
+    if result.metadata.get("confidence_missing"):
+        return True
+    return result.confidence >= settings.OCR_HEDGE_MIN_CONFIDENCE
+
+
+class HedgedOCR(BaseOCR):
+    """
+    주/보조 엔진을 묶은 복합 OCR 엔진
+    """
+    name = "hedged"
+
+    def __init__(self, primary: BaseOCR, secondary: BaseOCR):
+        self.primary = primary
+        self.secondary = secondary
+
+    def cache_options(self) -> Dict[str, Any]:
+        return {
+            "primary": [self.primary.name, self.primary.cache_options()],
+            "secondary": [self.secondary.name, self.secondary.cache_options()]
+        }
+
+    async def image_to_latex(self, image_path: str) -> OCRResult:
+        with open(image_path, "rb") as f:
+            image = f.read()
+        return await self.image_bytes_to_latex(image, os.path.basename(image_path))
+
+    async def _timed(self, engine: BaseOCR, image: ImageBytes, filename: str) -> OCRResult:
+        start = time.monotonic()
+        try:
+            result = await engine.image_bytes_to_latex(image, filename)
+        except asyncio.CancelledError:
+            # 취소된 요청도 최소 지연 시간으로 기록해 p95가 낮게 치우치지 않도록 함
+            engine_latency(engine.name).observe(time.monotonic() - start)
+            raise
+        # 캐시 적중은 엔진 지연 시간이 아니므로 마감 시간 계산에서 제외
+        if not result.metadata.get("cache_hit"):
+            engine_latency(engine.name).observe(time.monotonic() - start)
+        # 엔진이 반환한 결과는 다른 호출자와 공유될 수 있으므로 수정하지 않고 복사본에 엔진 이름 기록
+        return OCRResult(result.latex, result.confidence, {**result.metadata, "engine": engine.name}, result.error)
+
+    async def image_bytes_to_latex(self, image: ImageBytes, filename: str = "image.png") -> OCRResult:
+        _counters["requests"] += 1
+        deadline = hedge_deadline(self.primary.name)
+        tasks: Dict[asyncio.Task, BaseOCR] = {
+            asyncio.ensure_future(self._timed(self.primary, image, filename)): self.primary
+        }
+        finished: List[Tuple[BaseOCR, Optional[OCRResult], Optional[BaseException]]] = []
+        hedge_started = False
+
+        try:
+            while tasks:
+                timeout = None if hedge_started else deadline
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    engine = tasks.pop(task)
+                    error = task.exception()
+                    result = None if error else task.result()
+                    if is_acceptable(result):
+                        if engine is self.secondary:
+                            _counters["secondary_wins"] += 1
+                        return result
+                    finished.append((engine, result, error))
+                    if error or (result and result.error):
+                        logger.warning(f"[HedgedOCR] {engine.name} 실패: {error or result.error}")
+
+                # 마감 시간 초과 또는 주 엔진의 부적합한 응답 → 보조 엔진 요청
+                if not hedge_started:
+                    hedge_started = True
+                    if done:
+                        _counters["fallback"] += 1
+                    else:
+                        _counters["hedged"] += 1
+                        logger.info(f"[HedgedOCR] {self.primary.name} {deadline:.2f}s 초과, {self.secondary.name} 헤지 요청")
+                    tasks[asyncio.ensure_future(self._timed(self.secondary, image, filename))] = self.secondary
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # 적합한 결과가 없으면 오류 없는 결과 중 신뢰도가 가장 높은 것을 사용
+        candidates = [result for _, result, error in finished if result is not None and not result.error]
+        if candidates:
+            return max(candidates, key=lambda r: r.confidence)
+
+        errors = [str(error) if error else result.error for engine, result, error in finished]
+        first_error = next((error for _, _, error in finished if error), None)
+        if isinstance(first_error, OCRError):
+            raise first_error
+        raise OCRError(message="[HedgedOCR] 모든 엔진의 OCR 처리에 실패했습니다.", detail={"errors": errors})
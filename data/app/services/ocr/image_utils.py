@@ -0,0 +1,126 @@
+# app/services/ocr/image_utils.py
+"""
+OCR 전처리용 NumPy 이미지 유틸리티
+
+스냅샷 비교, 잉크 영역 검출, 크롭 등 OCR 앞단에서 공통으로 쓰는 연산을 모아 둡니다.
+모든 이미지는 (높이, 너비) uint8 그레이스케일 배열로 다룹니다 (0=검정, 255=흰색).
+"""
+from typing import List, Optional, Tuple
+from PIL import Image
+from .base_ocr import ImageBytes
+import io
+import numpy as np
+
+# (top, left, bottom, right) - bottom/right는 포함하지 않는 경계
+Box = Tuple[int, int, int, int]
+
+
+def decode_gray(image: ImageBytes) -> np.ndarray:
+    """
+    이미지 바이트를 그레이스케일 배열로 변환
+    투명 배경(RGBA) 스냅샷은 흰 배경 위에 합성합니다.
+    """
+    with Image.open(io.BytesIO(image)) as img:
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            rgba = img.convert("RGBA")
+            background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+            img = Image.alpha_composite(background, rgba)
+        return np.asarray(img.convert("L"), dtype=np.uint8)
+
+
+def encode_png(gray: np.ndarray) -> bytes:
+    """그레이스케일 배열을 PNG 바이트로 인코딩"""
+    buffer = io.BytesIO()
+    Image.fromarray(gray).save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def ink_mask(gray: np.ndarray, threshold: int = 200) -> np.ndarray:
+    """배경보다 어두운(필기된) 픽셀 마스크"""
+    return gray < threshold
+
+
+def dilate(mask: np.ndarray, radius: int = 1) -> np.ndarray:
+    """
+    정사각형 구조 요소로 마스크 팽창
+    안티앨리어싱/재렌더링으로 인한 1~2px 흔들림을 흡수하는 데 사용합니다.
+    """
+    if radius <= 0:
+        return mask
+    padded = np.pad(mask, radius)
+    height, width = mask.shape
+    out = np.zeros_like(mask)
+    size = 2 * radius + 1
+    for dy in range(size):
+        for dx in range(size):
+            out |= padded[dy:dy + height, dx:dx + width]
+    return out
+
+
+def bounding_box(mask: np.ndarray, margin: int = 0) -> Optional[Box]:
+    """
+    마스크에서 True 픽셀을 모두 포함하는 최소 사각형 (여백 포함)
+
+    Returns:
+        Optional[Box]: (top, left, bottom, right), 픽셀이 없으면 None
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    height, width = mask.shape
+    return (
+        max(0, int(rows[0]) - margin),
+        max(0, int(cols[0]) - margin),
+        min(height, int(rows[-1]) + 1 + margin),
+        min(width, int(cols[-1]) + 1 + margin)
+    )
+
+
+def crop(gray: np.ndarray, box: Box) -> np.ndarray:
+    top, left, bottom, right = box
+    return gray[top:bottom, left:right]
+
+
+def box_area(box: Box) -> int:
+    top, left, bottom, right = box
+    return max(0, bottom - top) * max(0, right - left)
+
+
+def segment_lines(mask: np.ndarray, min_gap: int = 6, min_height: int = 4, margin: int = 0) -> List[Box]:
+    """
+    수평 투영 프로파일로 텍스트 줄 영역 분할
+
+    Args:
+        mask (np.ndarray): 필기 픽셀 마스크
+        min_gap (int): 이보다 짧은 빈 행 구간은 같은 줄로 합침 (첨자/분수선 분리 방지)
+        min_height (int): 이보다 낮은 구간은 잡음으로 보고 제외
+        margin (int): 각 줄 영역에 더할 여백
+
+    Returns:
+        List[Box]: 위에서 아래 순서의 줄 영역 목록
+    """
+    profile = mask.sum(axis=1)
+    rows = np.flatnonzero(profile > 0)
+    if rows.size == 0:
+        return []
+
+    # 빈 행 간격이 min_gap 이상인 곳에서 줄을 나눔
+    breaks = np.flatnonzero(np.diff(rows) > min_gap)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]]))
+
+    lines = []
+    for start, end in zip(starts, ends):
+        if end - start + 1 < min_height:
+            continue
+        box = bounding_box(mask[start:end + 1], margin=0)
+        top, left, bottom, right = int(start) + box[0], box[1], int(start) + box[2], box[3]
+        height, width = mask.shape
+        lines.append((
+            max(0, top - margin),
+            max(0, left - margin),
+            min(height, bottom + margin),
+            min(width, right + margin)
+        ))
+    return lines
@@ -0,0 +1,154 @@
+# app/services/ocr/line_ocr.py
+"""
+줄 단위 스냅샷 OCR
+
+누적 스냅샷에서는 같은 필기 줄이 이후 모든 단계에 다시 등장합니다.
+각 스냅샷을 수평 투영 프로파일로 줄 단위로 나누고, 줄 픽셀 해시를 키로 제출 단위 캐시를 조회해
+처음 보는 줄만 한 번의 배치로 OCR 엔진에 전달합니다.
+줄별 결과는 fallback_extract_new_content가 처리하는 \\begin{array}{l} ... \\end{array} 구조로 다시 조립합니다.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from .base_ocr import BaseOCR, OCRResult, ImageBytes
+from .image_utils import Box, decode_gray, encode_png, ink_mask, segment_lines, crop
+import asyncio
+import hashlib
+import logging
+import numpy as np
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 줄 해시와 크롭 PNG 바이트
+LineCrop = Tuple[str, bytes]
+
+
+def _line_crop(gray: np.ndarray, box: Box, margin: int) -> np.ndarray:
+    """
+    줄 영역 크롭 (위아래 여백은 흰색으로 채움)
+    줄 간격이 여백보다 좁아도 이웃 줄이나 잡음 획이 크롭에 섞이지 않아, 아래에 새 줄을 써도 기존 줄의 해시가 유지됩니다.
+    """
+    top, left, bottom, right = box
+    line = crop(gray, (top, max(0, left - margin), bottom, min(gray.shape[1], right + margin)))
+    return np.pad(line, ((margin, margin), (0, 0)), constant_values=255)
+
+
+def split_snapshot_lines(image: ImageBytes) -> List[LineCrop]:
+    """
+    스냅샷 이미지를 줄 단위 크롭으로 분할
+
+    Returns:
+        List[LineCrop]: 위에서 아래 순서의 (줄 해시, 크롭 PNG 바이트) 목록
+    """
+    gray = decode_gray(image)
+    mask = ink_mask(gray, settings.OCR_DELTA_INK_THRESHOLD)
+    boxes = segment_lines(
+        mask,
+        min_gap=settings.OCR_LINE_MIN_GAP,
+        min_height=settings.OCR_LINE_MIN_HEIGHT
+    )
+
+    lines = []
+    for box in boxes:
+        line = _line_crop(gray, box, settings.OCR_DELTA_MARGIN)
+        # 위치와 무관하게 같은 필기 줄이면 같은 해시가 되도록 픽셀 내용만 해싱
+        digest = hashlib.sha256()
+        digest.update(f"{line.shape[0]}x{line.shape[1]}".encode())
+        digest.update(line.tobytes())
+        lines.append((digest.hexdigest(), encode_png(line)))
+    return lines
+
+
+def join_lines_latex(lines: Sequence[str]) -> str:
+    """줄별 LaTeX를 array 환경으로 조립 (한 줄이면 그대로 반환)"""
+    lines = [line for line in lines if line]
+    if len(lines) <= 1:
+        return lines[0] if lines else ""
+    return "\\begin{array}{l} " + " \\\\ ".join(lines) + " \\end{array}"
+
+
+def _split_all(images: Sequence[Optional[ImageBytes]]) -> List[Optional[List[LineCrop]]]:
+    """단계별 줄 분할 (이미지가 없거나 분할할 수 없는 단계는 None)"""
+    split: List[Optional[List[LineCrop]]] = []
+    for i, image in enumerate(images):
+        if image is None:
+            split.append(None)
+            continue
+        try:
+            lines = split_snapshot_lines(image)
+        except Exception as e:
+            logger.warning(f"단계 {i + 1} 줄 분할 실패, 전체 OCR로 처리: {str(e)}")
+            lines = None
+        # 줄이 너무 많으면(그림/배경 잡음 등) 분할 결과를 신뢰하지 않음
+        if lines is not None and len(lines) > settings.OCR_LINE_MAX_LINES:
+            lines = None
+        split.append(lines)
+    return split
+
+
+async def recognize_snapshot_lines(
+    ocr: BaseOCR,
+    images: Sequence[Optional[ImageBytes]]
+) -> Dict[int, OCRResult]:
+    """
+    누적 스냅샷 목록을 줄 단위로 OCR
+
+    Args:
+        ocr (BaseOCR): 사용할 OCR 엔진
+        images (Sequence[Optional[ImageBytes]]): 단계별 스냅샷 이미지 (다운로드 실패 시 None)
+
+    Returns:
+        Dict[int, OCRResult]: 이미지가 있는 단계의 누적 LaTeX 결과
+            metadata['new_latex']에 직전 단계에 없던 줄의 LaTeX가 담깁니다 (전체 OCR 단계 제외)
+    """
+    split = await asyncio.to_thread(_split_all, list(images))
+
+    # 제출 단위 캐시: 처음 보는 줄만 모아 한 번에 OCR
+    line_cache: Dict[str, OCRResult] = {}
+    pending: Dict[str, bytes] = {}
+    total_lines = 0
+    for lines in split:
+        for line_hash, png in lines or []:
+            total_lines += 1
+            pending.setdefault(line_hash, png)
+
+    hashes = list(pending)
+    results = await ocr.batch_image_bytes_to_latex([pending[h] for h in hashes])
+    line_cache.update(zip(hashes, results))
+    logger.info(f"줄 단위 OCR: 전체 {total_lines}줄 중 {len(hashes)}줄만 인식")
+
+    composed: Dict[int, OCRResult] = {}
+    full_ocr: List[int] = []
+    prev_hashes: set = set()
+    for i, lines in enumerate(split):
+        if images[i] is None:
+            prev_hashes = set()
+            continue
+        if lines is None or any(line_cache[h].error for h, _ in lines):
+            full_ocr.append(i)
+            prev_hashes = set()
+            continue
+
+        line_results = [line_cache[h] for h, _ in lines]
+        new_lines = [line_cache[h].latex for h, _ in lines if h not in prev_hashes]
+        composed[i] = OCRResult(
+            latex=join_lines_latex([r.latex for r in line_results]),
+            confidence=min((r.confidence for r in line_results), default=0.0),
+            metadata={
+                "snapshot_mode": "lines",
+                "line_count": len(lines),
+                "new_latex": "\n".join(line for line in new_lines if line)
+            }
+        )
+        prev_hashes = {h for h, _ in lines}
+
+    # 분할에 실패했거나 일부 줄 인식에 실패한 단계는 전체 이미지로 OCR
+    if full_ocr:
+        logger.info(f"줄 단위 처리 불가, 전체 OCR로 전환: {[i + 1 for i in full_ocr]}단계")
+        retried = await ocr.batch_image_bytes_to_latex([images[i] for i in full_ocr])
+        for i, result in zip(full_ocr, retried):
+            metadata = dict(result.metadata)
+            metadata["snapshot_mode"] = "full"
+            composed[i] = OCRResult(result.latex, result.confidence, metadata, result.error)
+
+    return composed
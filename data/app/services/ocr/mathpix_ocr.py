@@ -2,45 +2,74 @@
 import httpx
 import os
 import json
-import tempfile
 from app.core.config import settings
-from .base_ocr import BaseOCR, OCRResult
-from app.core.exceptions import OCRError
+from app.core.http_clients import http_clients
+from app.core.singleflight import ocr_flight, hash_key
+from .base_ocr import BaseOCR, OCRResult, ImageBytes
+from app.core.exceptions import OCRError, CircuitOpenError
+from app.core.resilience import call_with_resilience
 
 class MathpixOCR(BaseOCR):
+    name = "mathpix"
+
+    # Mathpix 요청 옵션 (결과에 영향을 주므로 캐시 키에도 포함)
+    OPTIONS = {
+        "rm_spaces": True,
+        "math_inline_delimiters": ["$", "$"],
+        "formats": ["text", "latex_styled", "asciimath"]
+    }
+
+    def cache_options(self):
+        return self.OPTIONS
+
     async def image_to_latex(self, image_path: str) -> OCRResult:
+        with open(image_path, "rb") as f:
+            image = f.read()
+        return await self.image_bytes_to_latex(image, os.path.basename(image_path))
+
+    async def image_bytes_to_latex(self, image: ImageBytes, filename: str = "image.png") -> OCRResult:
+        # 다운로드한 이미지를 파일 시스템을 거치지 않고 그대로 업로드
+        content = image if isinstance(image, bytes) else bytes(image)
+        # 같은 이미지의 동시 요청(재시도, 중복 제출)은 한 번만 Mathpix로 전송
+        key = hash_key(self.name, self.OPTIONS, content)
+        return await ocr_flight.do(key, lambda: self._request(content, filename))
+
+    async def _request(self, content: bytes, filename: str) -> OCRResult:
         headers = {
             "app_id": settings.MATHPIX_APP_ID,
             "app_key": settings.MATHPIX_APP_KEY
         }
 
-        options = {
-            "rm_spaces": True,
-            "math_inline_delimiters": ["$", "$"],
-            "formats": ["text", "latex_styled", "asciimath"]
-        }
+        options = self.OPTIONS
 
         try:
-            async with httpx.AsyncClient() as client:
-                with open(image_path, "rb") as f:
-                    files = {"file": (os.path.basename(image_path), f, "image/png")}
-                    data = {"options_json": json.dumps(options)}
+            client = http_clients.get("mathpix")
+            files = {"file": (filename, content, "image/png")}
+            data = {"options_json": json.dumps(options)}
 
-                    response = await client.post(
-                        "https://api.mathpix.com/v3/text",
-                        headers=headers,
-                        files=files,
-                        data=data,
-                        timeout=60.0
-                    )
+            async def post():
+                response = await client.post(
+                    "https://api.mathpix.com/v3/text",
+                    headers=headers,
+                    files=files,
+                    data=data,
+                    timeout=60.0
+                )
+                response.raise_for_status()
+                return response
 
-            response.raise_for_status()
+            # 속도 제한, 429/5xx 백오프 재시도, 서킷 브레이커 적용
+            response = await call_with_resilience("mathpix", post)
             result = response.json()
 
             print("[MathpixOCR] 응답 전체:", json.dumps(result, indent=2, ensure_ascii=False))
 
             latex = result.get("latex_styled") or result.get("text") or result.get("asciimath") or ""
-            confidence = result.get("confidence", 0.0)
+            # 신뢰도가 없는 응답은 0.0으로 두되 알 수 없음으로 표시 (헤지 채택 기준에서 낮은 신뢰도로 취급하지 않음)
+            confidence = result.get("confidence")
+            confidence_missing = confidence is None
+            if confidence_missing:
+                confidence = 0.0
             print(f"[MathpixOCR] OCR 결과: '{latex}', 신뢰도: {confidence}")
             
             # 메타데이터 추출 (추후 분석에 유용할 수 있는 정보)
@@ -53,9 +82,15 @@ class MathpixOCR(BaseOCR):
             
             # 빈 값과 None 제거
             metadata = {k: v for k, v in metadata.items() if v}
+            if confidence_missing:
+                metadata["confidence_missing"] = True
             
             return OCRResult(latex=latex, confidence=confidence, metadata=metadata)
 
+        except CircuitOpenError as e:
+            # 제공자 장애 시 즉시 실패 → 헤지/대체 엔진 경로로 넘어감
+            print(f"[MathpixOCR] {e.message}")
+            raise OCRError(message=e.message, detail=e.detail)
         except httpx.HTTPStatusError as e:
             error_msg = f"HTTP 오류: {e.response.status_code} - {e.response.text}"
             print(f"[MathpixOCR] {error_msg}")
@@ -0,0 +1,164 @@
+# app/services/ocr/micro_batcher.py
+"""
+로컬 OCR 추론용 동적 마이크로 배칭 스케줄러
+
+동시에 들어온 여러 요청의 이미지를 하나의 큐에 모아, 최대 배치 크기 또는 최대 대기 시간에
+도달하면 한 번의 배치 추론을 실행하고 각 호출자의 Future를 완료합니다.
+배치 크기와 큐 대기 시간 히스토그램으로 처리량과 지연 시간의 균형을 조정할 수 있습니다.
+"""
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+from app.core.metrics import Histogram
+import asyncio
+import logging
+import time
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    비동기 마이크로 배칭 큐
+    process_batch는 입력 목록과 같은 길이, 같은 순서의 결과 목록을 반환해야 합니다.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[T]], Awaitable[List[R]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher"
+    ):
+        """
+        Args:
+            process_batch (Callable): 배치 하나를 처리하는 코루틴 함수
+            max_batch_size (int): 한 번에 처리할 최대 항목 수
+            max_wait_ms (float): 첫 항목 도착 후 배치를 채우기 위해 기다리는 최대 시간(ms)
+            name (str): 로그/지표 식별용 이름
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.batch_sizes = Histogram(buckets=[1, 2, 4, 8, 16, 32, 64])
+        self.queue_wait_ms = Histogram(buckets=[1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, 5000])
+        self.batches = 0
+        self.failed_batches = 0
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        # 이벤트 루프가 바뀐 경우(스크립트에서 asyncio.run 반복 호출 등) 큐와 워커를 새로 만듦
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, item: T) -> R:
+        """
+        항목 하나를 큐에 넣고 배치 처리 결과를 기다립니다.
+
+        Args:
+            item (T): 처리할 항목
+
+        Returns:
+            R: 해당 항목의 처리 결과
+        """
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((item, future, time.monotonic()))
+        return await future
+
+    async def submit_many(self, items: Sequence[T]) -> List[R]:
+        """여러 항목을 제출하고 입력 순서대로 결과를 반환합니다."""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def _collect(self, queue: asyncio.Queue, batch: List[Tuple[T, asyncio.Future, float]]):
+        # 취소되더라도 이미 큐에서 꺼낸 항목을 _run이 정리할 수 있도록 전달받은 목록에 채움
+        batch.append(await queue.get())
+        deadline = batch[0][2] + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # 이미 큐에 쌓인 항목은 대기 없이 가져옴
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self, queue: asyncio.Queue):
+        batch: List[Tuple[T, asyncio.Future, float]] = []
+        try:
+            while True:
+                batch = []
+                await self._collect(queue, batch)
+                # 호출자가 이미 취소한 항목은 제외
+                batch = [entry for entry in batch if not entry[1].done()]
+                if not batch:
+                    continue
+
+                started = time.monotonic()
+                for _, _, enqueued_at in batch:
+                    self.queue_wait_ms.observe((started - enqueued_at) * 1000)
+                self.batch_sizes.observe(len(batch))
+                self.batches += 1
+
+                try:
+                    results = await self.process_batch([item for item, _, _ in batch])
+                    if len(results) != len(batch):
+                        raise RuntimeError(f"배치 결과 개수 불일치: {len(results)} != {len(batch)}")
+                    for (_, future, _), result in zip(batch, results):
+                        if not future.done():
+                            future.set_result(result)
+                except Exception as e:
+                    self.failed_batches += 1
+                    logger.error(f"[{self.name}] 배치 처리 실패 ({len(batch)}개): {str(e)}")
+                    for _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+        finally:
+            # 종료(취소) 시 모으는 중이거나 처리 중이던 배치의 호출자가 영원히 기다리지 않도록 취소
+            for _, future, _ in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def close(self):
+        """워커 종료 (처리 중이거나 대기 중인 호출자는 취소됨)"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """배치 크기/큐 대기 시간 히스토그램과 처리 현황 반환"""
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
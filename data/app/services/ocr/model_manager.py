@@ -0,0 +1,219 @@
+# app/services/ocr/model_manager.py
+"""
+로컬 OCR 모델 수명 주기 관리
+
+- 모델은 import 시점이 아니라 최초 사용 시 또는 시작 시 백그라운드에서 로드됩니다
+- 로드 직후 워밍업 배치를 실행해 첫 요청의 지연을 줄입니다
+- 준비 상태(unloaded/loading/warming/ready/failed)를 /health에 노출합니다
+- 일정 시간 사용되지 않은 모델은 메모리에서 내릴 수 있습니다
+- 로드에 실패하면 재시도 대기 시간(연속 실패마다 두 배, 최대 10배) 동안 다시 로드하지 않고 즉시 실패합니다
+"""
+from concurrent.futures import Executor
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import gc
+import logging
+import threading
+import time
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class ModelState(str, Enum):
+    UNLOADED = "unloaded"
+    LOADING = "loading"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ModelManager:
+    """
+    모델 하나의 지연 로드/워밍업/유휴 언로드를 담당
+    로드와 추론은 같은 executor에서 실행되어 직렬화됩니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        executor: Executor,
+        warmup: Optional[Callable[[Any], None]] = None,
+        idle_unload_seconds: int = 0,
+        retry_seconds: float = 60.0
+    ):
+        """
+        Args:
+            name (str): 모델 식별자 (로그/상태 표시용)
+            loader (Callable): 모델 객체를 생성하는 동기 함수
+            executor (Executor): 로드/추론을 실행할 작업 스레드
+            warmup (Optional[Callable]): 로드 직후 실행할 워밍업 함수
+            idle_unload_seconds (int): 마지막 사용 후 언로드까지의 시간(초), 0이면 언로드하지 않음
+            retry_seconds (float): 로드 실패 후 다시 로드하기까지의 기본 대기 시간(초)
+        """
+        self.name = name
+        self.loader = loader
+        self.executor = executor
+        self.warmup = warmup
+        self.idle_unload_seconds = idle_unload_seconds
+        self.retry_seconds = retry_seconds
+
+        self.state = ModelState.UNLOADED
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.last_used: Optional[float] = None
+        self.loads = 0
+        self.unloads = 0
+        self.failures = 0
+        self.failed_at: Optional[float] = None
+
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == ModelState.READY
+
+    def retry_in(self) -> float:
+        """로드 실패 후 다시 로드할 수 있을 때까지 남은 시간(초), 대기할 필요가 없으면 0"""
+        if self.state != ModelState.FAILED or self.failed_at is None:
+            return 0.0
+        cooldown = self.retry_seconds * min(10, 2 ** (self.failures - 1))
+        return max(0.0, cooldown - (time.time() - self.failed_at))
+
+    def _load(self) -> Any:
+        self.state = ModelState.LOADING
+        self.error = None
+        start = time.time()
+        try:
+            model = self.loader()
+            self.load_seconds = round(time.time() - start, 2)
+
+            if self.warmup is not None:
+                self.state = ModelState.WARMING
+                warm_start = time.time()
+                self.warmup(model)
+                self.warmup_seconds = round(time.time() - warm_start, 2)
+        except Exception as e:
+            self.state = ModelState.FAILED
+            self.error = str(e)
+            self.failures += 1
+            self.failed_at = time.time()
+            logger.error(f"[ModelManager] {self.name} 로드 실패 ({self.failures}회, {self.retry_in():.0f}초 후 재시도 가능): {str(e)}")
+            raise
+
+        self._model = model
+        self.loads += 1
+        self.failures = 0
+        self.failed_at = None
+        self.state = ModelState.READY
+        logger.info(
+            f"[ModelManager] {self.name} 준비 완료 "
+            f"(로드 {self.load_seconds}s, 워밍업 {self.warmup_seconds}s)"
+        )
+        return model
+
+    def get(self) -> Any:
+        """
+        모델 반환 (로드되지 않았다면 현재 스레드에서 로드)
+        작업 스레드에서 호출해야 합니다.
+        """
+        with self._lock:
+            if self._model is None:
+                retry_in = self.retry_in()
+                if retry_in > 0:
+                    # 실패 직후 요청마다 전체 로드를 반복하지 않도록 대기 시간 동안은 즉시 실패
+                    raise RuntimeError(f"{self.name} 모델 로드 실패 후 재시도 대기 중 ({retry_in:.0f}초 남음): {self.error}")
+                self._load()
+            self.last_used = time.time()
+            return self._model
+
+    def _ensure_loaded(self):
+        try:
+            with self._lock:
+                if self._model is None:
+                    self._load()
+        except Exception:
+            # 상태(FAILED)와 오류 메시지는 _load에서 기록됨
+            pass
+
+    def start_background_load(self):
+        """
+        작업 스레드에서 모델 로드/워밍업을 시작하고 즉시 반환합니다.
+        이미 로드 중이거나 준비된 경우, 로드 실패 후 재시도 대기 중인 경우에는 아무 것도 하지 않습니다.
+        """
+        if self.state in (ModelState.LOADING, ModelState.WARMING, ModelState.READY):
+            return
+        if self.retry_in() > 0:
+            return
+        self.state = ModelState.LOADING
+        self.executor.submit(self._ensure_loaded)
+
+    def unload(self):
+        """모델을 메모리에서 내림 (작업 스레드에서 호출)"""
+        with self._lock:
+            if self._model is None:
+                return
+            model = self._model
+            self._model = None
+            self.state = ModelState.UNLOADED
+            self.unloads += 1
+            release = getattr(model, "release", None)
+            if callable(release):
+                release()
+            del model
+        gc.collect()
+        logger.info(f"[ModelManager] {self.name} 유휴 언로드")
+
+    def _unload_if_idle(self):
+        if (
+            self.idle_unload_seconds > 0
+            and self._model is not None
+            and self.last_used is not None
+            and time.time() - self.last_used >= self.idle_unload_seconds
+        ):
+            self.unload()
+
+    async def _reap_idle(self):
+        interval = max(1.0, min(60.0, self.idle_unload_seconds / 2))
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            # 추론 중에 내려가지 않도록 같은 작업 스레드에서 검사
+            await loop.run_in_executor(self.executor, self._unload_if_idle)
+
+    def start_idle_reaper(self):
+        """유휴 언로드 감시 태스크 시작 (idle_unload_seconds가 0이면 무시)"""
+        if self.idle_unload_seconds <= 0:
+            return
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_idle())
+
+    async def stop_idle_reaper(self):
+        if self._reaper is not None and not self._reaper.done():
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+        self._reaper = None
+
+    def status(self) -> Dict[str, Any]:
+        """준비 상태 및 로드 지표"""
+        return {
+            "state": self.state.value,
+            "ready": self.is_ready,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "idle_seconds": round(time.time() - self.last_used, 1) if self.last_used else None,
+            "idle_unload_seconds": self.idle_unload_seconds,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "failures": self.failures,
+            "retry_in": round(self.retry_in(), 1) if self.state == ModelState.FAILED else None
+        }
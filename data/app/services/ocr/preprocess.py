@@ -0,0 +1,174 @@
+# app/services/ocr/preprocess.py
+"""
+OCR 전송 전 이미지 전처리
+
+캔버스 스냅샷은 대부분 빈 영역이고 인식에 필요한 것보다 해상도가 높습니다.
+엔진별 프로파일에 따라 다음을 수행해 업로드 크기와 추론 시간을 줄입니다.
+- 여백 자동 크롭
+- 줄 높이가 목표값이 되도록 축소 (확대는 하지 않음)
+- 그레이스케일 또는 이진화
+- PNG 재인코딩 (원본보다 커지면 원본 사용)
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from PIL import Image
+from app.core.config import settings
+from .base_ocr import BaseOCR, OCRResult, ImageBytes
+from .image_utils import decode_gray, ink_mask, bounding_box, crop, segment_lines
+import asyncio
+import io
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class PreprocessStats:
+    """전처리 누적 지표 (절감 바이트, 처리 시간)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.images = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, seconds: float, skipped: bool = False):
+        with self._lock:
+            self.images += 1
+            self.skipped += int(skipped)
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "images": self.images,
+                "skipped": self.skipped,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "size_ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                "avg_ms": round(self.seconds / self.images * 1000, 2) if self.images else None
+            }
+
+
+preprocess_stats = PreprocessStats()
+
+
+def get_preprocess_profile(engine: str) -> Optional[Dict[str, Any]]:
+    """
+    엔진별 전처리 프로파일 (OCR_PREPROCESS_PROFILES)
+
+    Returns:
+        Optional[Dict[str, Any]]: 프로파일, 해당 엔진에 전처리를 적용하지 않으면 None
+    """
+    profile = settings.OCR_PREPROCESS_PROFILES.get(engine)
+    if not profile or not profile.get("enabled", True):
+        return None
+    return profile
+
+
+def preprocess_image(image: ImageBytes, profile: Dict[str, Any]) -> bytes:
+    """
+    이미지 한 장 전처리
+
+    Args:
+        image (ImageBytes): 원본 이미지 바이트
+        profile (Dict[str, Any]): 전처리 프로파일
+            - autocrop (bool): 필기 영역 외 여백 제거
+            - margin (int): 크롭 후 남길 여백(px)
+            - target_line_height (int): 축소 목표 줄 높이(px), 0이면 축소하지 않음
+            - max_side (int): 긴 변 최대 길이(px), 0이면 제한 없음
+            - mode (str): 'gray' 또는 'binary'
+
+    Returns:
+        bytes: 전처리된 PNG 바이트 (빈 이미지거나 원본보다 커지면 원본)
+    """
+    threshold = settings.OCR_DELTA_INK_THRESHOLD
+    gray = decode_gray(image)
+    mask = ink_mask(gray, threshold)
+
+    if profile.get("autocrop", True):
+        box = bounding_box(mask, margin=profile.get("margin", 16))
+        if box is None:
+            return bytes(image)
+        gray = crop(gray, box)
+        mask = crop(mask, box)
+
+    scale = 1.0
+    target = profile.get("target_line_height", 0)
+    if target:
+        heights = [bottom - top for top, _, bottom, _ in segment_lines(
+            mask, min_gap=settings.OCR_LINE_MIN_GAP, min_height=settings.OCR_LINE_MIN_HEIGHT
+        )]
+        if heights:
+            scale = min(scale, target / float(np.median(heights)))
+    max_side = profile.get("max_side", 0)
+    if max_side:
+        scale = min(scale, max_side / float(max(gray.shape)))
+
+    img = Image.fromarray(gray)
+    if scale < 1.0:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        img = img.resize(size, Image.LANCZOS)
+
+    if profile.get("mode", "gray") == "binary":
+        img = img.point(lambda v: 255 if v >= threshold else 0).convert("1")
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", optimize=True)
+    output = buffer.getvalue()
+    return output if len(output) < len(image) else bytes(image)
+
+
+def _preprocess_batch(images: Sequence[ImageBytes], profile: Dict[str, Any]) -> List[ImageBytes]:
+    processed = []
+    for image in images:
+        start = time.time()
+        try:
+            output = preprocess_image(image, profile)
+        except Exception as e:
+            # 디코딩할 수 없는 이미지는 그대로 전달해 엔진이 오류를 보고하도록 함
+            logger.warning(f"이미지 전처리 실패, 원본 사용: {str(e)}")
+            preprocess_stats.record(len(image), len(image), time.time() - start, skipped=True)
+            processed.append(image)
+            continue
+        preprocess_stats.record(len(image), len(output), time.time() - start)
+        processed.append(output)
+    return processed
+
+
+class PreprocessingOCR(BaseOCR):
+    """
+    임의의 BaseOCR 엔진 앞에서 이미지를 전처리하는 래퍼
+    캐시 래퍼 안쪽에 두어 캐시 적중 시에는 전처리도 생략됩니다 (CachedOCR(PreprocessingOCR(engine))).
+    """
+
+    def __init__(self, engine: BaseOCR, profile: Dict[str, Any]):
+        self.engine = engine
+        self.profile = profile
+        self.name = engine.name
+
+    def cache_options(self) -> Dict[str, Any]:
+        options = dict(self.engine.cache_options())
+        options["preprocess"] = self.profile
+        return options
+
+    async def image_to_latex(self, image_path: str) -> OCRResult:
+        with open(image_path, "rb") as f:
+            image = f.read()
+        return await self.image_bytes_to_latex(image, os.path.basename(image_path))
+
+    async def image_bytes_to_latex(self, image: ImageBytes, filename: str = "image.png") -> OCRResult:
+        processed = (await asyncio.to_thread(_preprocess_batch, [image], self.profile))[0]
+        return await self.engine.image_bytes_to_latex(processed, filename)
+
+    async def batch_image_bytes_to_latex(self, images: Sequence[ImageBytes]) -> List[OCRResult]:
+        processed = await asyncio.to_thread(_preprocess_batch, list(images), self.profile)
+        return await self.engine.batch_image_bytes_to_latex(processed)
@@ -0,0 +1,230 @@
+# app/services/ocr/snapshot_delta.py
+"""
+스냅샷 델타 OCR
+
+각 단계 이미지는 노트 전체의 누적 스냅샷이므로 N번째 스냅샷은 1..N-1 단계를 모두 포함합니다.
+연속된 스냅샷을 NumPy 배열로 비교해 새로 추가된 필기 영역만 잘라 OCR하고,
+이전 단계의 LaTeX를 앞부분으로 재사용해 누적 LaTeX를 구성합니다.
+- 새 필기가 없으면 OCR을 생략하고 이전 결과를 그대로 사용합니다
+- 기존 필기가 지워졌거나 크기가 바뀐 경우, 변경 영역이 너무 큰 경우에는 전체 이미지를 OCR합니다
+- 새 필기가 기존 필기의 아래(새 줄)나 마지막 줄의 오른쪽(이어 쓰기)이 아니면, 즉 기존 줄 사이나 위에 끼워 쓴 경우에는
+  이어 붙인 LaTeX의 순서가 실제와 달라지므로 전체 이미지를 OCR합니다
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from .base_ocr import BaseOCR, OCRResult, ImageBytes
+from .image_utils import Box, decode_gray, encode_png, ink_mask, dilate, bounding_box, crop, box_area
+import asyncio
+import logging
+import numpy as np
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+class SnapshotPlan:
+    """
+    단계별 OCR 계획
+    mode: 'full'(전체 OCR), 'delta'(새 필기 영역만 OCR), 'unchanged'(OCR 생략)
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        ocr_image: Optional[ImageBytes] = None,
+        box: Optional[Box] = None,
+        new_line: bool = True,
+        reason: Optional[str] = None
+    ):
+        self.mode = mode
+        self.ocr_image = ocr_image
+        self.box = box
+        self.new_line = new_line
+        self.reason = reason
+
+
+def plan_delta(prev: np.ndarray, curr: np.ndarray, curr_image: ImageBytes) -> SnapshotPlan:
+    """
+    연속된 두 스냅샷을 비교해 OCR 계획 수립
+
+    Args:
+        prev (np.ndarray): 이전 단계 그레이스케일 스냅샷
+        curr (np.ndarray): 현재 단계 그레이스케일 스냅샷
+        curr_image (ImageBytes): 현재 단계 원본 이미지 (전체 OCR 시 사용)
+
+    Returns:
+        SnapshotPlan: 단계 OCR 계획
+    """
+    if prev.shape != curr.shape:
+        return SnapshotPlan("full", curr_image, reason="size_changed")
+
+    threshold = settings.OCR_DELTA_INK_THRESHOLD
+    prev_ink = ink_mask(prev, threshold)
+    curr_ink = ink_mask(curr, threshold)
+
+    # 렌더링 차이로 인한 1px 흔들림은 변경으로 보지 않음
+    erased = prev_ink & ~dilate(curr_ink, 1)
+    if erased.sum() > max(settings.OCR_DELTA_MIN_NEW_PIXELS, prev_ink.sum() * settings.OCR_DELTA_MAX_ERASED_RATIO):
+        return SnapshotPlan("full", curr_image, reason="erased")
+
+    new_ink = curr_ink & ~dilate(prev_ink, 1)
+    if new_ink.sum() < settings.OCR_DELTA_MIN_NEW_PIXELS:
+        return SnapshotPlan("unchanged", reason="no_new_ink")
+
+    box = bounding_box(new_ink, margin=settings.OCR_DELTA_MARGIN)
+    if box_area(box) > curr.size * settings.OCR_DELTA_MAX_AREA_RATIO:
+        return SnapshotPlan("full", curr_image, reason="large_change")
+
+    # 영역 안에 걸친 기존 필기는 지우고 새 필기만 남겨 OCR
+    isolated = np.where(dilate(new_ink, 2), curr, 255).astype(np.uint8)
+
+    # 새 필기가 기존 필기의 아래쪽에서 시작하면 새 줄, 마지막 줄의 오른쪽이면 같은 줄에 이어 쓴 것으로 판단
+    prev_box = bounding_box(prev_ink)
+    top, left, bottom, _ = bounding_box(new_ink)
+    new_line = prev_box is None or top >= prev_box[2] - (bottom - top) // 4
+    if not new_line:
+        slack = settings.OCR_DELTA_MARGIN
+        band = np.flatnonzero(prev_ink[top:bottom].any(axis=0))
+        ink_below = prev_ink[bottom + slack:].any()
+        if ink_below or (band.size and band[-1] >= left + slack):
+            # 기존 줄 사이/위나 줄 중간에 끼워 쓴 필기는 뒤에 이어 붙이면 순서가 틀어짐
+            return SnapshotPlan("full", curr_image, reason="inserted")
+
+    return SnapshotPlan("delta", encode_png(crop(isolated, box)), box=box, new_line=new_line)
+
+
+def plan_snapshots(images: Sequence[Optional[ImageBytes]]) -> List[Optional[SnapshotPlan]]:
+    """
+    단계별 OCR 계획 목록 (이미지가 없는 단계는 None)
+    디코딩할 수 없는 이미지는 전체 OCR로 넘겨 엔진이 오류를 보고하도록 합니다.
+    """
+    plans: List[Optional[SnapshotPlan]] = []
+    prev: Optional[np.ndarray] = None
+    for i, image in enumerate(images):
+        if image is None:
+            plans.append(None)
+            prev = None
+            continue
+
+        try:
+            curr = decode_gray(image)
+        except Exception as e:
+            logger.warning(f"단계 {i + 1} 스냅샷 디코딩 실패, 전체 OCR로 처리: {str(e)}")
+            plans.append(SnapshotPlan("full", image, reason="decode_failed"))
+            prev = None
+            continue
+
+        if prev is None:
+            plans.append(SnapshotPlan("full", image, reason="first"))
+        else:
+            plans.append(plan_delta(prev, curr, image))
+        prev = curr
+
+    return plans
+
+
+def join_snapshot_latex(prev_latex: str, new_latex: str, new_line: bool) -> str:
+    """이전 단계 LaTeX 뒤에 새 필기 LaTeX를 이어 붙여 누적 LaTeX 구성"""
+    if not prev_latex:
+        return new_latex
+    if not new_latex:
+        return prev_latex
+    # 여러 줄 결과(array 환경)는 마지막 행 안쪽에 이어 씀
+    separator = " " if not new_line else " \\\\ "
+    end = "\\end{array}"
+    if prev_latex.rstrip().endswith(end):
+        body = prev_latex.rstrip()[:-len(end)].rstrip()
+        return f"{body}{separator}{new_latex} {end}"
+    return f"{prev_latex}{separator}{new_latex}"
+
+
+def _compose(
+    plans: List[Optional[SnapshotPlan]],
+    recognized: Dict[int, OCRResult]
+) -> Tuple[Dict[int, OCRResult], List[int]]:
+    """
+    앞 단계부터 누적 LaTeX 구성
+    이전 단계 결과가 없어 접두어를 재사용할 수 없는 단계를 만나면 중단하고 전체 OCR 대상으로 반환합니다.
+    (해당 단계를 다시 OCR하면 이후 단계는 다시 델타 결과를 이어 붙일 수 있음)
+    """
+    composed: Dict[int, OCRResult] = {}
+    needs_full: List[int] = []
+
+    for i, plan in enumerate(plans):
+        if plan is None:
+            continue
+        result = recognized.get(i)
+
+        if plan.mode == "full":
+            if result is None:
+                # 전체 OCR 결과가 아직 없는 단계는 다시 OCR
+                needs_full.append(i)
+                break
+            metadata = dict(result.metadata)
+            metadata.update({"snapshot_mode": "full", "snapshot_reason": plan.reason})
+            composed[i] = OCRResult(result.latex, result.confidence, metadata, result.error)
+            continue
+
+        prev = composed.get(i - 1)
+        if prev is None or prev.error or (plan.mode == "delta" and (result is None or result.error)):
+            needs_full.append(i)
+            break
+
+        if plan.mode == "unchanged":
+            composed[i] = OCRResult(
+                latex=prev.latex,
+                confidence=prev.confidence,
+                metadata={"snapshot_mode": "unchanged", "snapshot_reason": plan.reason, "new_latex": ""}
+            )
+            continue
+
+        metadata = dict(result.metadata)
+        metadata.update({
+            "snapshot_mode": "delta",
+            "new_latex": result.latex,
+            "delta_box": list(plan.box),
+            "new_line": plan.new_line
+        })
+        composed[i] = OCRResult(
+            latex=join_snapshot_latex(prev.latex, result.latex, plan.new_line),
+            confidence=result.confidence,
+            metadata=metadata
+        )
+
+    return composed, needs_full
+
+
+async def recognize_snapshot_deltas(
+    ocr: BaseOCR,
+    images: Sequence[Optional[ImageBytes]]
+) -> Dict[int, OCRResult]:
+    """
+    누적 스냅샷 목록을 델타 방식으로 OCR
+
+    Args:
+        ocr (BaseOCR): 사용할 OCR 엔진
+        images (Sequence[Optional[ImageBytes]]): 단계별 스냅샷 이미지 (다운로드 실패 시 None)
+
+    Returns:
+        Dict[int, OCRResult]: 이미지가 있는 단계의 누적 LaTeX 결과
+            metadata['new_latex']에 해당 단계에서 새로 추가된 LaTeX가 담깁니다 (전체 OCR 단계 제외)
+    """
+    plans = await asyncio.to_thread(plan_snapshots, list(images))
+
+    jobs = [i for i, plan in enumerate(plans) if plan is not None and plan.ocr_image is not None]
+    results = await ocr.batch_image_bytes_to_latex([plans[i].ocr_image for i in jobs])
+    recognized = dict(zip(jobs, results))
+
+    modes = [plan.mode if plan else None for plan in plans]
+    logger.info(f"스냅샷 델타 OCR 계획: {modes}")
+
+    # 이전 단계 OCR 실패로 접두어를 쓸 수 없는 단계는 전체 이미지로 다시 OCR
+    while True:
+        composed, needs_full = _compose(plans, recognized)
+        if not needs_full:
+            return composed
+        logger.info(f"접두어 재사용 불가, 전체 OCR로 전환: {[i + 1 for i in needs_full]}단계")
+        for i in needs_full:
+            plans[i] = SnapshotPlan("full", images[i], reason="prefix_unavailable")
+        retried = await ocr.batch_image_bytes_to_latex([images[i] for i in needs_full])
+        recognized.update(zip(needs_full, retried))
@@ -1,62 +1,411 @@
-import torch
-from PIL import Image
-from transformers import AutoProcessor, VisionEncoderDecoderModel
-import requests
-
-# 모델 및 프로세서 초기화 (모듈 로드시 1회만 수행)
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = VisionEncoderDecoderModel.from_pretrained('hoang-quoc-trung/sumen-base').to(device)
-processor = AutoProcessor.from_pretrained('hoang-quoc-trung/sumen-base')
-task_prompt = processor.tokenizer.bos_token
-decoder_input_ids = processor.tokenizer(
-    task_prompt,
-    add_special_tokens=False,
-    return_tensors="pt"
-).input_ids.to(device)
-
-def predict_latex_from_images(image_paths):
-    """
-    주어진 이미지 경로 리스트에 대해 LaTeX 수식을 추론합니다.
+# app/services/ocr/sumen_base.py
+"""
+Sumen(hoang-quoc-trung/sumen-base) 기반 로컬 수식 OCR 엔진
 
-    Args:
-        image_paths (List[str]): 추론할 이미지 경로 리스트
+- 여러 이미지를 하나의 텐서로 묶어 model.generate를 한 번만 호출합니다 (배치 추론)
+- 추론은 전용 작업 스레드에서 실행되어 이벤트 루프를 막지 않습니다
+- 동시 요청의 이미지는 마이크로 배처에서 합쳐져 하나의 배치로 추론됩니다
+- 모델은 import 시점이 아니라 ModelManager를 통해 지연/백그라운드 로드됩니다
+- torch / transformers / Pillow는 선택 의존성입니다 (requirements-ocr.txt)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.exceptions import OCRError
+from .base_ocr import BaseOCR, OCRResult, ImageBytes
+from .micro_batcher import MicroBatcher
+from .model_manager import ModelManager
+import asyncio
+import io
+import logging
+import math
+import os
+import time
 
-    Returns:
-        List[str]: 각 이미지에 대한 LaTeX 예측 결과 리스트
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 모델 추론 전용 스레드 (모델은 한 번에 하나의 배치만 처리하도록 직렬화)
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sumen-ocr")
+_batcher: Optional[MicroBatcher] = None
+
+
+class SumenModel:
     """
-    # stream=True : 이미지를 한줄씩 처리
-    # .raw 저수준 바이트 스트림 객체
-    images = [Image.open(requests.get(image, stream=True).raw).convert('RGB') for image in image_paths]
-    pixel_values = [
-        processor.image_processor(
-            image,
-            return_tensors="pt",
-            data_format="channels_first"
-        ).pixel_values.to(device)
-        for image in images
-    ]
-
-    results = []
-    with torch.no_grad():
-        for pixel_value in pixel_values:
-            outputs = model.generate(
-                pixel_value,
-                decoder_input_ids=decoder_input_ids,
-                max_length=model.decoder.config.max_length,
-                pad_token_id=processor.tokenizer.pad_token_id,
-                eos_token_id=processor.tokenizer.eos_token_id,
+    Sumen 모델/프로세서 묶음과 동기 배치 추론
+    반드시 작업 스레드에서 호출해야 합니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "auto",
+        profile: str = "fp32",
+        num_threads: int = 0
+    ):
+        """
+        Args:
+            model_name (str): HuggingFace 모델 이름 또는 로컬 경로
+            device (str): 'auto', 'cpu', 'cuda' 중 하나
+            profile (str): 추론 프로파일 ('fp32', 'int8', 'onnx')
+                - int8: 디코더 Linear 계층 동적 int8 양자화 (CPU 전용)
+                - onnx: ONNX Runtime으로 내보낸 모델 사용 (CPU 전용, optimum[onnxruntime] 필요)
+            num_threads (int): 연산자 내부(intra-op) 스레드 수, 0이면 라이브러리 기본값
+        """
+        try:
+            import torch
+            from transformers import AutoProcessor, VisionEncoderDecoderModel
+        except ImportError as e:
+            raise OCRError(
+                "로컬 OCR 엔진에 필요한 패키지가 설치되지 않았습니다 (requirements-ocr.txt 참고)",
+                detail={"missing": str(e)}
+            )
+
+        start = time.time()
+        self.torch = torch
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        if profile in ("int8", "onnx") and device != "cpu":
+            logger.warning(f"[SumenOCR] {profile} 프로파일은 CPU 전용입니다. {device}에서는 fp32로 실행합니다")
+            profile = "fp32"
+
+        self.device = torch.device(device)
+        self.model_name = model_name
+        self.profile = profile
+        self.processor = AutoProcessor.from_pretrained(model_name)
+        self.tokenizer = self.processor.tokenizer
+
+        if profile == "onnx":
+            self.model = self._load_onnx(model_name, num_threads)
+        else:
+            self.model = VisionEncoderDecoderModel.from_pretrained(model_name).to(self.device)
+            self.model.eval()
+            if profile == "int8":
+                # 자기회귀 디코딩 시간의 대부분을 차지하는 디코더 Linear 계층만 양자화
+                self.model.decoder = torch.quantization.quantize_dynamic(
+                    self.model.decoder, {torch.nn.Linear}, dtype=torch.qint8
+                )
+        self.max_length = self.model.config.decoder.max_length
+
+        self.decoder_input_ids = self.tokenizer(
+            self.tokenizer.bos_token,
+            add_special_tokens=False,
+            return_tensors="pt"
+        ).input_ids.to(self.device)
+        logger.info(
+            f"[SumenOCR] 모델 로드 완료: {model_name} "
+            f"({self.device}, {profile}, threads={torch.get_num_threads()}, {time.time() - start:.1f}s)"
+        )
+
+    def _load_onnx(self, model_name: str, num_threads: int):
+        """ONNX Runtime 모델 로드 (내보낸 모델이 없으면 최초 1회 변환 후 저장)"""
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForVision2Seq
+        except ImportError as e:
+            raise OCRError(
+                "ONNX 프로파일에 필요한 패키지가 설치되지 않았습니다 (optimum[onnxruntime])",
+                detail={"missing": str(e)}
+            )
+
+        session_options = onnxruntime.SessionOptions()
+        if num_threads > 0:
+            session_options.intra_op_num_threads = num_threads
+
+        export_dir = settings.SUMEN_ONNX_DIR
+        if os.path.isdir(export_dir) and os.listdir(export_dir):
+            return ORTModelForVision2Seq.from_pretrained(export_dir, session_options=session_options)
+
+        logger.info(f"[SumenOCR] ONNX 모델 변환 중: {model_name} -> {export_dir}")
+        model = ORTModelForVision2Seq.from_pretrained(model_name, export=True, session_options=session_options)
+        model.save_pretrained(export_dir)
+        return model
+
+    def _clean(self, sequence: str) -> str:
+        for token in (self.tokenizer.eos_token, self.tokenizer.pad_token, self.tokenizer.bos_token):
+            if token:
+                sequence = sequence.replace(token, "")
+        return sequence.strip()
+
+    def _length_cap(self, width: int) -> int:
+        """이미지 너비에 비례한 최대 생성 길이 (짧은 한 줄 수식에서 불필요한 디코딩 방지)"""
+        cap = settings.SUMEN_MIN_LENGTH_CAP + int(width * settings.SUMEN_TOKENS_PER_PIXEL)
+        return max(1, min(self.max_length, cap))
+
+    def _run_generate(self, pixel_values, num_beams: int, max_length: int) -> Tuple[List[str], List[float], List[bool]]:
+        """
+        generate 한 번 실행 후 시퀀스 신뢰도 계산
+
+        Returns:
+            Tuple: (LaTeX 목록, 신뢰도 목록, EOS로 끝났는지 여부 목록)
+            신뢰도는 생성 토큰 로그 확률 평균의 exp (토큰당 기하평균 확률)
+        """
+        with self.torch.inference_mode():
+            outputs = self.model.generate(
+                pixel_values,
+                decoder_input_ids=self.decoder_input_ids.expand(pixel_values.shape[0], -1),
+                max_length=max_length,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id,
                 use_cache=True,
-                num_beams=4,
-                bad_words_ids=[[processor.tokenizer.unk_token_id]],
+                num_beams=num_beams,
+                bad_words_ids=[[self.tokenizer.unk_token_id]],
+                output_scores=True,
                 return_dict_in_generate=True
             )
-            sequence = processor.tokenizer.batch_decode(outputs.sequences)[0]
-            cleaned = sequence.replace(
-                processor.tokenizer.eos_token, ""
-            ).replace(
-                processor.tokenizer.pad_token, ""
-            ).replace(
-                processor.tokenizer.bos_token, ""
+
+            sequences = outputs.sequences
+            generated = sequences[:, self.decoder_input_ids.shape[1]:]
+            is_eos = generated == self.tokenizer.eos_token_id
+            finished = is_eos.any(dim=1).tolist()
+
+            if num_beams > 1:
+                # 빔 서치 점수는 이미 길이로 정규화된 로그 확률
+                log_probs = outputs.sequences_scores.tolist()
+            else:
+                scores = self.model.compute_transition_scores(sequences, outputs.scores, normalize_logits=True)
+                # 첫 EOS 이후(패딩) 위치는 제외
+                after_eos = (is_eos.long().cumsum(dim=1) - is_eos.long()) > 0
+                scores = scores.masked_fill(after_eos, 0.0)
+                lengths = (~after_eos).sum(dim=1).clamp(min=1)
+                log_probs = (scores.sum(dim=1) / lengths).tolist()
+
+        texts = [self._clean(s) for s in self.tokenizer.batch_decode(sequences)]
+        confidences = [round(math.exp(lp), 4) for lp in log_probs]
+        return texts, confidences, finished
+
+    def generate(self, images: List[Any], decoding: Optional[str] = None) -> List[Tuple[str, float, str]]:
+        """
+        PIL 이미지 목록을 배치 단위로 LaTeX로 변환합니다.
+        이미지 프로세서가 모든 이미지를 인코더 입력 크기로 리사이즈/패딩하므로 하나의 배치 텐서로 쌓입니다.
+
+        decoding='adaptive'이면 이미지 너비로 길이를 제한한 greedy 디코딩을 먼저 수행하고,
+        신뢰도가 임계값 미만이거나 길이 제한에 걸린 이미지만 빔 서치로 다시 디코딩합니다.
+
+        Args:
+            images (List[PIL.Image.Image]): RGB 이미지 목록
+            decoding (Optional[str]): 'adaptive' 또는 'beam' (None이면 설정값)
+
+        Returns:
+            List[Tuple[str, float, str]]: 이미지별 (LaTeX, 신뢰도, 사용한 디코딩 방식)
+        """
+        decoding = decoding or settings.SUMEN_DECODING
+        pixel_values = self.processor.image_processor(
+            images,
+            return_tensors="pt",
+            data_format="channels_first"
+        ).pixel_values.to(self.device)
+
+        if decoding != "adaptive":
+            texts, confidences, _ = self._run_generate(pixel_values, settings.SUMEN_NUM_BEAMS, self.max_length)
+            return [(t, c, "beam") for t, c in zip(texts, confidences)]
+
+        cap = max(self._length_cap(image.width) for image in images)
+        texts, confidences, finished = self._run_generate(pixel_values, 1, cap)
+        results = [(t, c, "greedy") for t, c in zip(texts, confidences)]
+
+        retry = [
+            i for i in range(len(images))
+            if confidences[i] < settings.SUMEN_CONFIDENCE_THRESHOLD or not finished[i]
+        ]
+        if retry:
+            index = self.torch.tensor(retry, device=pixel_values.device)
+            beam_texts, beam_confidences, _ = self._run_generate(
+                pixel_values.index_select(0, index), settings.SUMEN_NUM_BEAMS, self.max_length
+            )
+            for i, text, confidence in zip(retry, beam_texts, beam_confidences):
+                results[i] = (text, confidence, "beam")
+            logger.info(f"[SumenOCR] 저신뢰도 재디코딩: {len(retry)}/{len(images)}개")
+
+        return results
+
+    def release(self):
+        """언로드 시 GPU 캐시 반환"""
+        if self.device.type == "cuda":
+            self.torch.cuda.empty_cache()
+
+
+def _load_model() -> SumenModel:
+    return SumenModel(
+        settings.SUMEN_MODEL_NAME,
+        settings.SUMEN_DEVICE,
+        profile=settings.SUMEN_PROFILE,
+        num_threads=settings.SUMEN_NUM_THREADS
+    )
+
+
+def _warmup_model(model: SumenModel):
+    """빈 이미지 배치로 한 번 추론해 커널/메모리 할당을 미리 수행"""
+    from PIL import Image
+
+    size = max(1, min(2, settings.SUMEN_MAX_BATCH_SIZE))
+    model.generate([Image.new("RGB", (384, 96), "white") for _ in range(size)])
+
+
+sumen_model_manager = ModelManager(
+    name="sumen",
+    loader=_load_model,
+    executor=_executor,
+    warmup=_warmup_model if settings.SUMEN_WARMUP else None,
+    idle_unload_seconds=settings.SUMEN_IDLE_UNLOAD_SECONDS,
+    retry_seconds=settings.SUMEN_LOAD_RETRY_SECONDS
+)
+
+
+def get_sumen_model() -> SumenModel:
+    """프로세스 전역 Sumen 모델 반환 (로드되지 않았다면 로드, 작업 스레드에서 호출)"""
+    return sumen_model_manager.get()
+
+
+def _decode_image(image: ImageBytes):
+    from PIL import Image
+
+    return Image.open(io.BytesIO(image)).convert("RGB")
+
+
+def _run_batch(images: Sequence[ImageBytes]) -> List[OCRResult]:
+    """작업 스레드에서 실행: 이미지 디코딩 후 배치 크기 단위로 generate 호출"""
+    model = get_sumen_model()
+    results: List[Optional[OCRResult]] = [None] * len(images)
+
+    # 디코딩에 실패한 이미지는 해당 항목만 오류 처리
+    decoded = []
+    for i, image in enumerate(images):
+        try:
+            decoded.append((i, _decode_image(image)))
+        except Exception as e:
+            results[i] = OCRResult(latex="", confidence=0.0, error=f"이미지 디코딩 실패: {str(e)}")
+
+    batch_size = max(1, settings.SUMEN_MAX_BATCH_SIZE)
+    for start in range(0, len(decoded), batch_size):
+        chunk = decoded[start:start + batch_size]
+        began = time.time()
+        decoded_chunk = model.generate([image for _, image in chunk])
+        elapsed = time.time() - began
+        logger.info(f"[SumenOCR] 배치 추론 완료: {len(chunk)}개, {elapsed:.2f}s")
+        for (i, _), (latex, confidence, decoding) in zip(chunk, decoded_chunk):
+            results[i] = OCRResult(
+                latex=latex,
+                confidence=confidence,
+                metadata={
+                    "model": model.model_name,
+                    "profile": model.profile,
+                    "decoding": decoding,
+                    "batch_size": len(chunk)
+                }
             )
-            results.append(cleaned)
+
     return results
+
+
+async def _process_batch(images: List[ImageBytes]) -> List[OCRResult]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _run_batch, images)
+
+
+def get_sumen_batcher() -> MicroBatcher:
+    """프로세스 전역 마이크로 배처 반환 (모든 요청이 같은 큐를 공유)"""
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher(
+            _process_batch,
+            max_batch_size=settings.SUMEN_MAX_BATCH_SIZE,
+            max_wait_ms=settings.SUMEN_BATCH_MAX_WAIT_MS,
+            name="sumen"
+        )
+    return _batcher
+
+
+def sumen_batcher_stats() -> Optional[Dict[str, Any]]:
+    """마이크로 배처 지표 (아직 사용되지 않았다면 None)"""
+    return _batcher.stats() if _batcher is not None else None
+
+
+async def startup_sumen():
+    """
+    시작 시 호출: 로컬 모델을 백그라운드에서 로드/워밍업하고 유휴 언로드 감시를 시작합니다.
+    로드가 끝날 때까지 기다리지 않으므로 외부 OCR 트래픽은 즉시 처리할 수 있습니다.
+    """
+    uses_sumen = settings.OCR_BACKEND == "sumen" or (
+        settings.OCR_BACKEND == "hedged" and "sumen" in (settings.OCR_HEDGE_PRIMARY, settings.OCR_HEDGE_SECONDARY)
+    )
+    if settings.SUMEN_PRELOAD or uses_sumen:
+        sumen_model_manager.start_background_load()
+    sumen_model_manager.start_idle_reaper()
+
+
+async def shutdown_sumen():
+    """마이크로 배처 워커 및 유휴 언로드 감시 종료"""
+    await sumen_model_manager.stop_idle_reaper()
+    if _batcher is not None:
+        await _batcher.close()
+
+
+class SumenOCR(BaseOCR):
+    """
+    로컬 Sumen 모델을 사용하는 OCR 엔진
+    외부 API 호출 없이 CPU/GPU에서 추론하므로 대량 트래픽 처리에 사용합니다.
+    """
+    name = "sumen"
+
+    def cache_options(self) -> Dict[str, Any]:
+        return {
+            "model": settings.SUMEN_MODEL_NAME,
+            "num_beams": settings.SUMEN_NUM_BEAMS,
+            "profile": settings.SUMEN_PROFILE,
+            "decoding": settings.SUMEN_DECODING,
+            "confidence_threshold": settings.SUMEN_CONFIDENCE_THRESHOLD
+        }
+
+    async def image_to_latex(self, image_path: str) -> OCRResult:
+        with open(image_path, "rb") as f:
+            image = f.read()
+        return await self.image_bytes_to_latex(image, os.path.basename(image_path))
+
+    async def image_bytes_to_latex(self, image: ImageBytes, filename: str = "image.png") -> OCRResult:
+        result = (await self.batch_image_bytes_to_latex([image]))[0]
+        if result.error:
+            raise OCRError(message=f"[SumenOCR] {result.error}")
+        return result
+
+    async def batch_image_bytes_to_latex(self, images: Sequence[ImageBytes]) -> List[OCRResult]:
+        if not images:
+            return []
+        # 이미지 단위로 제출하면 다른 요청의 이미지와 같은 배치로 묶일 수 있음
+        batcher = get_sumen_batcher()
+        outcomes = await asyncio.gather(
+            *(batcher.submit(image) for image in images),
+            return_exceptions=True
+        )
+
+        results = []
+        for outcome in outcomes:
+            if isinstance(outcome, OCRError):
+                raise outcome
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                error_msg = f"[SumenOCR] 배치 추론 실패: {str(outcome)}"
+                logger.error(error_msg)
+                outcome = OCRResult(latex="", confidence=0.0, error=error_msg)
+            results.append(outcome)
+        return results
+
+
+def predict_latex_from_images(image_paths: List[str]) -> List[str]:
+    """
+    (호환용) 이미지 경로 리스트에 대해 LaTeX 수식을 동기 방식으로 추론합니다.
+
+    Args:
+        image_paths (List[str]): 추론할 이미지 경로 리스트
+
+    Returns:
+        List[str]: 각 이미지에 대한 LaTeX 예측 결과 리스트
+    """
+    images = []
+    for path in image_paths:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    return [r.latex for r in _run_batch(images)]
@@ -0,0 +1,466 @@
+# app/services/problem_repository.py
+"""
+문제 데이터 저장소
+
+- SQLite 카탈로그(scripts/convert_problems_to_db.py로 생성)가 있으면 읽기 전용으로 지연 연결하여
+  요청한 문제의 필요한 필드만 읽습니다. 문제 수가 늘어도 시작 시간과 메모리 사용량이 일정합니다.
+- 카탈로그가 없으면 csvjson.json(문제 목록)과 problems_db.json(문제 정의)을 프로세스당 한 번 로드하여
+  숫자 id / problemNo 해시 인덱스와 정렬된 problemNo 목록(접두사 검색)을 만들어 둡니다.
+어느 쪽이든 요청마다 파일을 다시 읽거나 전체 목록을 선형 탐색하지 않습니다.
+
+파일 변경(새 교재 파일, 카탈로그 교체)은 감시 태스크가 감지하여 백그라운드에서 새 인덱스를 만든 뒤
+원자적으로 교체하고, 내용이 바뀐 문제만 등록된 무효화 리스너(임베딩, 피드백 캐시)에 알립니다.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from app.core.config import settings
+import asyncio
+import bisect
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# SQLite 카탈로그 컬럼 ↔ 문제 필드 (scripts/convert_problems_to_db.py와 동일)
+CATALOG_COLUMNS = {
+    "problemNo": "problem_no",
+    "id": "id",
+    "categoryId": "category_id",
+    "bookId": "book_id",
+    "innerNo": "inner_no",
+    "type": "type",
+    "content": "content",
+    "answer": "answer",
+    "explanation": "explanation",
+    "description": "description",
+    "solution_steps": "solution_steps",
+}
+
+# JSON 문자열로 저장된 컬럼
+JSON_COLUMNS = {"solution_steps"}
+
+# 필드를 지정하지 않은 조회에서 읽는 필드
+DEFAULT_FIELDS = ("id", "problemNo", "innerNo", "type", "content", "answer", "explanation", "description", "solution_steps")
+
+
+# 변경 감지에 사용하는 필드 (이 값이 바뀐 문제만 무효화)
+FINGERPRINT_FIELDS = ("content", "answer", "explanation", "description", "solution_steps")
+
+# 재로드 후 이전 SQLite 카탈로그 연결을 닫기까지의 대기 시간(초)
+CATALOG_CLOSE_DELAY_SECONDS = 5.0
+
+Fingerprints = Dict[str, Tuple[Optional[str], str]]
+
+
+def _fingerprint(problem: Dict[str, Any]) -> str:
+    payload = json.dumps([problem.get(field) for field in FINGERPRINT_FIELDS], ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _project(problem: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    if not fields:
+        return problem
+    return {field: problem[field] for field in fields if field in problem}
+
+
+class ProblemIndex:
+    """
+    JSON 파일로 만든 메모리 인덱스 (한 번 만들어지면 변경되지 않으며, 재로드 시 통째로 교체)
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], definitions: Dict[str, Dict[str, Any]]):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_no: Dict[str, Dict[str, Any]] = {}
+
+        for row in rows:
+            problem_id = str(row.get("id", "")).strip()
+            problem_no = str(row.get("problemNo", "")).strip()
+            if problem_id:
+                self.by_id.setdefault(problem_id, row)
+            if problem_no:
+                self.by_no.setdefault(problem_no, row)
+
+        # 문제 정의는 problemNo 기준으로 병합 (csvjson에 없는 문제는 그대로 추가)
+        # 숫자 id 조회도 병합된 문제를 보도록 by_id를 함께 교체 (csvjson 행에는 description, solution_steps가 없음)
+        for key, definition in definitions.items():
+            problem_no = str(definition.get("problemNo") or key).strip()
+            row = self.by_no.get(problem_no)
+            if row is None:
+                self.by_no[problem_no] = definition
+                continue
+            merged = {**definition, **row}
+            self.by_no[problem_no] = merged
+            problem_id = str(row.get("id", "")).strip()
+            if problem_id and self.by_id.get(problem_id) is row:
+                self.by_id[problem_id] = merged
+
+        self.sorted_nos: List[str] = sorted(self.by_no)
+
+    def get(self, problem_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        problem = self.by_id.get(problem_id) or self.by_no.get(problem_id)
+        return _project(problem, fields) if problem else None
+
+    def find_by_prefix(self, prefix: str, limit: int = 0, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        start = bisect.bisect_left(self.sorted_nos, prefix)
+        found = []
+        for problem_no in self.sorted_nos[start:]:
+            if not problem_no.startswith(prefix):
+                break
+            found.append(_project(self.by_no[problem_no], fields))
+            if limit and len(found) >= limit:
+                break
+        return found
+
+    def find_containing(self, text: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        problem_no = next((no for no in self.sorted_nos if text in no), None)
+        return _project(self.by_no[problem_no], fields) if problem_no else None
+
+    def all(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        return [_project(self.by_no[problem_no], fields) for problem_no in self.sorted_nos]
+
+    def fingerprints(self) -> Fingerprints:
+        """problemNo → (id, 내용 해시)"""
+        return {
+            problem_no: (str(problem["id"]) if problem.get("id") is not None else None, _fingerprint(problem))
+            for problem_no, problem in self.by_no.items()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "json", "by_id": len(self.by_id), "by_no": len(self.by_no)}
+
+
+class SqliteProblemCatalog:
+    """
+    SQLite 카탈로그 (읽기 전용, 스레드별 연결, 페이지는 OS 캐시/메모리 매핑으로 공유)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        # close()에서 닫을 수 있도록 모든 스레드의 연결을 추적
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            with self._connections_lock:
+                if not self._closed:
+                    self._connections.append(conn)
+                    self._local.conn = conn
+        return conn
+
+    def _query(self, sql: str, params: Sequence[Any]) -> List[Tuple]:
+        if self._closed:
+            # 닫힌 뒤에도 이전 카탈로그를 잡고 있는 요청은 일회용 연결로 처리
+            conn = self._connect()
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+        return self._conn().execute(sql, params).fetchall()
+
+    def close(self):
+        """모든 스레드의 연결 닫기 (교체된 이전 데이터베이스 파일이 해제되도록)"""
+        with self._connections_lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"문제 카탈로그 연결 종료 실패: {str(e)}")
+
+    @staticmethod
+    def _columns(fields: Optional[Sequence[str]]) -> List[str]:
+        return [field for field in (fields or DEFAULT_FIELDS) if field in CATALOG_COLUMNS]
+
+    def _select(self, fields: Optional[Sequence[str]], where: str, params: Sequence[Any], limit: int = 0) -> List[Dict[str, Any]]:
+        names = self._columns(fields)
+        columns = ", ".join(CATALOG_COLUMNS[name] for name in names)
+        sql = f"SELECT {columns} FROM problems WHERE {where} ORDER BY problem_no"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        rows = self._query(sql, params)
+        return [
+            {
+                name: json.loads(value) if name in JSON_COLUMNS else value
+                for name, value in zip(names, row) if value is not None
+            }
+            for row in rows
+        ]
+
+    def get(self, problem_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        found = self._select(fields, "id = ?", (problem_id,), limit=1) or \
+            self._select(fields, "problem_no = ?", (problem_id,), limit=1)
+        return found[0] if found else None
+
+    def find_by_prefix(self, prefix: str, limit: int = 0, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        # 기본 키 범위 검색 (LIKE는 인덱스를 타지 않으므로 사용하지 않음)
+        return self._select(fields, "problem_no >= ? AND problem_no < ?", (prefix, prefix + "\U0010ffff"), limit)
+
+    def find_containing(self, text: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        found = self._select(fields, "instr(problem_no, ?) > 0", (text,), limit=1)
+        return found[0] if found else None
+
+    def all(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        return self._select(fields, "1 = 1", ())
+
+    def fingerprints(self) -> Fingerprints:
+        """problemNo → (id, 내용 해시) (재로드 시 백그라운드 스레드에서만 호출)"""
+        fields = ("problemNo", "id") + FINGERPRINT_FIELDS
+        return {
+            problem["problemNo"]: (problem.get("id"), _fingerprint(problem))
+            for problem in self._select(fields, "1 = 1", ())
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        count = self._query("SELECT COUNT(*) FROM problems", ())[0][0]
+        return {"backend": "sqlite", "path": self.path, "problems": count}
+
+
+def _read_json(path: str, default: Any) -> Any:
+    if not os.path.exists(path):
+        logger.warning(f"문제 데이터 파일을 찾을 수 없습니다: {path}")
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"문제 데이터 로드 실패 ({path}): {str(e)}")
+        return default
+
+
+def _rows(data: Any) -> List[Dict[str, Any]]:
+    """문제 리스트, csvjson 형식, problemNo → 문제 사전 모두 행 목록으로 변환"""
+    items = data.values() if isinstance(data, dict) else data
+    return [item.get("row_to_json", item) for item in items if isinstance(item, dict)]
+
+
+def changed_problem_ids(old: Fingerprints, new: Fingerprints) -> Set[str]:
+    """추가/삭제/수정된 문제의 problemNo와 숫자 id"""
+    changed: Set[str] = set()
+    for problem_no in old.keys() | new.keys():
+        before, after = old.get(problem_no), new.get(problem_no)
+        if before == after:
+            continue
+        changed.add(problem_no)
+        for entry in (before, after):
+            if entry and entry[0]:
+                changed.add(entry[0])
+    return changed
+
+
+class ProblemRepository:
+    """
+    문제 조회 진입점 (프로세스 전역 싱글턴 `problem_repository` 사용)
+    """
+
+    def __init__(self, data_path: str, db_path: str, catalog_path: str = "", extra_globs: Sequence[str] = ()):
+        self.data_path = data_path
+        self.db_path = db_path
+        self.catalog_path = catalog_path
+        self.extra_globs = list(extra_globs)
+        self._index = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._reload_lock: Optional[asyncio.Lock] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        self.last_reload: Optional[Dict[str, Any]] = None
+
+    def _use_catalog(self) -> bool:
+        return bool(self.catalog_path) and os.path.exists(self.catalog_path)
+
+    def _extra_paths(self) -> List[str]:
+        base = {os.path.abspath(self.data_path), os.path.abspath(self.db_path)}
+        return sorted({
+            path for pattern in self.extra_globs for path in glob.glob(pattern)
+            if os.path.abspath(path) not in base
+        })
+
+    def _watched_paths(self) -> List[str]:
+        if self._use_catalog():
+            return [self.catalog_path]
+        return [self.data_path, self.db_path, *self._extra_paths()]
+
+    def signature(self) -> Tuple:
+        """감시 대상 파일 목록과 각 파일의 수정 시각/크기 (바뀌면 재로드)"""
+        entries = []
+        for path in self._watched_paths():
+            try:
+                stat = os.stat(path)
+                entries.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                entries.append((path, None, None))
+        return tuple(entries)
+
+    def _build(self):
+        """파일을 읽어 새 저장소 생성 (SQLite 카탈로그는 연결만 준비, JSON은 읽어서 인덱싱)"""
+        if self._use_catalog():
+            logger.info(f"문제 카탈로그 사용: {self.catalog_path}")
+            return SqliteProblemCatalog(self.catalog_path)
+
+        rows = _rows(_read_json(self.data_path, []))
+        for path in self._extra_paths():
+            rows.extend(_rows(_read_json(path, [])))
+        definitions = _read_json(self.db_path, {})
+        index = ProblemIndex(rows, definitions)
+        logger.info(f"문제 데이터 인덱싱 완료: id {len(index.by_id)}개, problemNo {len(index.by_no)}개")
+        return index
+
+    def load(self):
+        """
+        저장소를 열고 교체 (읽는 쪽은 잠금 없이 이전/새 저장소 중 하나를 봄)
+        """
+        signature = self.signature()
+        index = self._build()
+        self._index = index
+        self._signature = signature
+        return index
+
+    def add_invalidation_listener(self, listener: Callable[[Set[str]], None]):
+        """재로드로 내용이 바뀐 문제 ID(problemNo, 숫자 id) 집합을 받을 콜백 등록"""
+        self._listeners.append(listener)
+
+    async def reload(self, force: bool = False) -> Dict[str, Any]:
+        """
+        파일이 바뀌었으면(force면 항상) 백그라운드 스레드에서 새 인덱스를 만들어 원자적으로 교체
+
+        Returns:
+            Dict[str, Any]: 재로드 결과 (reloaded, duration_ms, changed 등)
+        """
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+
+        async with self._reload_lock:
+            signature = await asyncio.to_thread(self.signature)
+            if not force and signature == self._signature:
+                return {"reloaded": False, "reason": "unchanged"}
+
+            start = time.perf_counter()
+            old = self._index
+            new = await asyncio.to_thread(self._build)
+            old_fingerprints = await asyncio.to_thread(old.fingerprints) if old is not None else {}
+            new_fingerprints = await asyncio.to_thread(new.fingerprints)
+            changed = changed_problem_ids(old_fingerprints, new_fingerprints)
+
+            # 참조 교체는 원자적 (진행 중인 요청은 이전 인덱스로 끝까지 처리)
+            self._index = new
+            self._signature = signature
+            # 이전 SQLite 카탈로그의 연결은 진행 중인 요청이 끝날 시간을 두고 닫음
+            if isinstance(old, SqliteProblemCatalog):
+                asyncio.get_running_loop().call_later(CATALOG_CLOSE_DELAY_SECONDS, old.close)
+
+            for listener in self._listeners:
+                try:
+                    listener(changed)
+                except Exception as e:
+                    logger.error(f"문제 데이터 무효화 리스너 오류: {str(e)}")
+
+            duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            self.last_reload = {
+                "reloaded": True,
+                "at": time.time(),
+                "duration_ms": duration_ms,
+                "problems": len(new_fingerprints),
+                "changed": len(changed),
+                **new.stats()
+            }
+            logger.info(f"문제 데이터 재로드 완료 ({duration_ms}ms, 변경 {len(changed)}개)")
+            return self.last_reload
+
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"문제 데이터 재로드 실패: {str(e)}")
+
+    def start_watcher(self, interval: float):
+        """파일 변경 감시 태스크 시작 (interval이 0 이하이면 시작하지 않음)"""
+        if interval <= 0 or (self._watcher and not self._watcher.done()):
+            return
+        self._watcher = asyncio.create_task(self._watch(interval))
+
+    async def stop_watcher(self):
+        if self._watcher:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    @property
+    def index(self):
+        index = self._index
+        if index is None:
+            with self._lock:
+                index = self._index or self.load()
+        return index
+
+    def get(self, problem_id: Any, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """숫자 id 또는 problemNo로 문제 조회 (fields를 지정하면 해당 필드만 반환)"""
+        if problem_id is None:
+            return None
+        return self.index.get(str(problem_id).strip(), fields)
+
+    def find_by_prefix(self, prefix: str, limit: int = 0, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """problemNo 접두사로 문제 목록 조회 (problemNo 순)"""
+        return self.index.find_by_prefix(prefix, limit, fields)
+
+    def all(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """전체 문제 목록 (problemNo 순, 인덱스 구축 등 백그라운드 작업용)"""
+        return self.index.all(fields)
+
+    def resolve(self, problem_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        정확히 일치하는 문제, 없으면 problemNo가 해당 값으로 시작하는 첫 문제,
+        그래도 없으면 problemNo에 해당 값이 포함된 첫 문제
+        """
+        if not problem_id:
+            return None
+        problem = self.get(problem_id, fields)
+        if problem is not None:
+            return problem
+        matches = self.find_by_prefix(problem_id, limit=1, fields=fields)
+        if matches:
+            return matches[0]
+        return self.index.find_containing(problem_id, fields)
+
+    def get_description(self, problem_id: str) -> Optional[str]:
+        """문제 설명(description) 조회"""
+        problem = self.resolve(problem_id, fields=("description",))
+        if problem is None:
+            return None
+        return problem.get("description", "")
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        if index is None:
+            return {"loaded": False}
+        return {"loaded": True, **index.stats(), "last_reload": self.last_reload}
+
+
+problem_repository = ProblemRepository(
+    settings.PROBLEM_DATA_PATH,
+    settings.PROBLEM_DB_PATH,
+    settings.PROBLEM_CATALOG_PATH,
+    settings.PROBLEM_EXTRA_GLOBS
+)
@@ -0,0 +1,217 @@
+# app/services/similar_problems.py
+"""
+유사 문제 검색 색인
+
+문제 내용(content)과 해설(explanation)을 문자 n-gram TF-IDF 벡터로 만들어 역색인에 담아 두고,
+문제 ID 또는 자유 텍스트로 코사인 유사도 상위 k개 문제를 찾습니다.
+한글 문장과 LaTeX 수식이 섞여 있어 형태소 분석 대신 문자 n-gram을 사용합니다.
+색인은 시작 시 문제 저장소에서 만들어지며, 문제 데이터가 재로드되면 백그라운드에서 다시 만들어 교체합니다.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter, defaultdict
+from app.core.config import settings
+from app.services.problem_repository import problem_repository
+from app.services.solution_steps import clean_solution_steps, strip_plain_rendering
+import asyncio
+import logging
+import math
+import re
+import time
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+_DELIMITERS = re.compile(r"\\\(|\\\)|\s+")
+
+
+def normalize_text(text: str) -> str:
+    """수식 구분자와 공백을 제거한 소문자 문자열"""
+    return _DELIMITERS.sub("", text or "").lower()
+
+
+def char_ngrams(text: str, n_min: int, n_max: int) -> Counter:
+    grams: Counter = Counter()
+    for n in range(n_min, n_max + 1):
+        for i in range(len(text) - n + 1):
+            grams[text[i:i + n]] += 1
+    return grams
+
+
+def clean_content(problem: Dict[str, Any]) -> str:
+    """평문 중복 표현을 제거한 문제 내용"""
+    return " ".join(strip_plain_rendering(line) for line in (problem.get("content") or "").split("\n"))
+
+
+def problem_text(problem: Dict[str, Any]) -> str:
+    """색인할 문제 텍스트 (평문 중복 표현과 쪽/번호 표시 제거)"""
+    content = clean_content(problem)
+    steps = problem.get("solution_steps") or clean_solution_steps(problem.get("explanation", ""))
+    return content + " " + " ".join(steps)
+
+
+class SimilarProblemIndex:
+    """
+    문자 n-gram TF-IDF 역색인 (한 번 만들어지면 변경되지 않으며, 재구축 시 통째로 교체)
+    """
+
+    def __init__(self, problems: List[Dict[str, Any]], n_min: int = 2, n_max: int = 3):
+        self.n_min = n_min
+        self.n_max = n_max
+        self.docs: List[Dict[str, Any]] = []
+        self.doc_keys: List[str] = []
+        self.lookup: Dict[str, int] = {}
+
+        # 같은 문제가 교재별 번호로 중복 등록된 경우 내용 기준으로 하나만 색인
+        by_content: Dict[str, int] = {}
+        term_counts: List[Counter] = []
+        for problem in problems:
+            text = normalize_text(problem_text(problem))
+            if not text:
+                continue
+            content = clean_content(problem)
+            content_key = normalize_text(content) or text
+            doc = by_content.get(content_key)
+            if doc is None:
+                doc = len(self.docs)
+                by_content[content_key] = doc
+                self.docs.append({
+                    "problem_id": str(problem.get("id") or problem.get("problemNo")),
+                    "problem_no": problem.get("problemNo", ""),
+                    "content": content
+                })
+                self.doc_keys.append(text)
+                term_counts.append(char_ngrams(text, n_min, n_max))
+            for key in (problem.get("id"), problem.get("problemNo")):
+                if key is not None:
+                    self.lookup[str(key)] = doc
+
+        n_docs = len(self.docs)
+        df: Counter = Counter()
+        for counts in term_counts:
+            df.update(counts.keys())
+        self.idf = {term: math.log((n_docs + 1) / (count + 1)) + 1 for term, count in df.items()}
+
+        # 역색인: n-gram → [(문서, 정규화된 가중치)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for doc, counts in enumerate(term_counts):
+            weights = self._weigh(counts)
+            for term, weight in weights.items():
+                self.postings[term].append((doc, weight))
+
+    def _weigh(self, counts: Counter) -> Dict[str, float]:
+        """부선형 TF × IDF, L2 정규화 (색인에 없는 n-gram은 제외)"""
+        weights = {
+            term: (1 + math.log(count)) * self.idf[term]
+            for term, count in counts.items() if term in self.idf
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if norm == 0:
+            return {}
+        return {term: w / norm for term, w in weights.items()}
+
+    def _search(self, counts: Counter, k: int, exclude: Optional[int] = None) -> List[Dict[str, Any]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in self._weigh(counts).items():
+            for doc, doc_weight in self.postings.get(term, ()):
+                scores[doc] += weight * doc_weight
+        if exclude is not None:
+            scores.pop(exclude, None)
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [{**self.docs[doc], "similarity": round(score, 4)} for doc, score in top if score > 0]
+
+    def similar_to_problem(self, problem_id: str, k: int) -> Optional[List[Dict[str, Any]]]:
+        """색인된 문제와 비슷한 문제 (문제가 색인에 없으면 None)"""
+        doc = self.lookup.get(str(problem_id))
+        if doc is None:
+            return None
+        counts = char_ngrams(self.doc_keys[doc], self.n_min, self.n_max)
+        return self._search(counts, k, exclude=doc)
+
+    def similar_to_text(self, text: str, k: int) -> List[Dict[str, Any]]:
+        """자유 텍스트(수식 포함)와 비슷한 문제"""
+        return self._search(char_ngrams(normalize_text(text), self.n_min, self.n_max), k)
+
+
+class SimilarProblemService:
+    """
+    유사 문제 검색 진입점 (프로세스 전역 싱글턴 `similar_problems` 사용)
+    """
+
+    def __init__(self):
+        self._index: Optional[SimilarProblemIndex] = None
+        self._building: Optional[asyncio.Task] = None
+        # 구축 중에 문제 데이터가 다시 바뀌었는지 (끝나면 한 번 더 구축)
+        self._dirty = False
+        self.build_ms: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """색인이 만들어져 검색할 수 있는지 (시작 직후 구축 중이면 False)"""
+        return self._index is not None
+
+    def build(self) -> SimilarProblemIndex:
+        """문제 저장소에서 색인 구축 후 교체 (블로킹, 워커 스레드에서 호출)"""
+        start = time.perf_counter()
+        problems = problem_repository.all(fields=("id", "problemNo", "content", "explanation", "solution_steps"))
+        index = SimilarProblemIndex(problems, settings.SIMILAR_PROBLEMS_NGRAM_MIN, settings.SIMILAR_PROBLEMS_NGRAM_MAX)
+        self._index = index
+        self.build_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"유사 문제 색인 구축 완료: 문서 {len(index.docs)}개, n-gram {len(index.postings)}개 ({self.build_ms}ms)")
+        return index
+
+    async def build_async(self):
+        await asyncio.to_thread(self.build)
+
+    async def _build_until_clean(self):
+        # 구축 중에 들어온 변경은 현재 구축이 끝난 뒤 다시 반영
+        while True:
+            self._dirty = False
+            await self.build_async()
+            if not self._dirty:
+                return
+
+    def rebuild_in_background(self, changed_ids=None):
+        """문제 데이터가 바뀌면 백그라운드에서 재구축 (문제 저장소 무효화 리스너)"""
+        if changed_ids is not None and not changed_ids:
+            return
+        if self._building and not self._building.done():
+            self._dirty = True
+            return
+        try:
+            self._building = asyncio.get_running_loop().create_task(self._build_until_clean())
+        except RuntimeError:
+            self.build()
+
+    def find(
+        self,
+        problem_id: Optional[str] = None,
+        text: Optional[str] = None,
+        k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        유사 문제 상위 k개 (문제 ID 우선, 색인에 없는 문제면 텍스트로 검색)
+
+        Returns:
+            List[Dict[str, Any]]: problem_id, problem_no, content, similarity
+        """
+        index = self._index
+        if index is None:
+            return []
+        k = k or settings.SIMILAR_PROBLEMS_TOP_K
+        if problem_id is not None:
+            found = index.similar_to_problem(problem_id, k)
+            if found is not None:
+                return found
+        if text:
+            return index.similar_to_text(text, k)
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        if index is None:
+            return {"built": False, "building": bool(self._building and not self._building.done())}
+        return {"built": True, "documents": len(index.docs), "ngrams": len(index.postings), "build_ms": self.build_ms}
+
+
+similar_problems = SimilarProblemService()
+problem_repository.add_invalidation_listener(similar_problems.rebuild_in_background)
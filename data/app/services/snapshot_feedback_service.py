@@ -3,8 +3,10 @@ from app.core.prompt_loader import load_prompt_template
 from app.core.cache import feedback_cache
 from app.core.exceptions import AIFeedbackError
 from app.services.feedback_service import generate_feedback
-from app.services.embedding_service import EmbeddingService
-from openai import AsyncOpenAI
+from app.services.embedding_service import embedding_service
+from app.services.problem_repository import problem_repository
+from app.services.solution_steps import normalize_latex
+from app.core.llm import create_chat_completion
 import logging
 import json
 import os
@@ -15,25 +17,21 @@ from typing import List, Dict, Any, Optional, Tuple
 logger = logging.getLogger(__name__)
 
 
+def _invalidate_problem_feedback(problem_ids):
+    """내용이 바뀐 문제의 캐시된 피드백 삭제 (문제 데이터 재로드 시 호출)"""
+    removed = sum(feedback_cache.delete_tag(problem_id) for problem_id in problem_ids)
+    if removed:
+        logger.info(f"문제 변경으로 캐시된 피드백 {removed}개 삭제")
+
+
+problem_repository.add_invalidation_listener(_invalidate_problem_feedback)
+
+
 class SnapshotFeedbackService:
     def __init__(self):
         self.openai_api_key = settings.OPENAI_API_KEY
         self.model = getattr(settings, "OPENAI_MODEL", "gpt-4o-mini")
-        self.problems_db_path = os.path.join(os.getcwd(), "static", "problems_db.json")
-        self.problems_cache = {}
-        self._load_problems_cache()
-        self.embedding_service = EmbeddingService()
-
-    def _load_problems_cache(self):
-        try:
-            if os.path.exists(self.problems_db_path):
-                with open(self.problems_db_path, "r", encoding="utf-8") as f:
-                    self.problems_cache = json.load(f)
-                logger.info(f"{len(self.problems_cache)} 개의 문제 정의 로드 완료")
-            else:
-                logger.warning(f"문제 데이터베이스 파일이 없습니다: {self.problems_db_path}")
-        except Exception as e:
-            logger.error(f"문제 데이터베이스 로드 오류: {str(e)}")
+        self.embedding_service = embedding_service
 
     async def analyze_snapshots(
         self,
@@ -121,7 +119,8 @@ class SnapshotFeedbackService:
                 if analysis["is_valid"] is None or getattr(settings, "ALWAYS_USE_LLM", False):
                     await self._analyze_context_step(
                         analysis, prev_latex, curr_latex, i,
-                        problem_context, grade, analyses
+                        problem_context, grade, analyses,
+                        problem_id=problem_id
                     )
 
             except Exception as e:
@@ -162,31 +161,10 @@ class SnapshotFeedbackService:
                     )
 
     def _get_problem_context(self, problem_id: str) -> Optional[str]:
-        if not problem_id or not self.problems_cache:
-            return None
-        for _, problem in self.problems_cache.items():
-            if problem.get("problemNo") == problem_id:
-                return problem.get("description", "")
-        for _, problem in self.problems_cache.items():
-            if problem_id in problem.get("problemNo", ""):
-                return problem.get("description", "")
-        return None
+        return problem_repository.get_description(problem_id)
 
     def _normalize_latex(self, latex: str) -> str:
-        if not latex:
-            return ""
-        replacements = {
-            "\\\\": "\\",  # 역슬래시 2개 → 1개
-            "\\,": " ",
-            "\\;": " ",
-            "\\quad": " ",
-            "\\qquad": " "
-        }
-
-        normalized = latex.strip()
-        for old, new in replacements.items():
-            normalized = normalized.replace(old, new)
-        return re.sub(r'\s+', ' ', normalized)
+        return normalize_latex(latex)
 
     def _remove_spaces(self, text: str) -> str:
         return re.sub(r'\s', '', text) if text else ""
@@ -285,7 +263,8 @@ class SnapshotFeedbackService:
         step_index: int,
         problem_context: Optional[str],
         grade: str,
-        previous_analyses: List[Dict[str, Any]]
+        previous_analyses: List[Dict[str, Any]],
+        problem_id: Optional[str] = None
     ):
         prev_clean = self._normalize_latex(prev_latex)
         curr_clean = self._normalize_latex(curr_latex)
@@ -333,9 +312,22 @@ class SnapshotFeedbackService:
 - 피드백: [오류가 있는 경우 어디가 틀렸는지, 어떻게 해결해야 하는지에 대한 구체적 조언. 잘 했다면 학생이 이해하기 쉽게 무엇을 잘 수행했는지 구체적인 설명.]
 """
 
+        # 같은 문제·학년에서 같은 수식 변화는 캐시된 분석 재사용 (문제가 바뀌면 문제 ID 태그로 함께 무효화)
+        # 문제 ID 없이 문제 정의만 전달된 경우에는 정의가 키에 반영되지 않으므로 캐시하지 않음
+        cache_key = None
+        if problem_id or not problem_context:
+            cache_key = f"{problem_id or ''}|{grade}|{prev_clean}|{curr_clean}"
+            cached = feedback_cache.get(cache_key)
+            if cached:
+                logger.info(f"캐시된 LLM 상세 분석 사용 (단계 {step_index + 1})")
+                analysis["is_valid"] = cached["is_valid"]
+                analysis["step_feedback"] = cached["feedback"]
+                analysis["concepts"] = cached["concepts"]
+                analysis["analysis_text"] = cached["analysis_text"]
+                return
+
         try:
-            client = AsyncOpenAI(api_key=self.openai_api_key)
-            response = await client.chat.completions.create(
+            response = await create_chat_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -382,14 +374,13 @@ class SnapshotFeedbackService:
             
             logger.info(f"LLM 상세 분석 결과: is_valid={is_valid}, concepts='{concepts[:30]}...', analysis_len={len(analysis_text)}")
             
-            # 캐시에 저장
-            cache_key = f"{prev_clean}|{curr_clean}"
-            feedback_cache.set(cache_key, {
-                "feedback": final_feedback,
-                "is_valid": analysis["is_valid"],
-                "concepts": concepts,
-                "analysis_text": analysis_text
-            })
+            if cache_key is not None:
+                feedback_cache.set(cache_key, {
+                    "feedback": final_feedback,
+                    "is_valid": analysis["is_valid"],
+                    "concepts": concepts,
+                    "analysis_text": analysis_text
+                }, tag=problem_id)
         except Exception as e:
             logger.error(f"LLM 분석 오류: {str(e)}")
             analysis["step_feedback"] = "분석 중 오류가 발생했습니다."
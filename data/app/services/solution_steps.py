@@ -0,0 +1,106 @@
+# app/services/solution_steps.py
+"""
+모범 답안(explanation) 풀이 단계 정리
+
+원본 explanation은 수식마다 LaTeX(\\( ... \\))와 띄어쓰기된 평문 표현이 함께 들어 있고,
+끝에 쪽/번호 표시(01, #쪽, 009, #번, 25475-0009 등)가 붙어 있습니다.
+이를 그대로 줄 단위로 나누면 의미 없는 단계가 임베딩/유사도 비교에 섞이므로
+평문 중복 표현과 표시 줄을 제거한 단계 목록을 만듭니다.
+scripts/convert_problems_to_db.py(오프라인)와 임베딩 서비스가 같은 규칙을 사용합니다.
+학생 풀이 수식 정규화(normalize_latex)도 스냅샷 피드백 검증과 임베딩 캐시 키가 함께 사용합니다.
+"""
+from typing import List
+import re
+
+_MATH = re.compile(r"\\\((.*?)\\\)")
+_COMMAND = re.compile(r"\\[A-Za-z]+")
+
+# 쪽/번호/문제 번호 표시 줄
+_MARKER_LINE = re.compile(r"^(#\S*|\d+|[A-Za-z0-9]+-\d+)$")
+
+
+def is_marker_line(text: str) -> bool:
+    """쪽/번호 표시처럼 풀이 내용이 아닌 줄인지"""
+    return bool(_MARKER_LINE.match(text.strip()))
+
+
+# 수식 비교 전에 통일할 LaTeX 표기 (역슬래시 중복, 간격 명령)
+_LATEX_REPLACEMENTS = {
+    "\\\\": "\\",  # 역슬래시 2개 → 1개
+    "\\,": " ",
+    "\\;": " ",
+    "\\quad": " ",
+    "\\qquad": " "
+}
+
+
+def normalize_latex(latex: str) -> str:
+    """학생 풀이 수식 정규화 (역슬래시 중복/간격 명령 통일, 연속 공백 하나로)"""
+    if not latex:
+        return ""
+    normalized = latex.strip()
+    for old, new in _LATEX_REPLACEMENTS.items():
+        normalized = normalized.replace(old, new)
+    return re.sub(r'\s+', ' ', normalized)
+
+
+def _rendering_end(latex: str, tail: str) -> int:
+    """
+    tail 앞부분이 수식의 평문 표현이면 그 끝 위치, 아니면 0
+    (평문 표현은 수식의 영숫자를 같은 순서로 띄어 쓴 것이므로 영숫자 순서로 대조)
+    """
+    key = [c for c in _COMMAND.sub("", latex) if c.isalnum()]
+    if not key:
+        return 0
+    k = 0
+    for i, c in enumerate(tail):
+        if not c.isalnum():
+            continue
+        if c != key[k]:
+            return 0
+        k += 1
+        if k == len(key):
+            end = i + 1
+            while end < len(tail) and tail[end] in ")]} ":
+                end += 1
+            return end
+    return 0
+
+
+def strip_plain_rendering(line: str) -> str:
+    """수식 뒤의 평문 중복 표현을 제거하고 공백 정리 (표현에 없는 이어지는 내용은 유지)"""
+    line = re.sub(r"\s", " ", line)
+    parts = []
+    pos = 0
+    for match in _MATH.finditer(line):
+        parts.append(line[pos:match.end()])
+        pos = match.end()
+        next_math = line.find("\\(", pos)
+        tail = line[pos:next_math if next_math >= 0 else len(line)]
+        pos += _rendering_end(match.group(1), tail)
+    parts.append(line[pos:])
+    return re.sub(r"\s+", " ", " ".join(parts)).strip()
+
+
+def clean_solution_steps(explanation: str) -> List[str]:
+    """
+    explanation을 정리된 풀이 단계 목록으로 변환
+
+    Args:
+        explanation (str): 원본 모범 답안
+
+    Returns:
+        List[str]: 표시 줄/평문 중복/중복 단계가 제거된 풀이 단계
+    """
+    steps: List[str] = []
+    seen = set()
+    for raw in (explanation or "").split("\n"):
+        line = raw.strip()
+        if not line or is_marker_line(line):
+            continue
+        step = strip_plain_rendering(line)
+        if not step or step in seen:
+            continue
+        seen.add(step)
+        steps.append(step)
+    return steps
@@ -0,0 +1,105 @@
+# app/services/step_embedding_cache.py
+"""
+학생 풀이 단계 임베딩 캐시
+
+같은 문제를 푸는 학생들은 `=4A-B` 같은 중간 수식을 똑같이 쓰므로,
+임베딩 모델 이름 + 정규화된 LaTeX(normalize_latex, 스냅샷 피드백 검증과 같은 규칙)를 키로
+임베딩 벡터를 저장해 외부 임베딩 호출을 생략합니다.
+- 1계층: 프로세스 내 LRU 캐시 (float32 벡터)
+- 2계층: 디스크 또는 Redis 영속 캐시 (float32 바이트)
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.services.solution_steps import normalize_latex
+import hashlib
+import logging
+import numpy as np
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+def step_embedding_key(model: str, latex: str) -> str:
+    """
+    임베딩 모델 이름과 정규화된 수식으로 캐시 키 생성
+
+    Args:
+        model (str): 임베딩 모델 이름
+        latex (str): 학생 풀이 단계 수식 (정규화 전)
+
+    Returns:
+        str: SHA-256 해시 키
+    """
+    digest = hashlib.sha256()
+    digest.update(model.encode())
+    digest.update(b"\0")
+    digest.update(normalize_latex(latex).encode())
+    return digest.hexdigest()
+
+
+def _decode_vector(raw: bytes) -> np.ndarray:
+    if not raw or len(raw) % 4:
+        raise ValueError("float32 벡터가 아닌 캐시 항목")
+    return np.frombuffer(raw, dtype=np.float32)
+
+
+class StepEmbeddingCache(TieredCache):
+    """
+    2계층(LRU + 영속) 학생 풀이 단계 임베딩 캐시 (두 계층 모두 float32 벡터로 저장)
+    """
+
+    def __init__(self, max_items: int, backend: str, ttl: Optional[int] = None):
+        """
+        Args:
+            max_items (int): 인메모리 LRU 최대 항목 수
+            backend (str): 영속 계층 종류 ('disk', 'redis', 'none')
+            ttl (Optional[int]): 영속 계층 항목 수명(초)
+        """
+        super().__init__(
+            max_items=max_items,
+            backend=backend,
+            prefix="step_embedding",
+            directory=settings.STEP_EMBEDDING_CACHE_DIR,
+            ttl=ttl,
+            encode=lambda vector: vector.tobytes(),
+            decode=_decode_vector
+        )
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        여러 키를 한 번에 조회
+
+        Returns:
+            Dict[str, List[float]]: 캐시에 있는 키 → 임베딩 (없는 키는 포함하지 않음)
+        """
+        found = await super().get_many(keys)
+        return {key: vector.tolist() for key, vector in found.items()}
+
+    async def set_many(self, items: Dict[str, List[float]]) -> None:
+        """임베딩 저장 (두 계층 모두, 빈 임베딩은 제외)"""
+        await super().set_many({
+            key: np.asarray(embedding, dtype=np.float32) for key, embedding in items.items() if embedding
+        })
+
+
+_step_cache: Optional[StepEmbeddingCache] = None
+
+
+def get_step_embedding_cache() -> StepEmbeddingCache:
+    """프로세스 전역 학생 풀이 단계 임베딩 캐시 반환 (최초 호출 시 생성)"""
+    global _step_cache
+    if _step_cache is None:
+        _step_cache = StepEmbeddingCache(
+            max_items=settings.STEP_EMBEDDING_CACHE_MAX_ITEMS,
+            backend=settings.STEP_EMBEDDING_CACHE_BACKEND,
+            ttl=settings.STEP_EMBEDDING_CACHE_TTL
+        )
+    return _step_cache
+
+
+def step_embedding_cache_stats() -> Dict[str, Any]:
+    """헬스 체크용 캐시 통계 (적중률 포함)"""
+    if not settings.STEP_EMBEDDING_CACHE_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_step_embedding_cache().stats()}
@@ -0,0 +1,268 @@
+# app/services/step_index.py
+"""
+전체 모범 답안 풀이 단계 근사 최근접 이웃(ANN) 색인
+
+문제 하나의 모범 답안과만 비교하던 유사도 분석을 보완해, 학생이 쓴 수식이 카탈로그 전체에서
+어느 문제의 어느 풀이 단계와 가장 비슷한지 찾습니다. (다른 풀이 방법 혼동 감지, 개념 추천)
+임베딩 저장소의 모든 단계 임베딩을 구면 k-means로 군집화한 IVF(inverted file) 색인이며,
+군집 순서로 정렬한 행렬을 .npy로 저장해 메모리 매핑으로 엽니다.
+검색 시 질의와 가까운 중심 n_probe개의 군집만 비교합니다.
+
+색인은 app/scripts/build_step_index.py로 오프라인에서 만들며, 모범 답안 임베딩을 다시 생성한 뒤에는 색인도 다시 만들어야 합니다.
+"""
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from app.services.embedding_store import EmbeddingStore
+import json
+import logging
+import math
+import os
+import numpy as np
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.array(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def spherical_kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    정규화된 벡터의 구면 k-means (코사인 유사도 기준 군집 중심 반환)
+
+    Args:
+        vectors (np.ndarray): L2 정규화된 float32 행렬
+        n_lists (int): 군집 수
+        iterations (int): 반복 횟수
+        seed (int): 초기 중심 선택 시드
+
+    Returns:
+        np.ndarray: L2 정규화된 군집 중심 (n_lists × 차원)
+    """
+    rng = np.random.default_rng(seed)
+    # 학습은 군집당 최대 256개 표본으로 제한
+    sample_size = min(len(vectors), n_lists * 256)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = (sample @ centroids.T).argmax(axis=1)
+        # 군집별 합: 할당 순으로 정렬한 뒤 구간 합 (np.add.at보다 훨씬 빠름)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.zeros_like(centroids)
+        nonempty = counts > 0
+        sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+        empty = ~nonempty
+        # 빈 군집은 임의의 표본으로 다시 시작
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+class StepANNIndex:
+    """
+    IVF 색인 (한 번 만들어지면 변경되지 않으며, 다시 만들 때는 파일을 통째로 교체)
+    """
+
+    FILES = ("centroids.npy", "vectors.npy", "offsets.npy", "row_problems.npy", "row_steps.npy")
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        vectors: np.ndarray,
+        offsets: np.ndarray,
+        row_problems: np.ndarray,
+        row_steps: np.ndarray,
+        meta: Dict[str, Any]
+    ):
+        """
+        Args:
+            centroids (np.ndarray): 군집 중심 (n_lists × 차원)
+            vectors (np.ndarray): 군집 순서로 정렬된 정규화 단계 임베딩 (단계 수 × 차원)
+            offsets (np.ndarray): 군집 i의 행 범위 offsets[i]:offsets[i + 1]
+            row_problems (np.ndarray): 행별 문제 번호 (meta["problem_ids"]의 인덱스)
+            row_steps (np.ndarray): 행별 풀이 단계 인덱스
+            meta (Dict[str, Any]): embedding_model, dim, count, problem_ids, solution_steps
+        """
+        self.centroids = centroids
+        self.vectors = vectors
+        self.offsets = offsets
+        self.row_problems = row_problems
+        self.row_steps = row_steps
+        self.meta = meta
+        self.problem_ids: List[str] = meta["problem_ids"]
+        self.solution_steps: Dict[str, List[str]] = meta["solution_steps"]
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    @property
+    def n_lists(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        store: EmbeddingStore,
+        n_lists: Optional[int] = None,
+        iterations: int = 20,
+        seed: int = 0
+    ) -> "StepANNIndex":
+        """
+        임베딩 저장소의 모든 문제로 색인 구축 (차원이 다른 문제는 제외)
+
+        Args:
+            store (EmbeddingStore): 모범 답안 임베딩 저장소
+            n_lists (Optional[int]): 군집 수 (None이면 √단계 수)
+            iterations (int): k-means 반복 횟수
+            seed (int): k-means 시드
+        """
+        problem_ids: List[str] = []
+        solution_steps: Dict[str, List[str]] = {}
+        matrices: List[np.ndarray] = []
+        row_problems: List[np.ndarray] = []
+        embedding_model = ""
+        dim = None
+
+        for problem_id in store.problem_ids():
+            data = store.load(problem_id)
+            if not data or not len(data["matrix"]):
+                continue
+            matrix = data["matrix"]
+            if dim is None:
+                dim = int(matrix.shape[1])
+                embedding_model = data.get("embedding_model", "")
+            if matrix.shape[1] != dim:
+                logger.warning(f"문제 {problem_id}의 임베딩 차원({matrix.shape[1]})이 달라 색인에서 제외합니다.")
+                continue
+            row_problems.append(np.full(len(matrix), len(problem_ids), dtype=np.int32))
+            problem_ids.append(problem_id)
+            solution_steps[problem_id] = list(data["solution_steps"])
+            matrices.append(matrix)
+
+        if not matrices:
+            raise ValueError(f"색인할 임베딩이 없습니다: {store.directory}")
+
+        vectors = _normalize_rows(np.concatenate(matrices))
+        problems = np.concatenate(row_problems)
+        steps = np.concatenate([np.arange(len(m), dtype=np.int32) for m in matrices])
+
+        n_lists = min(n_lists or max(1, int(math.sqrt(len(vectors)))), len(vectors))
+        centroids = spherical_kmeans(vectors, n_lists, iterations, seed)
+
+        # 군집 순서로 정렬해 군집마다 연속된 행 범위가 되도록 함
+        assignments = (vectors @ centroids.T).argmax(axis=1)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+
+        meta = {
+            "embedding_model": embedding_model,
+            "dim": dim,
+            "count": int(len(vectors)),
+            "n_lists": n_lists,
+            "problem_ids": problem_ids,
+            "solution_steps": solution_steps
+        }
+        return cls(centroids, vectors[order], offsets, problems[order], steps[order], meta)
+
+    def save(self, directory: str):
+        """색인 저장 (임시 파일에 쓴 뒤 교체, 메타데이터를 마지막에 씀)"""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = (self.centroids, self.vectors, self.offsets, self.row_problems, self.row_steps)
+        for name, array in zip(self.FILES, arrays):
+            tmp_path = path / f"{name}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp_path, path / name)
+
+        tmp_path = path / "meta.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp_path, path / "meta.json")
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["StepANNIndex"]:
+        """색인 로드 (단계 임베딩 행렬은 메모리 매핑, 색인이 없으면 None)"""
+        path = Path(directory)
+        if not (path / "meta.json").exists():
+            return None
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        centroids, vectors, offsets, row_problems, row_steps = (
+            np.load(path / name, mmap_mode=None if name == "centroids.npy" else "r") for name in cls.FILES
+        )
+        if vectors.shape != (meta["count"], meta["dim"]) or len(offsets) != len(centroids) + 1:
+            logger.error(f"풀이 단계 색인 파일이 메타데이터와 일치하지 않습니다: {directory}")
+            return None
+        # 군집 범위는 검색마다 쓰이므로 메모리에 올려 둠
+        return cls(centroids, vectors, np.array(offsets), row_problems, row_steps, meta)
+
+    def search(self, queries: np.ndarray, k: int = 1, n_probe: int = 8) -> List[List[Dict[str, Any]]]:
+        """
+        질의 벡터마다 가장 비슷한 풀이 단계 상위 k개
+
+        Args:
+            queries (np.ndarray): 질의 임베딩 (질의 수 × 차원, 정규화 불필요)
+            k (int): 질의당 결과 수
+            n_probe (int): 비교할 군집 수 (클수록 정확하지만 느림)
+
+        Returns:
+            List[List[Dict[str, Any]]]: 질의별 problem_id, step_index, step, similarity (크기가 0인 질의는 빈 목록)
+        """
+        queries = _normalize_rows(np.atleast_2d(queries))
+        n_probe = min(n_probe, self.n_lists)
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :n_probe]
+
+        results = []
+        for query, lists in zip(queries, probes):
+            if not query.any():
+                results.append([])
+                continue
+            rows: List[np.ndarray] = []
+            scores: List[np.ndarray] = []
+            # 군집별 연속 구간을 복사 없이 바로 곱함
+            for list_id in lists:
+                start, end = self.offsets[list_id], self.offsets[list_id + 1]
+                if start == end:
+                    continue
+                rows.append(np.arange(start, end))
+                scores.append(self.vectors[start:end] @ query)
+            if not scores:
+                results.append([])
+                continue
+            rows_all = np.concatenate(rows)
+            scores_all = np.concatenate(scores)
+            top = np.argpartition(-scores_all, min(k, len(scores_all)) - 1)[:k]
+            top = top[np.argsort(-scores_all[top])]
+
+            matches = []
+            for i in top:
+                row = rows_all[i]
+                problem_id = self.problem_ids[int(self.row_problems[row])]
+                step_index = int(self.row_steps[row])
+                matches.append({
+                    "problem_id": problem_id,
+                    "step_index": step_index,
+                    "step": self.solution_steps[problem_id][step_index],
+                    "similarity": round(float(scores_all[i]), 4)
+                })
+            results.append(matches)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "steps": self.meta["count"],
+            "problems": len(self.problem_ids),
+            "lists": self.n_lists,
+            "dim": self.dim,
+            "embedding_model": self.meta["embedding_model"]
+        }
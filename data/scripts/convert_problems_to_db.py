@@ -2,14 +2,50 @@
 # -*- coding: utf-8 -*-
 """
 JSON 형식의 문제 데이터를 RAG 시스템에서 활용할 수 있는 형태로 변환하는 스크립트
-사용법: python convert_problems_to_db.py <입력파일.json> <출력파일.json>
+사용법: python convert_problems_to_db.py <입력파일.json> [<입력파일2.json> ...] <출력파일.json|출력파일.sqlite>
+        [--embeddings-dir static/embeddings] [--embedding-model text-embedding-3-small]
+
+출력 파일 확장자가 .sqlite/.db이면 problemNo/id 인덱스를 둔 SQLite 카탈로그로 저장합니다.
+서비스는 카탈로그를 지연 연결하여 요청에 필요한 행과 필드만 읽으므로
+문제 수가 늘어나도 시작 시간과 메모리 사용량이 일정하게 유지됩니다.
+입력 파일이 여러 개이면 problemNo 기준으로 병합하며, 앞선 파일의 값이 우선합니다.
+
+각 문제의 explanation은 쪽/번호 표시와 평문 중복 표현을 제거한 solution_steps로 정리되고,
+--embeddings-dir를 지정하면 모든 문제의 풀이 단계 임베딩을 일괄 생성해 저장합니다
+(서비스는 요청 처리 중 모범 답안을 임베딩하지 않음).
 """
 
+import argparse
 import json
 import sys
 import os
 import logging
 import re
+import sqlite3
+
+# 프로젝트 루트 경로를 Python 경로에 추가
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.solution_steps import clean_solution_steps
+from app.services.embedding_store import EmbeddingStore
+
+# SQLite 카탈로그 컬럼 ↔ 문제 필드
+CATALOG_COLUMNS = [
+    ("problem_no", "problemNo"),
+    ("id", "id"),
+    ("category_id", "categoryId"),
+    ("book_id", "bookId"),
+    ("inner_no", "innerNo"),
+    ("type", "type"),
+    ("content", "content"),
+    ("answer", "answer"),
+    ("explanation", "explanation"),
+    ("description", "description"),
+    ("solution_steps", "solution_steps"),
+]
+
+# 임베딩 API 한 번에 보낼 최대 텍스트 수
+EMBEDDING_BATCH_SIZE = 256
 
 # 로깅 설정
 logging.basicConfig(
@@ -38,53 +74,154 @@ def extract_description(content):
     
     return cleaned
 
-def convert_problems(input_file, output_file):
+def load_problems(input_file):
+    """
+    입력 파일에서 문제 목록 읽기
+    문제 리스트, csvjson 형식({"row_to_json": {...}} 리스트), problems_db 형식(problemNo → 문제) 모두 허용
+    """
+    logger.info(f"입력 파일 읽기: {input_file}")
+    with open(input_file, 'r', encoding='utf-8') as f:
+        problems = json.load(f)
+
+    if isinstance(problems, dict):
+        problems = list(problems.values())
+    if not isinstance(problems, list):
+        raise ValueError(f"입력 데이터가 리스트 형식이 아닙니다: {input_file}")
+
+    logger.info(f"총 {len(problems)}개의 문제가 로드되었습니다.")
+    return [problem.get('row_to_json', problem) for problem in problems]
+
+
+def _catalog_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def write_catalog(problems_db, output_file):
+    """
+    SQLite 카탈로그로 저장 (임시 파일에 쓴 뒤 교체하여 실행 중인 서비스가 불완전한 파일을 열지 않도록 함)
+    """
+    tmp_file = f"{output_file}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    conn = sqlite3.connect(tmp_file)
+    try:
+        columns = ", ".join(
+            f"{column} TEXT PRIMARY KEY" if column == "problem_no" else f"{column} TEXT"
+            for column, _ in CATALOG_COLUMNS
+        )
+        conn.execute(f"CREATE TABLE problems ({columns}) WITHOUT ROWID")
+        conn.execute("CREATE INDEX idx_problems_id ON problems(id)")
+        placeholders = ", ".join("?" for _ in CATALOG_COLUMNS)
+        conn.executemany(
+            f"INSERT INTO problems VALUES ({placeholders})",
+            [
+                tuple(_catalog_value(problem.get(field)) for _, field in CATALOG_COLUMNS)
+                for problem in problems_db.values()
+            ]
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_file, output_file)
+
+
+def embed_texts(texts, model):
+    """
+    텍스트 목록을 일괄 임베딩 (중복 제거 후 EMBEDDING_BATCH_SIZE 단위 요청)
+
+    Returns:
+        dict: 텍스트 → 임베딩 벡터
+    """
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    unique = list(dict.fromkeys(texts))
+    embeddings = {}
+    for start in range(0, len(unique), EMBEDDING_BATCH_SIZE):
+        batch = unique[start:start + EMBEDDING_BATCH_SIZE]
+        response = client.embeddings.create(model=model, input=batch)
+        for item in response.data:
+            embeddings[batch[item.index]] = item.embedding
+        logger.info(f"임베딩 생성: {min(start + EMBEDDING_BATCH_SIZE, len(unique))}/{len(unique)}")
+    return embeddings
+
+
+def write_step_embeddings(problems_db, embeddings_dir, model):
+    """
+    모든 문제의 풀이 단계 임베딩을 생성해 임베딩 저장소({id}.npy + {id}.meta.json)에 저장
+    (임베딩 서비스와 같은 저장소 형식, id가 없는 문제는 problemNo 사용)
+    """
+    store = EmbeddingStore(embeddings_dir)
+    texts = [step for problem in problems_db.values() for step in problem.get('solution_steps', [])]
+    embeddings = embed_texts(texts, model)
+
+    for problem_no, problem in problems_db.items():
+        steps = problem.get('solution_steps', [])
+        if not steps:
+            continue
+        problem_id = str(problem.get('id') or problem_no)
+        store.save(problem_id, steps, [embeddings[step] for step in steps], model)
+    logger.info(f"풀이 단계 임베딩 저장 완료: {embeddings_dir} (고유 단계 {len(embeddings)}개)")
+
+
+def convert_problems(input_files, output_file, embeddings_dir=None, embedding_model="text-embedding-3-small"):
     """
     문제 데이터를 변환하고 저장
     
     Args:
-        input_file (str): 입력 JSON 파일 경로
-        output_file (str): 출력 JSON 파일 경로
+        input_files (list): 입력 JSON 파일 경로 목록 (하나만 넘겨도 됨)
+        output_file (str): 출력 파일 경로 (.json 또는 .sqlite/.db)
+        embeddings_dir (str, optional): 풀이 단계 임베딩을 저장할 디렉토리 (없으면 생성하지 않음)
+        embedding_model (str): 임베딩 모델 이름
     """
+    if isinstance(input_files, str):
+        input_files = [input_files]
+
     try:
-        # 입력 파일 읽기
-        logger.info(f"입력 파일 읽기: {input_file}")
-        with open(input_file, 'r', encoding='utf-8') as f:
-            problems = json.load(f)
-        
-        # 데이터 형식 확인
-        if not isinstance(problems, list):
-            logger.error("입력 데이터가 리스트 형식이 아닙니다.")
-            return False
-        
-        logger.info(f"총 {len(problems)}개의 문제가 로드되었습니다.")
-        
         # 변환된 문제를 저장할 사전
         problems_db = {}
         
         # 각 문제 변환
-        for problem in problems:
-            # problemNo를 키로 사용
-            problem_no = problem.get('problemNo', '')
-            if not problem_no:
-                logger.warning("문제 번호가 없는 항목을 건너뜁니다.")
-                continue
-            
-            # 핵심 설명 추출
-            content = problem.get('content', '')
-            description = extract_description(content)
-            
-            # 변환된 형식으로 저장
-            problems_db[problem_no] = {
-                **problem,  # 기존 모든 필드 유지
-                'description': description  # 핵심 설명 추가
-            }
+        for input_file in input_files:
+            for problem in load_problems(input_file):
+                # problemNo를 키로 사용
+                problem_no = problem.get('problemNo', '')
+                if not problem_no:
+                    logger.warning("문제 번호가 없는 항목을 건너뜁니다.")
+                    continue
+
+                # 핵심 설명 추출
+                content = problem.get('content', '')
+                description = problem.get('description') or extract_description(content)
+
+                # 정리된 풀이 단계
+                solution_steps = clean_solution_steps(problem.get('explanation', ''))
+
+                # 변환된 형식으로 저장 (앞선 입력 파일의 값 우선)
+                problems_db[problem_no] = {
+                    **problem,  # 기존 모든 필드 유지
+                    'description': description,  # 핵심 설명 추가
+                    'solution_steps': solution_steps,
+                    **problems_db.get(problem_no, {})
+                }
         
         # 결과 저장
         logger.info(f"변환된 {len(problems_db)}개의 문제를 저장합니다: {output_file}")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(problems_db, f, ensure_ascii=False, indent=2)
+        if output_file.endswith(('.sqlite', '.db')):
+            write_catalog(problems_db, output_file)
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(problems_db, f, ensure_ascii=False, indent=2)
         
+        if embeddings_dir:
+            write_step_embeddings(problems_db, embeddings_dir, embedding_model)
+
         logger.info("변환 완료!")
         return True
         
@@ -96,18 +233,24 @@ def main():
     """
     명령줄 인자를 처리하는 메인 함수
     """
-    if len(sys.argv) != 3:
-        print(f"사용법: python {os.path.basename(__file__)} <입력파일.json> <출력파일.json>")
-        return
+    parser = argparse.ArgumentParser(description="문제 데이터 변환 (JSON / SQLite 카탈로그, 풀이 단계 임베딩)")
+    parser.add_argument("paths", nargs="+", help="입력 JSON 파일(들)과 마지막에 출력 파일")
+    parser.add_argument("--embeddings-dir", help="풀이 단계 임베딩 저장 디렉토리 (예: static/embeddings)")
+    parser.add_argument("--embedding-model", default="text-embedding-3-small", help="임베딩 모델")
+    args = parser.parse_args()
+
+    if len(args.paths) < 2:
+        parser.error("입력 파일과 출력 파일을 모두 지정해야 합니다.")
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
+    input_files = args.paths[:-1]
+    output_file = args.paths[-1]
     
-    if not os.path.exists(input_file):
-        logger.error(f"입력 파일이 존재하지 않습니다: {input_file}")
-        return
+    for input_file in input_files:
+        if not os.path.exists(input_file):
+            logger.error(f"입력 파일이 존재하지 않습니다: {input_file}")
+            return
     
-    success = convert_problems(input_file, output_file)
+    success = convert_problems(input_files, output_file, args.embeddings_dir, args.embedding_model)
     
     if success:
         logger.info(f"문제 변환 성공: {output_file}")